@@ -0,0 +1,78 @@
+# benchmarks/bulk_ingest_bench.py
+"""Measure POST /influencers/bulk and /brands/bulk throughput in rows/s.
+
+    python -m benchmarks.bulk_ingest_bench --rows 50000 --db /tmp/bulk_bench.db
+
+Each run starts from an empty SQLite file, uploads ``--rows`` new profiles
+and then the same emails again (the update path), both through the app
+in-process. Rows carry no password so bcrypt does not dominate.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+
+TAGS = ["fashion", "fitness", "food", "travel", "tech", "beauty", "gaming", "music"]
+CITIES = ["Mumbai", "Delhi", "Bengaluru", "Pune", "Chennai", "Hyderabad", "Kolkata", "Jaipur"]
+
+def influencer_body(rows: int, rng, offset: int = 0) -> bytes:
+    lines = []
+    for i in range(rows):
+        lines.append(json.dumps({
+            "email": f"influencer{i}@bench.example.com",
+            "name": f"Influencer {i}",
+            "tag": rng.choice(TAGS),
+            "location": rng.choice(CITIES),
+            "reach": rng.randint(100, 2_000_000) + offset,
+        }))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def brand_body(rows: int, rng) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["name", "email", "phone_number", "tag", "location", "event_start", "event_end"])
+    for i in range(rows):
+        writer.writerow([f"Brand {i}", f"brand{i}@bench.example.com", f"+91{rng.randint(7000000000, 9999999999)}",
+                         rng.choice(TAGS), rng.choice(CITIES), "2026-01-01", "2026-03-31"])
+    return out.getvalue().encode("utf-8")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--db", default="/tmp/bulk_bench.db")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ.setdefault("BULK_INGEST_TOKEN", "bench")
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    headers = {"X-Ingest-Token": os.environ["BULK_INGEST_TOKEN"]}
+    rng = random.Random(args.seed)
+    runs = [
+        ("influencers insert", "/influencers/bulk", influencer_body(args.rows, rng), "application/x-ndjson"),
+        ("influencers update", "/influencers/bulk", influencer_body(args.rows, rng, offset=1), "application/x-ndjson"),
+        ("brands insert (csv)", "/brands/bulk", brand_body(args.rows, rng), "text/csv"),
+    ]
+    for label, path, body, content_type in runs:
+        t0 = time.perf_counter()
+        resp = client.post(path, content=body, headers={**headers, "Content-Type": content_type})
+        elapsed = time.perf_counter() - t0
+        report = resp.json()
+        if resp.status_code != 200 or report["failed"]:
+            print(f"{label}: HTTP {resp.status_code} {str(report)[:300]}", file=sys.stderr)
+            return 1
+        print(f"{label:>22}: {args.rows} rows in {elapsed:6.2f}s = {args.rows / elapsed:9.0f} rows/s "
+              f"(created={report['created']} updated={report['updated']})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# benchmarks/cold_start.py
+"""Time a worker's cold start, from a fresh interpreter to its first response.
+
+    python -m benchmarks.cold_start --scale 10k --repeat 5 --budget-ms 2000
+
+Each sample runs a new Python process that imports ``main``, runs the app's
+lifespan startup and serves one ``/influencers/filter`` page through an
+in-process ASGI client, like ``benchmarks.load_test``. The medians of the
+phases and of the whole process are compared with the budget
+(``COLD_START_BUDGET_MS``); the load test records the same figures in its
+report. The database must already be migrated (``python -m utils.migrations``).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "2000"))
+PHASES = ("import_ms", "startup_ms", "first_request_ms", "total_ms")
+FIRST_REQUEST = "/influencers/filter?limit=20"
+
+def _child() -> dict:
+    """One cold start in this process; called in the spawned interpreter."""
+    import asyncio
+    t0 = time.perf_counter()
+    from main import app
+    imported = time.perf_counter()
+
+    async def serve():
+        import httpx
+        async with app.router.lifespan_context(app):
+            started = time.perf_counter()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                response = await client.get(FIRST_REQUEST)
+            return started, time.perf_counter(), response.status_code
+
+    started, answered, status = asyncio.run(serve())
+    return {
+        "import_ms": (imported - t0) * 1000,
+        "startup_ms": (started - imported) * 1000,
+        "first_request_ms": (answered - started) * 1000,
+        "status": status,
+    }
+
+def measure(db_url: str, repeat: int = 3, budget_ms: float = COLD_START_BUDGET_MS) -> dict:
+    """Median phases of ``repeat`` cold starts against ``db_url``."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        done = subprocess.run(
+            [sys.executable, "-m", "benchmarks.cold_start", "--child"],
+            env={**os.environ, "DATABASE_URL": db_url}, capture_output=True, text=True,
+        )
+        total_ms = (time.perf_counter() - t0) * 1000
+        if done.returncode != 0:
+            raise RuntimeError(f"cold start failed:\n{done.stderr.strip()}")
+        sample = json.loads(done.stdout.strip().splitlines()[-1])
+        if sample["status"] != 200:
+            raise RuntimeError(f"cold start: GET {FIRST_REQUEST} answered {sample['status']}")
+        samples.append({**sample, "total_ms": total_ms})
+    result = {phase: round(statistics.median(s[phase] for s in samples), 1) for phase in PHASES}
+    result.update(samples=repeat, budget_ms=budget_ms, within_budget=result["total_ms"] <= budget_ms)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scale", default="10k", help="users in the benchmark database: 10k, 100k, 1m or a number")
+    parser.add_argument("--db", default=None, help="SQLAlchemy URL (default sqlite:////tmp/bench_<scale>.db)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=COLD_START_BUDGET_MS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        print(json.dumps(_child()))
+        return 0
+
+    from benchmarks.report import format_cold_start
+    result = measure(args.db or f"sqlite:////tmp/bench_{args.scale.lower()}.db", args.repeat, args.budget_ms)
+    print(format_cold_start(result))
+    return 0 if result["within_budget"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+# benchmarks/datagen.py
+"""Seeded synthetic data for users, influencers and brands.
+
+    python -m benchmarks.datagen --scale 100k --db sqlite:////tmp/bench_100k.db
+    python -m benchmarks.datagen --scale 1m --db mysql+pymysql://user:pw@localhost/bench
+
+``--scale`` is the number of users (``10k``, ``100k``, ``1m`` or a plain
+integer); about 80% of them are influencers and 20% brands, each with a
+profile row. Tags and locations follow a Zipf distribution so a few buckets
+are hot and most are long-tail, reach is heavy-tailed and verification
+grows with reach, brand events cluster around today and signup times span
+two years. The same seed and scale always produce the same rows.
+
+Every user gets the password ``BENCH_PASSWORD`` so the load test can log in.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from models.keys import ID_VERSION, format_id, uuid7_int
+
+BENCH_PASSWORD = "bench-password"
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+INFLUENCER_SHARE = 0.8
+
+TAGS = [
+    "fashion", "fitness", "food", "travel", "tech", "beauty", "gaming", "music", "lifestyle", "finance",
+    "parenting", "education", "sports", "comedy", "art", "photography", "health", "automotive", "pets", "books",
+]
+LOCATIONS = [
+    "Mumbai", "Delhi", "Bengaluru", "Hyderabad", "Chennai", "Kolkata", "Pune", "Ahmedabad", "Jaipur", "Surat",
+    "Lucknow", "Kanpur", "Nagpur", "Indore", "Bhopal", "Patna", "Vadodara", "Goa", "Kochi", "Chandigarh",
+    "Coimbatore", "Mysuru", "Nashik", "Ranchi", "Guwahati", "Dehradun", "Amritsar", "Udaipur", "Shillong", "Pondicherry",
+]
+FIRST = ["Aarav", "Vivaan", "Aditya", "Diya", "Ananya", "Ishaan", "Kavya", "Riya", "Arjun", "Meera",
+         "Rohan", "Saanvi", "Kabir", "Anika", "Vihaan", "Tara", "Aryan", "Nisha", "Dev", "Pooja"]
+LAST = ["Sharma", "Verma", "Iyer", "Reddy", "Nair", "Gupta", "Mehta", "Kapoor", "Singh", "Das",
+        "Joshi", "Patel", "Rao", "Bose", "Khan", "Menon", "Pillai", "Chopra", "Malhotra", "Sinha"]
+BRAND_WORDS = ["Studio", "Labs", "Co", "Collective", "Works", "Foods", "Wear", "Tech", "Living", "Goods"]
+
+def parse_scale(value: str) -> int:
+    return SCALES.get(value.lower()) or int(value.replace("_", ""))
+
+def _zipf_weights(n: int, s: float = 1.1):
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+class Generator:
+    """Deterministic row source; ``rows(start, stop)`` can be called in any
+    batch size and yields the same users for the same indices."""
+
+    def __init__(self, seed: int, today: date):
+        self.seed = seed
+        self.today = today
+        self.epoch = datetime.combine(today, datetime.min.time()) - timedelta(days=730)
+        self.tag_weights = _zipf_weights(len(TAGS))
+        self.location_weights = _zipf_weights(len(LOCATIONS))
+
+    def _uuid(self, bits: int, created: datetime) -> str:
+        # same draws either way; v7 ids take their timestamp from the signup time
+        if ID_VERSION == 7:
+            ms = int(created.replace(tzinfo=timezone.utc).timestamp() * 1000)
+            return format_id(uuid7_int(ms, bits >> 64, bits))
+        return str(uuid.UUID(int=bits, version=4))
+
+    def user(self, i: int, password_hash: str):
+        # one RNG per row keeps rows independent of the batch boundaries
+        rng = random.Random(self.seed * 1_000_003 + i)
+        role = "influencer" if rng.random() < INFLUENCER_SHARE else "brand"
+        tag = rng.choices(TAGS, self.tag_weights)[0] if rng.random() < 0.95 else None
+        location = rng.choices(LOCATIONS, self.location_weights)[0] if rng.random() < 0.9 else None
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        user_bits = rng.getrandbits(128)
+        name = f"{first} {last}" if role == "influencer" else f"{last} {rng.choice(BRAND_WORDS)}"
+        email = f"{first.lower()}.{last.lower()}.{i}@bench.example.com"
+        created = self.epoch + timedelta(seconds=rng.randrange(730 * 86400))
+        user_id = self._uuid(user_bits, created)
+        user = {
+            "id": user_id,
+            "name": name,
+            "email": email,
+            "password_hash": password_hash,
+            "tag": tag,
+            "location": location,
+            "role": role,
+            "created_at": created,
+        }
+        if role == "influencer":
+            # log-normal reach: median ~5k, a long tail into the millions
+            reach = int(math.exp(rng.gauss(8.5, 1.8)))
+            verified = rng.random() < min(0.9, 0.02 + math.log10(reach + 1) / 8)
+            profile = {"id": self._uuid(rng.getrandbits(128), created), "user_id": user_id,
+                       "reach": reach, "verified": verified, "email": email}
+        else:
+            start = self.today + timedelta(days=int(rng.gauss(15, 60)))
+            has_event = rng.random() < 0.7
+            profile = {
+                "id": self._uuid(rng.getrandbits(128), created),
+                "user_id": user_id,
+                "name": name,
+                "email": email,
+                "phone_number": f"+91{rng.randint(7000000000, 9999999999)}",
+                # brands mostly advertise under their own tag/location
+                "tag": tag if rng.random() < 0.85 else rng.choices(TAGS, self.tag_weights)[0],
+                "location": location if rng.random() < 0.85 else rng.choices(LOCATIONS, self.location_weights)[0],
+                "event_start": start if has_event else None,
+                "event_end": start + timedelta(days=rng.randint(1, 30)) if has_event else None,
+            }
+        return role, user, profile
+
+def populate(db, users: int, seed: int, batch_size: int = 5000, today: date = None, log=print) -> dict:
+    """Insert users ``[existing, users)``; re-running with a larger scale only
+    adds the missing tail. Returns row counts per table."""
+    from sqlalchemy import func, insert
+    from models.brand import Brand
+    from models.brand_event import BrandEventBucket
+    from models.geo_point import GeoPoint
+    from models.influencer import Influencer
+    from models.user import User
+    from utils.auth_utils import hash_password
+    from utils.event_index import buckets
+    from utils.geo import point_rows
+    from utils.read_model import project
+
+    have = db.query(func.count(User.id)).scalar()
+    # one hash shared by every row: bcrypt per row would dominate generation
+    password_hash = hash_password(BENCH_PASSWORD)
+    gen = Generator(seed, today or date.today())
+    t0 = time.perf_counter()
+    for start in range(have, users, batch_size):
+        user_rows, influencer_rows, brand_rows = [], [], []
+        for i in range(start, min(start + batch_size, users)):
+            role, user, profile = gen.user(i, password_hash)
+            user_rows.append(user)
+            (influencer_rows if role == "influencer" else brand_rows).append(profile)
+        db.execute(insert(User), user_rows)
+        if influencer_rows:
+            db.execute(insert(Influencer), influencer_rows)
+            project(db, Influencer, [i["user_id"] for i in influencer_rows])
+        if brand_rows:
+            db.execute(insert(Brand), brand_rows)
+            project(db, Brand, [b["user_id"] for b in brand_rows])
+            event_rows = [{"bucket": n, "brand_id": b["id"]} for b in brand_rows
+                          for n in buckets(b["event_start"], b["event_end"])]
+            if event_rows:
+                db.execute(insert(BrandEventBucket), event_rows)
+        geo_rows = point_rows([("user.location", u["id"], u["location"]) for u in user_rows]
+                              + [("brand.location", b["id"], b["location"]) for b in brand_rows])
+        if geo_rows:
+            db.execute(insert(GeoPoint), geo_rows)
+        db.commit()
+        done = min(start + batch_size, users)
+        if log and (done // batch_size) % 20 == 0:
+            log(f"  {done}/{users} users ({time.perf_counter() - t0:.0f}s)")
+    return {
+        "users": db.query(func.count(User.id)).scalar(),
+        "influencers": db.query(func.count(Influencer.id)).scalar(),
+        "brands": db.query(func.count(Brand.id)).scalar(),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scale", default="10k", help="users to generate: 10k, 100k, 1m or a number")
+    parser.add_argument("--db", default=None, help="SQLAlchemy URL (default sqlite:////tmp/bench_<scale>.db)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--search-index", action="store_true", help="also rebuild the trigram search index")
+    args = parser.parse_args(argv)
+
+    users = parse_scale(args.scale)
+    os.environ["DATABASE_URL"] = args.db or f"sqlite:////tmp/bench_{args.scale.lower()}.db"
+    # benchmark credentials do not need production-strength hashing
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    from database import SessionLocal, engine
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+    from utils.migrations import migrate
+
+    migrate(engine, log=None)
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        counts = populate(db, users, args.seed, args.batch_size)
+        print(f"{counts} in {time.perf_counter() - t0:.1f}s -> {os.environ['DATABASE_URL']}")
+        if args.search_index:
+            from utils import search_index
+            t0 = time.perf_counter()
+            print(f"trigram rows: {search_index.rebuild(db)} ({time.perf_counter() - t0:.1f}s)")
+    finally:
+        db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# benchmarks/event_index_bench.py
+"""Compare event-window brand filters with and without the calendar-bucket index.
+
+    python -m benchmarks.event_index_bench --scale 1m
+
+Uses the ``benchmarks.datagen`` database for ``--scale`` (filled first if it
+holds fewer users, and the bucket table backfilled if empty) and times, for
+windows around today, the first ``/brands/filter`` page and the matching
+count both ways.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+# (label, days from today to the window start, window length in days)
+WINDOWS = [
+    ("today", 0, 0),
+    ("next 7 days", 0, 7),
+    ("next 30 days", 0, 30),
+    ("days 60-90", 60, 30),
+    ("last 30 days", -30, 30),
+    ("next 90 days", 0, 90),
+    ("days 150-180", 150, 30),
+    ("a year ago", -365, 30),
+    ("in 2 years", 730, 30),
+]
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return result, statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scale", default="100k", help="users: 10k, 100k, 1m or a number")
+    parser.add_argument("--db", default=None, help="SQLAlchemy URL (default sqlite:////tmp/bench_<scale>.db)")
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from benchmarks.datagen import parse_scale, populate
+    os.environ["DATABASE_URL"] = args.db or f"sqlite:////tmp/bench_{args.scale.lower()}.db"
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    from sqlalchemy import func
+    from database import SessionLocal, engine
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+    from utils.migrations import migrate
+    from models.brand import Brand
+    from models.brand_event import BrandEventBucket
+    from routers.brand_router import filter_query
+    from utils import event_index
+    from utils.pagination import keyset_page
+
+    migrate(engine, log=None)
+    db = SessionLocal()
+    populate(db, parse_scale(args.scale), args.seed)
+    if db.query(func.count()).select_from(BrandEventBucket).scalar() == 0:
+        t0 = time.perf_counter()
+        print(f"bucket rows: {event_index.rebuild(db)} (rebuild {time.perf_counter() - t0:.1f}s)")
+    print(f"brands: {db.query(func.count(Brand.id)).scalar()}")
+
+    today = date.today()
+    scan_ms, indexed_ms = [], []
+    for label, offset, length in WINDOWS:
+        start, end = today + timedelta(days=offset), today + timedelta(days=offset + length)
+        results = {}
+        for enabled in (False, True):
+            event_index.EVENT_INDEX_ENABLED = enabled
+            q = filter_query(db, event_from=start, event_to=end)
+            (page, _), page_ms = _timed(lambda: keyset_page(q, Brand.id, None, args.limit), args.repeat)
+            count, count_ms = _timed(lambda: q.with_entities(func.count(Brand.id)).scalar(), args.repeat)
+            results[enabled] = ([brand.id for brand, _ in page], count, page_ms, count_ms)
+        if results[False][:2] != results[True][:2]:
+            print(f"MISMATCH for {label}", file=sys.stderr)
+            return 1
+        _, count, s_page, s_count = results[False]
+        _, _, i_page, i_count = results[True]
+        scan_ms.append(s_page)
+        indexed_ms.append(i_page)
+        print(f"{label:>13} matches={count:>7}  page: scan={s_page:7.1f}ms index={i_page:7.1f}ms  "
+              f"count: scan={s_count:7.1f}ms index={i_count:7.1f}ms")
+    print(f"median page scan={statistics.median(scan_ms):.1f}ms index={statistics.median(indexed_ms):.1f}ms")
+    db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# benchmarks/geo_bench.py
+"""Compare ``near`` radius filters through the grid-cell index with a distance
+test on every stored point.
+
+    python -m benchmarks.geo_bench --scale 1m
+
+Uses the ``benchmarks.datagen`` database for ``--scale`` (filled first if it
+holds fewer users, and ``geo_points`` backfilled if empty) and times, for a
+few centres and radii, the first ``/influencers/filter`` page and the
+matching count both ways.
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+# (near, radius_km)
+SEARCHES = [
+    ("Navi Mumbai", 10),
+    ("Mumbai", 50),
+    ("Pune", 150),
+    ("Chandigarh", 100),
+    ("Guwahati", 150),
+    ("Shillong", 25),
+    ("Delhi", 300),
+    ("Bengaluru", 500),
+]
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return result, statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scale", default="100k", help="users: 10k, 100k, 1m or a number")
+    parser.add_argument("--db", default=None, help="SQLAlchemy URL (default sqlite:////tmp/bench_<scale>.db)")
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from benchmarks.datagen import parse_scale, populate
+    os.environ["DATABASE_URL"] = args.db or f"sqlite:////tmp/bench_{args.scale.lower()}.db"
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    from sqlalchemy import func, select
+    from database import SessionLocal, engine
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+    from utils.migrations import migrate
+    from models.geo_point import GeoPoint
+    from models.influencer import Influencer
+    from models.user import User
+    from routers.influencer_router import filter_query
+    from utils import geo
+    from utils.pagination import keyset_page
+
+    migrate(engine, log=None)
+    db = SessionLocal()
+    populate(db, parse_scale(args.scale), args.seed)
+    if db.query(func.count()).select_from(GeoPoint).scalar() == 0:
+        t0 = time.perf_counter()
+        written, _ = geo.rebuild(db)
+        print(f"geo points: {written} (rebuild {time.perf_counter() - t0:.1f}s)")
+    print(f"influencers: {db.query(func.count(Influencer.id)).scalar()}")
+
+    def scan(near, radius_km):
+        # the same distance test without the cell ranges: every point is read
+        lat, lon = geo.parse_near(near)
+        dy = (GeoPoint.lat - lat) * geo.KM_PER_DEGREE
+        dx = (GeoPoint.lon - lon) * (geo.KM_PER_DEGREE * math.cos(math.radians(lat)))
+        return filter_query(db).filter(User.id.in_(select(GeoPoint.row_id).where(
+            GeoPoint.field == "user.location", dx * dx + dy * dy <= radius_km * radius_km,
+        )))
+
+    scan_ms, indexed_ms = [], []
+    for near, radius_km in SEARCHES:
+        results = {}
+        for indexed in (False, True):
+            if indexed:
+                paged = filter_query(db, near=near, radius_km=radius_km, paged=True)
+                q = filter_query(db, near=near, radius_km=radius_km)
+            else:
+                paged = q = scan(near, radius_km)
+            (page, _), page_ms = _timed(lambda: keyset_page(paged, Influencer.id, None, args.limit), args.repeat)
+            count, count_ms = _timed(lambda: q.with_entities(func.count(Influencer.id)).scalar(), args.repeat)
+            results[indexed] = ([infl.id for infl, _ in page], count, page_ms, count_ms)
+        if results[False][:2] != results[True][:2]:
+            print(f"MISMATCH for {near} {radius_km}km", file=sys.stderr)
+            return 1
+        _, count, s_page, s_count = results[False]
+        _, _, i_page, i_count = results[True]
+        scan_ms.append(s_page)
+        indexed_ms.append(i_page)
+        print(f"{near:>12} {radius_km:>4}km matches={count:>7}  page: scan={s_page:7.1f}ms index={i_page:7.1f}ms  "
+              f"count: scan={s_count:7.1f}ms index={i_count:7.1f}ms")
+    print(f"median page scan={statistics.median(scan_ms):.1f}ms index={statistics.median(indexed_ms):.1f}ms")
+    db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# benchmarks/id_layout_bench.py
+"""Compare id layouts: CHAR(36) vs BINARY(16) storage, UUIDv4 vs UUIDv7 values.
+
+    python -m benchmarks.id_layout_bench --rows 200000
+    python -m benchmarks.id_layout_bench --rows 1000000 --url mysql+pymysql://user:pw@localhost/bench
+
+Each layout gets empty ``users`` and ``influencers`` tables built from the
+models (``utils.migrate_ids.layout_tables``), then:
+
+- inserts ``--rows`` users and one influencer each, ``--batch`` rows per
+  transaction, in id-generation order as signups would arrive;
+- looks up ``--lookups`` random users by primary key, one statement each;
+- joins ``--lookups`` random influencers to their users by ``user_id``;
+- reports the database size (SQLite file size, or MySQL data + index bytes).
+
+Without ``--url`` every layout uses its own SQLite file under ``--dir``;
+with it the tables are dropped and recreated in that database per layout.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+LAYOUTS = (("char36", 4), ("char36", 7), ("binary16", 4), ("binary16", 7))
+
+def _ids(version: int, n: int):
+    from models.keys import uuid7
+    if version == 7:
+        return [uuid7() for _ in range(n)]
+    return [str(uuid.uuid4()) for _ in range(n)]
+
+def _size(engine) -> int:
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            return conn.execute(text("PRAGMA page_count")).scalar() * conn.execute(text("PRAGMA page_size")).scalar()
+        return conn.execute(text(
+            "SELECT SUM(data_length + index_length) FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name IN ('users', 'influencers')"
+        )).scalar()
+
+def run_layout(url: str, storage: str, version: int, rows: int, batch: int, lookups: int, seed: int) -> dict:
+    from sqlalchemy import MetaData, create_engine, select
+    from utils.migrate_ids import layout_tables
+
+    engine = create_engine(url)
+    metadata = MetaData()
+    tables = layout_tables(metadata, storage)
+    users, influencers = tables["users"], tables["influencers"]
+    metadata.drop_all(engine, tables=[influencers, users])
+    metadata.create_all(engine, tables=[users, influencers])
+
+    rng = random.Random(seed)
+    user_ids = _ids(version, rows)
+    influencer_ids = _ids(version, rows)
+    now = datetime.utcnow()
+    t0 = time.perf_counter()
+    for start in range(0, rows, batch):
+        with engine.begin() as conn:
+            conn.execute(users.insert(), [
+                {"id": user_ids[i], "name": f"User {i}", "email": f"user{i}@bench.example.com",
+                 "password_hash": "x", "tag": None, "location": None, "role": "influencer", "created_at": now}
+                for i in range(start, min(start + batch, rows))
+            ])
+            conn.execute(influencers.insert(), [
+                {"id": influencer_ids[i], "user_id": user_ids[i], "reach": rng.randrange(1_000_000),
+                 "verified": False, "email": None}
+                for i in range(start, min(start + batch, rows))
+            ])
+    insert_s = time.perf_counter() - t0
+
+    by_id = select(users.c.id, users.c.name)
+    sample = rng.sample(user_ids, min(lookups, rows))
+    with engine.connect() as conn:
+        t0 = time.perf_counter()
+        for user_id in sample:
+            assert conn.execute(by_id.where(users.c.id == user_id)).one().id == user_id
+        lookup_s = time.perf_counter() - t0
+
+        joined = select(influencers.c.id, users.c.name).join(users, influencers.c.user_id == users.c.id)
+        sample = rng.sample(influencer_ids, min(lookups, rows))
+        t0 = time.perf_counter()
+        for influencer_id in sample:
+            conn.execute(joined.where(influencers.c.id == influencer_id)).one()
+        join_s = time.perf_counter() - t0
+    size = _size(engine)
+    engine.dispose()
+    return {
+        "layout": f"{storage}/v{version}",
+        "insert_rows_s": 2 * rows / insert_s,
+        "lookup_us": lookup_s / len(sample) * 1e6,
+        "join_us": join_s / len(sample) * 1e6,
+        "size_mb": size / 1e6,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="users (and influencers) per layout")
+    parser.add_argument("--batch", type=int, default=100, help="rows per insert transaction")
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--url", default=None, help="SQLAlchemy URL to run every layout in (default: SQLite files)")
+    parser.add_argument("--dir", default="/tmp", help="directory for the SQLite files")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    # the models only need a URL to import; each layout opens its own engine
+    os.environ.setdefault("DATABASE_URL", args.url or "sqlite://")
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+
+    print(f"{'layout':>12} {'insert rows/s':>14} {'pk lookup us':>13} {'join us':>9} {'size MB':>9}")
+    for storage, version in LAYOUTS:
+        url = args.url
+        if url is None:
+            path = os.path.join(args.dir, f"id_layout_{storage}_v{version}.db")
+            if os.path.exists(path):
+                os.remove(path)
+            url = f"sqlite:///{path}"
+        r = run_layout(url, storage, version, args.rows, args.batch, args.lookups, args.seed)
+        print(f"{r['layout']:>12} {r['insert_rows_s']:14.0f} {r['lookup_us']:13.1f} {r['join_us']:9.1f} "
+              f"{r['size_mb']:9.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
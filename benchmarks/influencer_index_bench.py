@@ -0,0 +1,147 @@
+# benchmarks/influencer_index_bench.py
+"""Compare /influencers/filter pages served by SQL and by the columnar index.
+
+    python -m benchmarks.influencer_index_bench --influencers 1000000 --db /tmp/index_bench.db
+
+Builds synthetic users+influencers in a SQLite file (reused when it already
+holds enough rows), loads the index while measuring its memory, then times
+the same filter pages both ways and checks that they return identical rows
+and cursors.
+"""
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+TAGS = ["fitness", "food", "travel", "tech", "fashion", "gaming", "beauty", "music", "finance", "parenting"]
+LOCATIONS = ["Mumbai", "Delhi", "Pune", "Bengaluru", "Chennai", "Kolkata", "Hyderabad", "Jaipur", "Goa", "Lucknow",
+             "Surat", "Indore", "Nagpur", "Kochi", "Bhopal", "Patna", "Agra", "Nashik", "Ranchi", "Mysuru"]
+
+def populate(db, influencers: int, seed: int, batch_size: int = 10000):
+    from sqlalchemy import func, insert
+    from models.influencer import Influencer
+    from models.user import User
+    have = db.query(func.count(Influencer.id)).scalar()
+    rng = random.Random(seed + have)
+    epoch = datetime(2024, 1, 1)
+    for start in range(have, influencers, batch_size):
+        users, profiles = [], []
+        for i in range(start, min(start + batch_size, influencers)):
+            user_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            users.append({
+                "id": user_id,
+                "name": f"Creator {i}",
+                "email": f"creator{i}@example.com",
+                "password_hash": "x",
+                "tag": rng.choice(TAGS),
+                "location": rng.choice(LOCATIONS),
+                "role": "influencer",
+                "created_at": epoch + timedelta(minutes=i),
+            })
+            profiles.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "user_id": user_id,
+                # heavy-tailed like real follower counts
+                "reach": int(rng.paretovariate(1.2) * 500),
+                "verified": rng.random() < 0.15,
+                "email": f"creator{i}@example.com",
+            })
+        db.execute(insert(User), users)
+        db.execute(insert(Influencer), profiles)
+        db.commit()
+    return max(have, influencers)
+
+def _queries(rng, count):
+    out = []
+    for _ in range(count):
+        q = {}
+        if rng.random() < 0.8:
+            q["user_tag"] = rng.choice(TAGS)
+        if rng.random() < 0.6:
+            q["user_location"] = rng.choice(LOCATIONS)
+        if rng.random() < 0.6:
+            q["min_reach"] = rng.choice([100, 1000, 5000, 20000])
+        if rng.random() < 0.4:
+            q["verified"] = rng.random() < 0.5
+        out.append(q)
+    return out
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return result, statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--influencers", type=int, default=1_000_000)
+    parser.add_argument("--db", default="/tmp/index_bench.db")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ["INFLUENCER_INDEX_ENABLED"] = "true"
+    from database import SessionLocal, engine
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+    from utils.migrations import migrate
+    from models.influencer import Influencer
+    from routers.influencer_router import _influencer_row, filter_query
+    from utils.influencer_index import influencer_index
+    from utils.pagination import keyset_page
+
+    migrate(engine, log=None)
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    total = populate(db, args.influencers, args.seed)
+    print(f"influencers: {total} (populate {time.perf_counter() - t0:.1f}s)")
+
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows = influencer_index.load(SessionLocal)
+    load_s = time.perf_counter() - t0
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    column_bytes = influencer_index.stats()["column_bytes"]
+    per_million = 1_000_000 / max(rows, 1)
+    print(f"index: {rows} rows loaded in {load_s:.1f}s; "
+          f"{used * per_million / 2**20:.0f} MiB per million rows "
+          f"({column_bytes * per_million / 2**20:.1f} MiB of it in NumPy columns)")
+
+    rng = random.Random(args.seed)
+    sql_ms, index_ms = [], []
+    for q in _queries(rng, args.queries):
+        def via_sql():
+            page, next_cursor = keyset_page(filter_query(db, **q), Influencer.id, None, args.limit)
+            return [_influencer_row(i, u) for i, u in page], next_cursor
+
+        def via_index():
+            page, last_key = influencer_index.page(None, args.limit, **q)
+            return page, last_key
+
+        (sql_rows, sql_cursor), s_ms = _timed(via_sql, args.repeat)
+        (idx_rows, idx_last), i_ms = _timed(via_index, args.repeat)
+        if sql_rows != idx_rows or (sql_cursor is None) != (idx_last is None):
+            print(f"MISMATCH for {q}", file=sys.stderr)
+            return 1
+        sql_ms.append(s_ms)
+        index_ms.append(i_ms)
+        print(f"{str(q):<80} rows={len(sql_rows):>4} sql={s_ms:8.2f}ms index={i_ms:7.3f}ms")
+    print(f"median sql={statistics.median(sql_ms):.2f}ms index={statistics.median(index_ms):.3f}ms")
+    db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
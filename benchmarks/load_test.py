@@ -0,0 +1,399 @@
+# benchmarks/load_test.py
+"""Drive every endpoint of the app in-process and report latency per route.
+
+    python -m benchmarks.load_test --scale 100k --concurrency 16 --requests 20000 --out run.json
+    python -m benchmarks.report base.json run.json
+
+The database (``--db``, default ``sqlite:////tmp/bench_<scale>.db``) is
+filled with ``benchmarks.datagen`` first if it holds fewer users than
+``--scale``. Requests go through an in-process ASGI client, so the numbers
+cover routing, validation, the database and serialization but no network.
+``--concurrency`` workers pick endpoints from a weighted mix, and each
+endpoint gets its throughput and p50/p95/p99 latency in the JSON report.
+
+Feature flags are read from the environment as usual (``DB_ASYNC``,
+``SEARCH_INDEX_ENABLED``, ``INFLUENCER_INDEX_ENABLED``,
+``RESPONSE_CACHE_ENABLED``...) and recorded in the report, so runs can be
+compared flag against flag. Before the run, ``--cold-start-repeat`` fresh
+processes time a worker's cold start against its budget (see
+``benchmarks.cold_start``).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from benchmarks.datagen import BENCH_PASSWORD, LOCATIONS, TAGS, parse_scale
+
+# environment flags copied into the report
+RECORDED_ENV = (
+    "DB_ASYNC", "BCRYPT_ROUNDS", "PASSWORD_HASH_WORKERS", "SEARCH_INDEX_ENABLED", "INFLUENCER_INDEX_ENABLED",
+    "RESPONSE_CACHE_ENABLED", "RESPONSE_CACHE_SIZE", "RESPONSE_CACHE_TTL_SECONDS", "TRENDING_TOP_K", "PRINCIPAL_CACHE_TTL", "BULK_CHUNK_SIZE",
+    "METRICS_ENABLED", "DEV_MODE", "FAST_JSON_ENABLED", "FACETS_ENABLED",
+    "EVENT_INDEX_ENABLED", "ID_STORAGE", "ID_VERSION", "GEO_CELL_DEGREES", "READ_ROUTING_POLICY",
+    "READ_YOUR_WRITES_SECONDS", "ADMISSION_ENABLED", "ADMISSION_LIMITS", "LOGIN_RATE_PER_MINUTE",
+    "READ_MODEL_ENABLED", "JOB_WORKERS", "JOB_BATCH_SIZE", "CACHE_SYNC_SECONDS",
+)
+ACCOUNTS = 50  # logged-in influencers and brands the workers act as
+# radius-search centres: places near, but not named like, the generated locations
+NEAR = ("Navi Mumbai", "Thane", "Gurgaon", "Noida", "Secunderabad", "Howrah", "19.1,72.9", "12.9,77.6")
+
+class Context:
+    """Tokens and ids sampled from the database before the run."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.influencers = []  # (token, email)
+        self.brands = []
+        self.influencer_ids = []
+        self.jobs = []  # (brand token, job id)
+        self.signups = 0
+
+def _pick_filters(rng, params: dict, optional: dict) -> dict:
+    out = dict(params)
+    for key, (chance, choices) in optional.items():
+        if rng.random() < chance:
+            out[key] = rng.choice(choices)
+    return out
+
+def _near(rng, params: dict, chance: float) -> dict:
+    if rng.random() < chance:
+        params.update(near=rng.choice(NEAR), radius_km=rng.choice((10, 25, 100)))
+    return params
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+# (method, path template) -> (weight, builder(ctx, rng) -> (method, url, request kwargs))
+def _root(ctx, rng):
+    return "GET", "/", {}
+
+def _signup(ctx, rng):
+    ctx.signups += 1
+    role = rng.choice(("influencer", "brand"))
+    return "POST", "/auth/signup", {"json": {
+        "name": "Load Test", "email": f"load.{ctx.run_id}.{ctx.signups}@bench.example.com",
+        "password": BENCH_PASSWORD, "tag": rng.choice(TAGS), "location": rng.choice(LOCATIONS), "role": role,
+    }}
+
+def _login(ctx, rng):
+    _, email = rng.choice(ctx.influencers + ctx.brands)
+    return "POST", "/auth/login", {"json": {"email": email, "password": BENCH_PASSWORD}}
+
+def _get(path):
+    def build(ctx, rng):
+        return "GET", path, {}
+    return build
+
+def _stats(path):
+    def build(ctx, rng):
+        return "GET", path, {"headers": {"X-Ops-Token": os.environ["OPS_TOKEN"]}}
+    return build
+
+def _influencer_filter(ctx, rng):
+    params = _pick_filters(rng, {"limit": rng.choice((20, 100))}, {
+        "user_tag": (0.7, TAGS[:8]),
+        "user_location": (0.4, LOCATIONS[:10]),
+        "reach": (0.4, (1000, 10000, 100000)),
+        "verified": (0.2, ("true", "false")),
+        "user_name": (0.1, ("sharma", "iyer", "meera")),
+    })
+    return "GET", "/influencers/filter", {"params": _near(rng, params, 0.1)}
+
+def _brand_filter(ctx, rng):
+    params = _pick_filters(rng, {"limit": rng.choice((20, 100))}, {
+        "brand_tag": (0.6, TAGS[:8]),
+        "brand_location": (0.4, LOCATIONS[:10]),
+        "event_date": (0.2, [str(date.today() + timedelta(days=d)) for d in (0, 7, 30)]),
+        "brand_name": (0.1, ("labs", "studio")),
+    })
+    if rng.random() < 0.2:
+        # campaign-window search: events overlapping the next or a past month
+        start = date.today() + timedelta(days=rng.choice((0, 30, -365)))
+        params.update(event_from=str(start), event_to=str(start + timedelta(days=30)))
+    return "GET", "/brands/filter", {"params": _near(rng, params, 0.1)}
+
+def _trending(ctx, rng):
+    params = _pick_filters(rng, {"limit": 50}, {"tag": (0.5, TAGS[:8]), "location": (0.3, LOCATIONS[:10])})
+    return "GET", "/brands/trending", {"params": _near(rng, params, 0.1)}
+
+def _influencer_facets(ctx, rng):
+    params = _pick_filters(rng, {}, {
+        "user_tag": (0.3, TAGS[:8]),
+        "user_location": (0.2, LOCATIONS[:10]),
+        "verified": (0.2, ("true", "false")),
+        "reach": (0.1, (1000, 10000, 100000)),
+    })
+    return "GET", "/influencers/facets", {"params": params}
+
+def _brand_facets(ctx, rng):
+    params = _pick_filters(rng, {}, {
+        "brand_tag": (0.3, TAGS[:8]),
+        "brand_location": (0.2, LOCATIONS[:10]),
+        "event_date": (0.1, [str(date.today() + timedelta(days=d)) for d in (0, 7, 30)]),
+    })
+    return "GET", "/brands/facets", {"params": params}
+
+def _influencer_suggestions(ctx, rng):
+    token, _ = rng.choice(ctx.influencers)
+    return "GET", "/influencers/suggestions", {"headers": _bearer(token)}
+
+def _brand_suggestions(ctx, rng):
+    token, _ = rng.choice(ctx.brands)
+    return "GET", "/brands/suggestions", {"headers": _bearer(token)}
+
+def _influencer_update(ctx, rng):
+    token, _ = rng.choice(ctx.influencers)
+    return "PUT", "/influencers/update", {"headers": _bearer(token), "json": {"reach": rng.randint(100, 5_000_000)}}
+
+def _brand_update(ctx, rng):
+    token, email = rng.choice(ctx.brands)
+    start = date.today() + timedelta(days=rng.randint(-10, 60))
+    # PUT replaces every brand field, so send a complete profile
+    return "PUT", "/brands/update", {"headers": _bearer(token), "json": {
+        "name": "Bench Brand", "email": email, "phone_number": f"+91{rng.randint(7000000000, 9999999999)}",
+        "tag": rng.choice(TAGS), "location": rng.choice(LOCATIONS),
+        "event_start": str(start), "event_end": str(start + timedelta(days=rng.randint(1, 30))),
+    }}
+
+def _influencer_patch(ctx, rng):
+    token, _ = rng.choice(ctx.influencers)
+    return "PATCH", "/influencers/update", {"headers": _bearer(token), "json": {"reach": rng.randint(100, 5_000_000)}}
+
+def _brand_patch(ctx, rng):
+    token, _ = rng.choice(ctx.brands)
+    start = date.today() + timedelta(days=rng.randint(-10, 60))
+    return "PATCH", "/brands/update", {"headers": _bearer(token), "json": {
+        "event_start": str(start), "event_end": str(start + timedelta(days=rng.randint(1, 30))),
+    }}
+
+def _verify_reach(ctx, rng):
+    token, _ = rng.choice(ctx.brands)
+    return "POST", f"/influencers/{rng.choice(ctx.influencer_ids)}/verify-reach", {"headers": _bearer(token)}
+
+def _job_status(ctx, rng):
+    token, job_id = rng.choice(ctx.jobs)
+    return "GET", f"/influencers/jobs/{job_id}", {"headers": _bearer(token)}
+
+def _bulk(role):
+    def build(ctx, rng):
+        accounts = rng.sample(ctx.influencers if role == "influencer" else ctx.brands, 10)
+        lines = []
+        for _, email in accounts:
+            row = {"email": email, "name": "Bulk Load"}
+            if role == "influencer":
+                row["reach"] = rng.randint(100, 5_000_000)
+            else:
+                row["tag"] = rng.choice(TAGS)
+            lines.append(json.dumps(row))
+        return "POST", f"/{role}s/bulk", {
+            "content": "\n".join(lines).encode(),
+            "headers": {"X-Ingest-Token": os.environ["BULK_INGEST_TOKEN"], "Content-Type": "application/x-ndjson"},
+        }
+    return build
+
+SCENARIOS = {
+    ("GET", "/"): (1, _root),
+    ("GET", "/metrics"): (1, _stats("/metrics")),
+    ("POST", "/auth/signup"): (1, _signup),
+    ("POST", "/auth/login"): (2, _login),
+    ("GET", "/auth/password-hasher/stats"): (1, _stats("/auth/password-hasher/stats")),
+    ("GET", "/auth/principal-cache/stats"): (1, _stats("/auth/principal-cache/stats")),
+    ("GET", "/auth/response-cache/stats"): (1, _stats("/auth/response-cache/stats")),
+    ("GET", "/auth/read-routing/stats"): (1, _stats("/auth/read-routing/stats")),
+    ("GET", "/auth/admission/stats"): (1, _stats("/auth/admission/stats")),
+    ("GET", "/auth/jobs/stats"): (1, _stats("/auth/jobs/stats")),
+    ("GET", "/influencers/filter"): (30, _influencer_filter),
+    ("GET", "/influencers/facets"): (8, _influencer_facets),
+    ("GET", "/influencers/facets/stats"): (1, _stats("/influencers/facets/stats")),
+    ("GET", "/influencers/suggestions"): (10, _influencer_suggestions),
+    ("PUT", "/influencers/update"): (4, _influencer_update),
+    ("PATCH", "/influencers/update"): (2, _influencer_patch),
+    ("POST", "/influencers/{influencer_id}/verify-reach"): (2, _verify_reach),
+    ("GET", "/influencers/jobs/{job_id}"): (2, _job_status),
+    ("GET", "/influencers/index/stats"): (1, _stats("/influencers/index/stats")),
+    ("POST", "/influencers/bulk"): (1, _bulk("influencer")),
+    ("GET", "/brands/filter"): (15, _brand_filter),
+    ("GET", "/brands/facets"): (4, _brand_facets),
+    ("GET", "/brands/facets/stats"): (1, _stats("/brands/facets/stats")),
+    ("GET", "/brands/trending"): (15, _trending),
+    ("GET", "/brands/suggestions"): (10, _brand_suggestions),
+    ("PUT", "/brands/update"): (2, _brand_update),
+    ("PATCH", "/brands/update"): (1, _brand_patch),
+    ("POST", "/brands/bulk"): (1, _bulk("brand")),
+}
+
+def app_endpoints(app):
+    """(method, path) of every API route mounted on ``app``."""
+    out = set()
+    for route in app.routes:
+        methods = getattr(route, "methods", None) or ()
+        if route.path.startswith(("/docs", "/redoc", "/openapi")):
+            continue
+        for method in methods - {"HEAD", "OPTIONS"}:
+            out.add((method, route.path))
+    return out
+
+async def _prepare(client, db, ctx: Context, rng):
+    from models.influencer import Influencer
+    from models.user import User
+    for role, pool in (("influencer", ctx.influencers), ("brand", ctx.brands)):
+        # generated accounts only; accounts created by earlier signups lack a profile
+        candidates = [e for (e,) in db.query(User.email).filter(
+            User.role == role, User.email.like("%@bench.example.com"), ~User.email.like("load.%"),
+        ).order_by(User.id).limit(ACCOUNTS * 20)]
+        for email in rng.sample(candidates, min(ACCOUNTS, len(candidates))):
+            r = await client.post("/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+            if r.status_code == 200:
+                pool.append((r.json()["access_token"], email))
+    ctx.influencer_ids = [i for (i,) in db.query(Influencer.id).order_by(Influencer.id).limit(1000)]
+    if len(ctx.influencers) < 10 or len(ctx.brands) < 10 or not ctx.influencer_ids:
+        raise SystemExit("benchmark database has too few generated accounts; run benchmarks.datagen first")
+    # jobs whose status the workers poll
+    for token, _ in ctx.brands[:10]:
+        r = await client.post(f"/influencers/{rng.choice(ctx.influencer_ids)}/verify-reach", headers=_bearer(token))
+        if r.status_code == 202:
+            ctx.jobs.append((token, r.json()["id"]))
+
+async def _worker(client, ctx, rng, plan, samples, deadline, budget):
+    names, weights, builders = plan
+    while budget["left"] > 0 and time.perf_counter() < deadline:
+        budget["left"] -= 1
+        i = rng.choices(range(len(names)), weights)[0]
+        method, url, kwargs = builders[i](ctx, rng)
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(method, url, **kwargs)
+            status = r.status_code
+        except Exception as e:  # a crashed handler counts as a failed sample
+            status = f"error:{e.__class__.__name__}"
+        samples.append((names[i], (time.perf_counter() - t0) * 1000, status))
+
+async def run(args, db_url: str) -> dict:
+    import httpx
+    from main import app
+    from database import SessionLocal
+    from benchmarks.report import summarize
+
+    endpoints = app_endpoints(app)
+    missing = sorted(endpoints - set(SCENARIOS))
+    if missing:
+        print(f"warning: no scenario for {', '.join(f'{m} {p}' for m, p in missing)}", file=sys.stderr)
+    chosen = [(f"{m} {p}", SCENARIOS[(m, p)]) for m, p in sorted(endpoints & set(SCENARIOS))]
+    if args.only:
+        chosen = [(name, spec) for name, spec in chosen if any(o in name for o in args.only)]
+    plan = ([n for n, _ in chosen], [w for _, (w, _) in chosen], [b for _, (_, b) in chosen])
+
+    ctx = Context(run_id=f"{int(time.time())}{random.Random().randrange(1000)}")
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            db = SessionLocal()
+            try:
+                await _prepare(client, db, ctx, random.Random(args.seed))
+            finally:
+                db.close()
+            rngs = [random.Random(args.seed * 7919 + w) for w in range(args.concurrency)]
+            if args.warmup:
+                budget = {"left": args.warmup}
+                await asyncio.gather(*(
+                    _worker(client, ctx, rng, plan, [], float("inf"), budget) for rng in rngs
+                ))
+            samples = []
+            budget = {"left": args.requests or float("inf")}
+            deadline = time.perf_counter() + args.duration if args.duration else float("inf")
+            t0 = time.perf_counter()
+            await asyncio.gather(*(
+                _worker(client, ctx, rng, plan, samples, deadline, budget) for rng in rngs
+            ))
+            wall = time.perf_counter() - t0
+
+    return {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": _redact(db_url),
+            "scale": args.scale,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "env": {k: os.environ[k] for k in RECORDED_ENV if k in os.environ},
+        },
+        **summarize(samples, wall),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+def _redact(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    if "@" in rest:
+        rest = "***@" + rest.split("@", 1)[1]
+    return scheme + sep + rest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scale", default="10k", help="users in the benchmark database: 10k, 100k, 1m or a number")
+    parser.add_argument("--db", default=None, help="SQLAlchemy URL (default sqlite:////tmp/bench_<scale>.db)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests (0 = until --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="stop after this many seconds")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="restrict to endpoints whose 'METHOD /path' contains any of these")
+    parser.add_argument("--cold-start-repeat", type=int, default=3,
+                        help="fresh-process cold starts to time first (0 skips; see benchmarks.cold_start)")
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args(argv)
+    if not args.requests and not args.duration:
+        parser.error("give --requests or --duration")
+
+    db_url = args.db or f"sqlite:////tmp/bench_{args.scale.lower()}.db"
+    os.environ["DATABASE_URL"] = db_url
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    os.environ.setdefault("BULK_INGEST_TOKEN", "bench")
+    os.environ.setdefault("OPS_TOKEN", "bench")
+    # every simulated client logs in from the same in-process address
+    os.environ.setdefault("LOGIN_RATE_PER_MINUTE", "0")
+    from sqlalchemy import func
+    from database import SessionLocal, engine
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+    from models.user import User
+    from benchmarks import datagen
+    from benchmarks.cold_start import measure as measure_cold_start
+    from benchmarks.report import format_table
+    from utils.migrations import migrate
+
+    migrate(engine, log=None)
+    db = SessionLocal()
+    try:
+        users = parse_scale(args.scale)
+        if db.query(func.count(User.id)).scalar() < users:
+            print(f"generating {users} users into {_redact(db_url)}")
+            datagen.populate(db, users, args.seed)
+    finally:
+        db.close()
+
+    cold_start = measure_cold_start(db_url, args.cold_start_repeat) if args.cold_start_repeat else None
+    report = asyncio.run(run(args, db_url))
+    report["cold_start"] = cold_start
+    print(format_table(report))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"report written to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# benchmarks/read_model_bench.py
+"""Compare discovery queries on the profile/user join and on the read model.
+
+    python -m benchmarks.read_model_bench --scale 1m
+
+Uses the ``benchmarks.datagen`` database for ``--scale`` (filled first if it
+holds fewer users, and the read model backfilled if empty) and times the
+first ``/influencers/filter`` page of the SQL path, the facet ``GROUP BY``
+and the trending leaderboard load for a few filter mixes, both ways.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# (label, /influencers/filter parameters)
+FILTERS = [
+    ("no filter", {}),
+    ("common tag", {"user_tag": "fashion"}),
+    ("tag + city", {"user_tag": "fashion", "user_location": "Mumbai"}),
+    ("rare tag + city", {"user_tag": "music", "user_location": "Goa"}),
+    ("city + reach", {"user_location": "Delhi", "min_reach": 500000}),
+    ("tag + verified", {"user_tag": "food", "verified": True}),
+    ("high reach", {"min_reach": 1500000}),
+]
+# (label, trending tag, trending location)
+TRENDING = [
+    ("global", None, None),
+    ("tag", "fashion", None),
+    ("city", None, "Delhi"),
+    ("tag + city", "fashion", "Mumbai"),
+]
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return result, statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scale", default="100k", help="users: 10k, 100k, 1m or a number")
+    parser.add_argument("--db", default=None, help="SQLAlchemy URL (default sqlite:////tmp/bench_<scale>.db)")
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from benchmarks.datagen import parse_scale, populate
+    os.environ["DATABASE_URL"] = args.db or f"sqlite:////tmp/bench_{args.scale.lower()}.db"
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    from sqlalchemy import func
+    from database import SessionLocal, engine
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+    from utils.migrations import migrate
+    from models.influencer_search import InfluencerSearch
+    from routers.influencer_router import filter_query, filter_rows
+    from utils import read_model
+    from utils.facets import influencer_facets
+    from utils.leaderboard import leaderboard
+
+    migrate(engine, log=None)
+    db = SessionLocal()
+    populate(db, parse_scale(args.scale), args.seed)
+    if db.query(func.count()).select_from(InfluencerSearch).scalar() == 0:
+        t0 = time.perf_counter()
+        print(f"read-model rows: {read_model.rebuild(db)} (rebuild {time.perf_counter() - t0:.1f}s)")
+    print(f"influencers: {db.query(func.count()).select_from(InfluencerSearch).scalar()}")
+
+    def compare(label, fn):
+        results = {}
+        for enabled in (False, True):
+            read_model.READ_MODEL_ENABLED = enabled
+            results[enabled] = _timed(fn, args.repeat)
+        if results[False][0] != results[True][0]:
+            print(f"MISMATCH for {label}", file=sys.stderr)
+            raise SystemExit(1)
+        return results[False][1], results[True][1]
+
+    join_ms, model_ms = [], []
+    print("first filter page / facets GROUP BY")
+    for label, params in FILTERS:
+        j_page, m_page = compare(label, lambda: filter_rows(filter_query(db, **params, paged=True), None, args.limit)[0])
+        j_facets, m_facets = compare(label, lambda: influencer_facets.query(
+            filter_query(db, **params), read_model.influencer_columns()))
+        join_ms.append(j_page)
+        model_ms.append(m_page)
+        print(f"{label:>16}  page: join={j_page:8.1f}ms read model={m_page:8.1f}ms  "
+              f"facets: join={j_facets:8.1f}ms read model={m_facets:8.1f}ms")
+    print(f"trending load (top {leaderboard.k + 1})")
+    for label, tag, location in TRENDING:
+        j_top, m_top = compare(label, lambda: [tuple(row) for row in
+                                               leaderboard._query(db, tag, location).limit(leaderboard.k + 1).all()])
+        join_ms.append(j_top)
+        model_ms.append(m_top)
+        print(f"{label:>16}  join={j_top:8.1f}ms read model={m_top:8.1f}ms")
+    print(f"median join={statistics.median(join_ms):.1f}ms read model={statistics.median(model_ms):.1f}ms")
+    db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
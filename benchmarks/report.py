@@ -0,0 +1,119 @@
+# benchmarks/report.py
+"""Summaries of load-test samples and comparison of two JSON reports.
+
+    python -m benchmarks.report base.json new.json
+
+Prints per-endpoint throughput and p50/p95/p99 latency of both runs with
+the relative change, so a router or schema change can be judged against
+the run before it.
+"""
+import argparse
+import json
+import math
+import sys
+from collections import Counter, defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+def percentile(sorted_values, p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def _stats(latencies, statuses, wall: float) -> dict:
+    latencies = sorted(latencies)
+    ok = sum(n for s, n in statuses.items() if isinstance(s, int) and s < 400)
+    out = {
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        "status": {str(s): n for s, n in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+    }
+    for p in PERCENTILES:
+        out[f"p{p}_ms"] = round(percentile(latencies, p), 3)
+    return out
+
+def summarize(samples, wall: float) -> dict:
+    """``samples`` are ``(endpoint, latency_ms, status)`` tuples."""
+    by_endpoint = defaultdict(list)
+    statuses = defaultdict(Counter)
+    for endpoint, ms, status in samples:
+        by_endpoint[endpoint].append(ms)
+        statuses[endpoint][status] += 1
+    total_status = Counter()
+    for counter in statuses.values():
+        total_status.update(counter)
+    return {
+        "wall_seconds": round(wall, 3),
+        "overall": _stats([ms for _, ms, _ in samples], total_status, wall),
+        "endpoints": {name: _stats(by_endpoint[name], statuses[name], wall) for name in sorted(by_endpoint)},
+    }
+
+def format_cold_start(result: dict) -> str:
+    verdict = "within" if result["within_budget"] else "OVER"
+    return (f"cold start: {result['total_ms']:.0f} ms (import {result['import_ms']:.0f}, "
+            f"startup {result['startup_ms']:.0f}, first request {result['first_request_ms']:.0f}), "
+            f"{verdict} the {result['budget_ms']:.0f} ms budget")
+
+def format_table(report: dict) -> str:
+    header = f"{'endpoint':<52}{'reqs':>7}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    lines = [header, "-" * len(header)]
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, s in rows:
+        lines.append(f"{name:<52}{s['requests']:>7}{s['errors']:>5}{s['throughput_rps']:>9.1f}"
+                     f"{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}")
+    if report.get("cold_start"):
+        lines.append(format_cold_start(report["cold_start"]))
+    return "\n".join(lines)
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "     -"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+def compare(base: dict, new: dict) -> str:
+    header = f"{'endpoint':<52}{'metric':>8}{'base':>10}{'new':>10}{'change':>9}"
+    lines = [header, "-" * len(header)]
+    names = sorted(set(base["endpoints"]) | set(new["endpoints"])) + ["overall"]
+    for name in names:
+        a = base["overall"] if name == "overall" else base["endpoints"].get(name)
+        b = new["overall"] if name == "overall" else new["endpoints"].get(name)
+        if a is None or b is None:
+            lines.append(f"{name:<52}{'only in ' + ('new' if a is None else 'base'):>18}")
+            continue
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            label = "rps" if metric == "throughput_rps" else metric[:-3]
+            lines.append(f"{name if metric == 'throughput_rps' else '':<52}{label:>8}"
+                         f"{a[metric]:>10.2f}{b[metric]:>10.2f}{_change(a[metric], b[metric]):>9}")
+    a, b = base.get("cold_start"), new.get("cold_start")
+    if a and b:
+        for metric in ("total_ms", "import_ms", "startup_ms", "first_request_ms"):
+            lines.append(f"{'cold start' if metric == 'total_ms' else '':<52}{metric[:-3].replace('first_request', 'first'):>8}"
+                         f"{a[metric]:>10.2f}{b[metric]:>10.2f}{_change(a[metric], b[metric]):>9}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("base")
+    parser.add_argument("new", nargs="?")
+    args = parser.parse_args(argv)
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    if args.new is None:
+        print(format_table(base))
+        return 0
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    for label, report in (("base", base), ("new", new)):
+        meta = report.get("meta", {})
+        print(f"{label}: {meta.get('git_commit')} scale={meta.get('scale')} "
+              f"concurrency={meta.get('concurrency')} env={meta.get('env')}")
+    print(compare(base, new))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
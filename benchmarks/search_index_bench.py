@@ -0,0 +1,108 @@
+# benchmarks/search_index_bench.py
+"""Compare plain ``ilike('%term%')`` with trigram-narrowed search.
+
+    python -m benchmarks.search_index_bench --users 1000000 --db /tmp/search_bench.db
+
+Builds a synthetic users table in a SQLite file (reused when it already holds
+enough rows), backfills the trigram index and times the same substring
+queries both ways.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+SYLLABLES = ["ka", "ri", "an", "sha", "dev", "mi", "ra", "jo", "el", "na", "vi", "to", "lu", "sa", "pre", "am"]
+DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "agency.in", "studio.co"]
+
+def _name(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+
+def populate(db, users: int, seed: int, batch_size: int = 10000):
+    from sqlalchemy import func, insert
+    from models.user import User
+    have = db.query(func.count(User.id)).scalar()
+    rng = random.Random(seed + have)
+    for start in range(have, users, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, users)):
+            first, last = _name(rng), _name(rng)
+            rows.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "name": f"{first} {last}",
+                "email": f"{first.lower()}.{last.lower()}{i}@{rng.choice(DOMAINS)}",
+                "password_hash": "x",
+                "role": rng.choice(("brand", "influencer")),
+            })
+        db.execute(insert(User), rows)
+        db.commit()
+    return max(have, users)
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return result, statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--db", default="/tmp/search_bench.db")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ["SEARCH_INDEX_ENABLED"] = "true"
+    from sqlalchemy import func
+    from database import SessionLocal, engine
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+    from utils.migrations import migrate
+    from models.search_trigram import SearchTrigram
+    from models.user import User
+    from utils import search_index
+
+    migrate(engine, log=None)
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    total = populate(db, args.users, args.seed)
+    print(f"users: {total} (populate {time.perf_counter() - t0:.1f}s)")
+    if db.query(func.count()).select_from(SearchTrigram).scalar() == 0:
+        t0 = time.perf_counter()
+        written = search_index.rebuild(db)
+        print(f"trigram rows: {written} (rebuild {time.perf_counter() - t0:.1f}s)")
+
+    rng = random.Random(args.seed)
+    names = [n for (n,) in db.query(User.name).limit(1000).all()]
+    terms = []
+    for _ in range(args.queries):
+        name = rng.choice(names).lower()
+        start = rng.randrange(0, max(1, len(name) - 5))
+        terms.append(name[start:start + rng.randint(4, 6)])
+
+    plain_ms, indexed_ms = [], []
+    for term in terms:
+        base = db.query(func.count(User.id))
+        plain, p_ms = _timed(lambda: base.filter(User.name.ilike(f"%{term}%")).scalar(), args.repeat)
+        narrowed, i_ms = _timed(
+            lambda: search_index.narrow(base, "user.name", term).filter(User.name.ilike(f"%{term}%")).scalar(),
+            args.repeat,
+        )
+        if plain != narrowed:
+            print(f"MISMATCH for {term!r}: ilike={plain} trigram={narrowed}", file=sys.stderr)
+            return 1
+        plain_ms.append(p_ms)
+        indexed_ms.append(i_ms)
+        print(f"{term!r:>10} matches={plain:>8} ilike={p_ms:8.1f}ms trigram={i_ms:8.1f}ms")
+    print(f"median ilike={statistics.median(plain_ms):.1f}ms trigram={statistics.median(indexed_ms):.1f}ms")
+    db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
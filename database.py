@@ -1,16 +1,110 @@
 # database.py
 import os
+import threading
 from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# ``engine``, ``SessionLocal``, ``async_engine`` and ``AsyncSessionLocal`` are
+# created on first access (see ``__getattr__``), so importing this module, the
+# models or the app needs no DATABASE_URL and opens nothing.
 DATABASE_URL = os.getenv("DATABASE_URL")
-if DATABASE_URL is None:
-    raise RuntimeError("DATABASE_URL environment variable not set. See .env")
-
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# optional replicas serving the discovery reads (see utils.read_routing)
+READ_DATABASE_URLS = [url.strip() for url in os.getenv("READ_DATABASE_URLS", "").split(",") if url.strip()]
+# connections each pool opens during startup, so the first requests do not pay for connecting
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "0"))
 Base = declarative_base()
+
+# Opt-in async path: DB_ASYNC=true serves the routers from an AsyncEngine.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+}
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver of ``url`` for its async counterpart,
+    e.g. ``mysql+pymysql://`` -> ``mysql+aiomysql://``."""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for '{dialect}'. Set ASYNC_DATABASE_URL")
+    return ASYNC_DRIVERS[dialect] + sep + rest
+
+def _database_url() -> str:
+    if DATABASE_URL is None:
+        raise RuntimeError("DATABASE_URL environment variable not set. See .env")
+    return DATABASE_URL
+
+def _engine():
+    return create_engine(_database_url(), pool_pre_ping=True)
+
+def _session_local():
+    return sessionmaker(autocommit=False, autoflush=False, bind=_lazy("engine"))
+
+def _async_engine():
+    if not DB_ASYNC:
+        return None
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    return create_async_engine(os.getenv("ASYNC_DATABASE_URL") or to_async_url(_database_url()), pool_pre_ping=True)
+
+def _async_session_local():
+    if not DB_ASYNC:
+        return None
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    # objects stay readable after commit without another round-trip
+    return async_sessionmaker(_lazy("async_engine"), autoflush=False, expire_on_commit=False)
+
+_FACTORIES = {
+    "engine": _engine,
+    "SessionLocal": _session_local,
+    "async_engine": _async_engine,
+    "AsyncSessionLocal": _async_session_local,
+}
+_lock = threading.RLock()
+
+def _lazy(name: str):
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lock:
+        if name not in globals():
+            globals()[name] = factory()
+    return globals()[name]
+
+# module attribute hook: only called while ``name`` is not yet a global
+__getattr__ = _lazy
+
+def _warm_count(pool, count: int) -> int:
+    # connections beyond the pool size would be closed again on return
+    return min(count, pool.size()) if isinstance(pool, QueuePool) else min(count, 1)
+
+def warm_up(count: int = DB_POOL_WARMUP) -> int:
+    """Open up to ``count`` connections of the primary pool and return them
+    to it. Returns the connections opened."""
+    engine = _lazy("engine")
+    connections = [engine.connect() for _ in range(_warm_count(engine.pool, count))]
+    for connection in connections:
+        connection.close()
+    return len(connections)
+
+async def warm_up_async(count: int = DB_POOL_WARMUP) -> int:
+    """``warm_up`` for the async engine; returns 0 without DB_ASYNC."""
+    async_engine = _lazy("async_engine")
+    if async_engine is None:
+        return 0
+    connections = [await async_engine.connect() for _ in range(_warm_count(async_engine.sync_engine.pool, count))]
+    for connection in connections:
+        await connection.close()
+    return len(connections)
+
+async def get_async_db():
+    async with _lazy("AsyncSessionLocal")() as db:
+        yield db
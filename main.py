@@ -1,17 +1,104 @@
 # main.py
-from fastapi import FastAPI
-from database import engine, Base
-from routers import auth_router, influencer_router, brand_router
-import models.user, models.influencer, models.brand  # ensure models are imported for metadata
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+import database
+from routers.dependencies import require_ops_token
+from database import DB_ASYNC, DB_POOL_WARMUP
+from utils.admission import AdmissionMiddleware, admission
+from utils.facets import brand_facets, influencer_facets
+from utils.generations import generation_sync
+from utils.influencer_index import influencer_index
+from utils.jobs import job_queue
+from utils.leaderboard import leaderboard
+from utils.metrics import MetricsMiddleware, metrics
+from utils.migrate_ids import check_id_storage
+from utils.migrations import AUTO_MIGRATE, check, migrate
+from utils.read_routing import read_router
+from utils.response_cache import response_cache
+import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # ensure models are imported for metadata
 
-Base.metadata.create_all(bind=engine)
+# only the router set being served is imported
+if DB_ASYNC:
+    from routers import auth_router_async as auth_routes, influencer_router_async as influencer_routes, \
+        brand_router_async as brand_routes
+else:
+    from routers import auth_router as auth_routes, influencer_router as influencer_routes, \
+        brand_router as brand_routes
 
-app = FastAPI(title="Brand-Influencer Connector API")
+metrics.add_collector(read_router.collect)
+metrics.add_collector(admission.collect)
+metrics.add_collector(job_queue.collect)
+metrics.add_collector(generation_sync.collect)
+# entries built from a replica right after a write expire once it has caught up
+response_cache.settle_seconds = read_router.settle_seconds
+generation_sync.settle_seconds = read_router.settle_seconds
+# writes published by other API workers and by jobs run with ``python -m utils.jobs run``
+generation_sync.listen("influencers", leaderboard.expire)
+generation_sync.listen("influencers", influencer_index.expire)
+generation_sync.listen("influencers", influencer_facets.expire)
+generation_sync.listen("brands", brand_facets.expire)
+# last, so no response is cached from a view that has not expired yet
+for table in ("users", "influencers", "brands"):
+    generation_sync.listen(table, lambda table=table: response_cache.bump(table))
 
-app.include_router(auth_router.router)
-app.include_router(influencer_router.router)
-app.include_router(brand_router.router)
+def startup() -> None:
+    """Per-worker startup, run by ``lifespan``; nothing touches the database
+    before this. Schema changes are applied by ``python -m utils.migrations``,
+    so a worker only checks the recorded version."""
+    engine = database.engine
+    metrics.instrument(engine)
+    if database.async_engine is not None:
+        metrics.instrument(database.async_engine.sync_engine)
+    for replica in read_router.replicas:
+        metrics.instrument(replica.engine)
+        if replica.async_engine is not None:
+            metrics.instrument(replica.async_engine.sync_engine)
+    check_id_storage(engine)
+    if AUTO_MIGRATE:
+        migrate(engine)
+    else:
+        check(engine)
+    if DB_POOL_WARMUP and not DB_ASYNC:
+        database.warm_up()
+    if influencer_index.enabled:
+        influencer_index.load(database.SessionLocal)
+    read_router.start()
+    generation_sync.start(database.SessionLocal)
+    # the workers use the sync sessions in either mode
+    job_queue.start(database.SessionLocal)
+
+def shutdown() -> None:
+    job_queue.stop()
+    generation_sync.stop()
+    read_router.stop()
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_threadpool(startup)
+    if DB_POOL_WARMUP and DB_ASYNC:
+        await database.warm_up_async()
+    yield
+    await run_in_threadpool(shutdown)
+
+app = FastAPI(title="Brand-Influencer Connector API", lifespan=lifespan)
+# innermost, so cache hits skip the limits and shed requests are still counted
+app.add_middleware(AdmissionMiddleware)
+app.middleware("http")(response_cache.middleware)
+# outermost, so cached responses are counted too
+app.add_middleware(MetricsMiddleware)
+
+app.include_router(auth_routes.router)
+app.include_router(influencer_routes.router)
+app.include_router(brand_routes.router)
 
 @app.get("/")
 def root():
     return {"message": "Brand-Influencer Connector API is running"}
+
+# same operator-only figures as the /stats endpoints (queue depths, shed counts, replicas, jobs)
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False,
+         dependencies=[Depends(require_ops_token)])
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
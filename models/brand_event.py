@@ -0,0 +1,14 @@
+# models/brand_event.py
+from sqlalchemy import Column, Integer, Index
+from database import Base
+from models.keys import UUIDKey
+
+class BrandEventBucket(Base):
+    """One row per calendar bucket a brand's event window touches, for overlap search."""
+    __tablename__ = "brand_event_buckets"
+    bucket = Column(Integer, primary_key=True)
+    brand_id = Column(UUIDKey, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_brand_event_buckets_brand", "brand_id"),
+    )
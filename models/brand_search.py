@@ -0,0 +1,35 @@
+# models/brand_search.py
+from sqlalchemy import Column, String, Enum, Date, DateTime, Index
+from database import Base
+from models.keys import UUIDKey
+
+class BrandSearch(Base):
+    """Denormalized brand/user row for discovery reads, one per brand.
+
+    Columns are named after ``BrandFullOut``'s fields; maintained by
+    ``utils.read_model``.
+    """
+    __tablename__ = "brand_search"
+    brand_id = Column(UUIDKey, primary_key=True)
+    user_id = Column(UUIDKey, nullable=False)
+    user_name = Column(String(100), nullable=False)
+    user_email = Column(String(120), nullable=False)
+    user_tag = Column(String(50), nullable=True)
+    user_location = Column(String(100), nullable=True)
+    user_role = Column(Enum("brand", "influencer"), nullable=False)
+    user_created_at = Column(DateTime, nullable=True)
+    brand_name = Column(String(100), nullable=True)
+    brand_email = Column(String(120), nullable=True)
+    phone_number = Column(String(20), nullable=True)
+    brand_tag = Column(String(50), nullable=True)
+    brand_location = Column(String(100), nullable=True)
+    event_start = Column(Date, nullable=True)
+    event_end = Column(Date, nullable=True)
+
+    __table_args__ = (
+        Index("ix_brand_search_user", "user_id"),
+        Index("ix_brand_search_tag", "brand_tag", "brand_id"),
+        Index("ix_brand_search_location", "brand_location", "brand_id"),
+        Index("ix_brand_search_user_tag", "user_tag", "brand_id"),
+        Index("ix_brand_search_user_location", "user_location", "brand_id"),
+    )
@@ -0,0 +1,9 @@
+# models/cache_generation.py
+from sqlalchemy import BigInteger, Column, String
+from database import Base
+
+class CacheGeneration(Base):
+    """Change counter of one table, shared by every process; see ``utils.generations``."""
+    __tablename__ = "cache_generations"
+    name = Column(String(64), primary_key=True)
+    generation = Column(BigInteger, nullable=False, default=0)
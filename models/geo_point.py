@@ -0,0 +1,18 @@
+# models/geo_point.py
+from sqlalchemy import Column, Float, Integer, String, Index
+from database import Base
+from models.keys import UUIDKey
+
+class GeoPoint(Base):
+    """Resolved coordinates and grid cell of one row's location, for radius search."""
+    __tablename__ = "geo_points"
+    field = Column(String(32), primary_key=True)
+    row_id = Column(UUIDKey, primary_key=True)
+    place = Column(String(100), nullable=False)
+    lat = Column(Float, nullable=False)
+    lon = Column(Float, nullable=False)
+    cell = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_geo_points_cell", "field", "cell"),
+    )
@@ -0,0 +1,34 @@
+# models/influencer_search.py
+from sqlalchemy import Column, Integer, Boolean, String, Enum, DateTime, Index
+from database import Base
+from models.keys import UUIDKey
+
+class InfluencerSearch(Base):
+    """Denormalized influencer/user row for discovery reads, one per influencer.
+
+    Columns are named after ``InfluencerFullOut``'s fields; maintained by
+    ``utils.read_model``.
+    """
+    __tablename__ = "influencer_search"
+    influencer_id = Column(UUIDKey, primary_key=True)
+    user_id = Column(UUIDKey, nullable=False)
+    user_name = Column(String(100), nullable=False)
+    user_email = Column(String(120), nullable=False)
+    user_tag = Column(String(50), nullable=True)
+    user_location = Column(String(100), nullable=True)
+    user_role = Column(Enum("brand", "influencer"), nullable=False)
+    user_created_at = Column(DateTime, nullable=True)
+    reach = Column(Integer, nullable=True)
+    verified = Column(Boolean, nullable=True)
+    influencer_email = Column(String(120), nullable=True)
+
+    __table_args__ = (
+        Index("ix_influencer_search_user", "user_id"),
+        Index("ix_influencer_search_tag", "user_tag", "influencer_id"),
+        Index("ix_influencer_search_tag_location", "user_tag", "user_location", "influencer_id"),
+        Index("ix_influencer_search_location", "user_location", "influencer_id"),
+        Index("ix_influencer_search_tag_location_reach", "user_tag", "user_location", reach.desc(), "influencer_id"),
+        Index("ix_influencer_search_tag_reach", "user_tag", reach.desc(), "influencer_id"),
+        Index("ix_influencer_search_location_reach", "user_location", reach.desc(), "influencer_id"),
+        Index("ix_influencer_search_reach", reach.desc(), "influencer_id"),
+    )
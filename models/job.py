@@ -0,0 +1,28 @@
+# models/job.py
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, Integer, String
+from database import Base
+from models.keys import UUIDKey, new_id
+
+class Job(Base):
+    """One background job; see ``utils.jobs`` for the life cycle."""
+    __tablename__ = "jobs"
+    id = Column(UUIDKey, primary_key=True, default=new_id)
+    kind = Column(String(50), nullable=False)
+    # the row the job works on, e.g. the influencer to verify
+    target_id = Column(UUIDKey, nullable=True)
+    requested_by = Column(UUIDKey, nullable=True)
+    idempotency_key = Column(String(100), nullable=True, unique=True)
+    status = Column(String(20), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    # queued: earliest start (retry backoff); running: end of the worker's lease
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claim = Column(String(36), nullable=True)
+    error = Column(String(500), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_available", "status", "available_at"),
+        Index("ix_jobs_claim", "claim"),
+    )
@@ -0,0 +1,15 @@
+# models/search_trigram.py
+from sqlalchemy import Column, String, Index
+from database import Base
+from models.keys import UUIDKey
+
+class SearchTrigram(Base):
+    """One row per (indexed column, lowercase 3-gram, row) for substring search."""
+    __tablename__ = "search_trigrams"
+    field = Column(String(32), primary_key=True)
+    gram = Column(String(3), primary_key=True)
+    row_id = Column(UUIDKey, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_search_trigrams_row", "field", "row_id"),
+    )
@@ -1,13 +1,12 @@
 # models/user.py
-import uuid
 from datetime import datetime
 from sqlalchemy import Column, String, Enum, DateTime
-from sqlalchemy.dialects.mysql import CHAR
 from database import Base
+from models.keys import UUIDKey, new_id
 
 class User(Base):
     __tablename__ = "users"
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDKey, primary_key=True, default=new_id)
     name = Column(String(100), nullable=False)
     email = Column(String(120), nullable=False, unique=True)
     password_hash = Column(String(255), nullable=False)
@@ -1,2 +1,3 @@
 # routers/__init__.py
 from . import auth_router, influencer_router, brand_router
+from . import auth_router_async, influencer_router_async, brand_router_async
@@ -1,20 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from routers.dependencies import get_db, require_ops_token
+from models.keys import new_id
 from models.user import User
-from utils.auth_utils import hash_password, verify_password
+from utils.admission import admission
+from utils.generations import generation_sync
+from utils.auth_utils import PASSWORD_REHASH_ON_LOGIN, PasswordHasherBusy, needs_rehash, password_hasher
+from utils.jobs import job_queue
+from utils.principal_cache import principal_cache
+from utils.read_routing import read_router
+from utils.response_cache import response_cache
 from utils.token_utils import create_access_token
+from utils.search_index import reindex
+from utils.geo import index_locations
 from schemas.user_schema import SignupSchema, LoginSchema, UserOut
-import uuid
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def hasher_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent password operations, retry shortly",
+        headers={"Retry-After": "1"},
+    )
 
 @router.post("/signup", response_model=dict)
 def signup(payload: SignupSchema, db: Session = Depends(get_db)):
@@ -25,25 +33,67 @@ def signup(payload: SignupSchema, db: Session = Depends(get_db)):
     if existing:
         raise HTTPException(status_code=400, detail="Email already exists")
 
+    try:
+        password_hash = password_hasher.hash(payload.password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
     new_user = User(
-        id=str(uuid.uuid4()),
+        id=new_id(),
         name=payload.name,
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=password_hash,
         tag=payload.tag,
         location=payload.location,
         role=payload.role
     )
     db.add(new_user)
+    reindex(db, new_user)
+    index_locations(db, [("user.location", new_user.id, new_user.location)])
+    published = generation_sync.publish(db, "users")
     db.commit()
+    generation_sync.seen(published)
     db.refresh(new_user)
+    read_router.wrote(new_user.id)
+    response_cache.bump("users")
     return {"msg": "signup successful", "user_id": new_user.id}
 
 @router.post("/login", response_model=dict)
 def login(payload: LoginSchema, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+    try:
+        valid = bool(user) and password_hasher.verify(payload.password, user.password_hash)
+        if valid and PASSWORD_REHASH_ON_LOGIN and needs_rehash(user.password_hash):
+            user.password_hash = password_hasher.hash(payload.password)
+            db.commit()
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     token = create_access_token(subject=user.id, role=user.role)
     return {"access_token": token, "token_type": "bearer"}
+
+@router.get("/password-hasher/stats", response_model=dict, dependencies=[Depends(require_ops_token)])
+def password_hasher_stats():
+    return password_hasher.stats()
+
+@router.get("/principal-cache/stats", response_model=dict, dependencies=[Depends(require_ops_token)])
+def principal_cache_stats():
+    return principal_cache.stats()
+
+@router.get("/response-cache/stats", response_model=dict, dependencies=[Depends(require_ops_token)])
+def response_cache_stats():
+    return response_cache.stats()
+
+@router.get("/read-routing/stats", response_model=dict, dependencies=[Depends(require_ops_token)])
+def read_routing_stats():
+    return read_router.stats()
+
+@router.get("/admission/stats", response_model=dict, dependencies=[Depends(require_ops_token)])
+def admission_stats():
+    return admission.stats()
+
+@router.get("/jobs/stats", response_model=dict, dependencies=[Depends(require_ops_token)])
+def jobs_stats(db: Session = Depends(get_db)):
+    """This process's job workers, and the jobs in the table by status."""
+    return {**job_queue.stats(), "jobs": job_queue.counts(db)}
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from routers.dependencies import require_ops_token
+from models.keys import new_id
+from models.user import User
+from utils.generations import generation_sync
+from utils.auth_utils import PASSWORD_REHASH_ON_LOGIN, PasswordHasherBusy, needs_rehash, password_hasher
+from utils.token_utils import create_access_token
+from utils.search_index import reindex
+from utils.geo import index_locations
+from utils.read_routing import read_router
+from utils.response_cache import response_cache
+from schemas.user_schema import SignupSchema, LoginSchema
+from routers.auth_router import (
+    admission_stats, hasher_busy, jobs_stats, password_hasher_stats, principal_cache_stats, read_routing_stats,
+    response_cache_stats,
+)
+
+router = APIRouter(prefix="/auth", tags=["Auth"])
+
+@router.post("/signup", response_model=dict)
+async def signup(payload: SignupSchema, db: AsyncSession = Depends(get_async_db)):
+    if payload.role not in ("brand", "influencer"):
+        raise HTTPException(status_code=400, detail="role must be 'brand' or 'influencer'")
+
+    existing = (await db.execute(select(User.id).where(User.email == payload.email))).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Email already exists")
+
+    try:
+        password_hash = await password_hasher.hash_async(payload.password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    new_user = User(
+        id=new_id(),
+        name=payload.name,
+        email=payload.email,
+        password_hash=password_hash,
+        tag=payload.tag,
+        location=payload.location,
+        role=payload.role
+    )
+    db.add(new_user)
+    await db.run_sync(lambda s: reindex(s, new_user))
+    await db.run_sync(lambda s: index_locations(s, [("user.location", new_user.id, new_user.location)]))
+    published = await db.run_sync(lambda s: generation_sync.publish(s, "users"))
+    await db.commit()
+    generation_sync.seen(published)
+    read_router.wrote(new_user.id)
+    response_cache.bump("users")
+    return {"msg": "signup successful", "user_id": new_user.id}
+
+@router.post("/login", response_model=dict)
+async def login(payload: LoginSchema, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(User).where(User.email == payload.email))).scalars().first()
+    try:
+        valid = bool(user) and await password_hasher.verify_async(payload.password, user.password_hash)
+        if valid and PASSWORD_REHASH_ON_LOGIN and needs_rehash(user.password_hash):
+            user.password_hash = await password_hasher.hash_async(payload.password)
+            await db.commit()
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+    token = create_access_token(subject=user.id, role=user.role)
+    return {"access_token": token, "token_type": "bearer"}
+
+router.get("/password-hasher/stats", response_model=dict, dependencies=[Depends(require_ops_token)])(password_hasher_stats)
+router.get("/principal-cache/stats", response_model=dict, dependencies=[Depends(require_ops_token)])(principal_cache_stats)
+router.get("/response-cache/stats", response_model=dict, dependencies=[Depends(require_ops_token)])(response_cache_stats)
+router.get("/read-routing/stats", response_model=dict, dependencies=[Depends(require_ops_token)])(read_routing_stats)
+router.get("/admission/stats", response_model=dict, dependencies=[Depends(require_ops_token)])(admission_stats)
+router.get("/jobs/stats", response_model=dict, dependencies=[Depends(require_ops_token)])(jobs_stats)
@@ -1,159 +1,296 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import date
 from typing import List, Optional
-from database import SessionLocal
 from sqlalchemy.orm import Session
 from models.brand import Brand
 from models.influencer import Influencer
-from models.user import User
-from schemas.brand_schema import BrandCreateUpdate, BrandOut, BrandFullOut
-from utils.token_utils import decode_token
+from routers.dependencies import get_db, get_principal, get_read_db, near_point, require_ingest_token, require_ops_token, run_chunk_sync
+from schemas.brand_schema import BrandCreateUpdate, BrandOut, BrandFullOut, BrandPatch
+from schemas.influencer_schema import InfluencerSuggestionOut
+from schemas.user_schema import BulkReport, FacetsOut
+from utils.bulk_ingest import ingest
+from utils.event_index import overlapping
+from utils.facets import brand_facets
+from utils.fast_json import FAST_JSON_ENABLED, RowEncoder, page_response
+from utils.geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, within
+from utils.leaderboard import leaderboard
+from utils.principal_cache import principal_cache
+from utils import read_model
+from utils.read_model import brand_columns, brand_query, influencer_columns
+from utils.read_routing import read_router
+from utils.profiles import save_profile
+from utils.response_cache import response_cache
+from utils.search_index import narrow
+from utils.suggestions import influencer_ranker
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SUGGESTIONS_PAGE_SIZE, keyset_page, stream_ndjson
 from fastapi import Header
 
 router = APIRouter(prefix="/brands", tags=["Brands"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _brand_row(brand, user):
+    return {
+        "user_id": user.id,
+        "user_name": user.name,
+        "user_email": user.email,
+        "user_tag": user.tag,
+        "user_location": user.location,
+        "user_role": user.role,
+        "user_created_at": user.created_at,
+        "brand_id": brand.id,
+        "brand_name": brand.name,
+        "brand_email": brand.email,
+        "phone_number": brand.phone_number,
+        "brand_tag": brand.tag,
+        "brand_location": brand.location,
+        "event_start": brand.event_start,
+        "event_end": brand.event_end,
+    }
 
-def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Missing authorization header")
-    try:
-        token_type, token = authorization.split()
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user = db.query(User).filter(User.id == payload.get("sub")).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+encoder = RowEncoder(BrandFullOut)
+_KEY = encoder.fields.index("brand_id")
 
-@router.get("/filter", response_model=List[BrandFullOut])
-def filter_brands(
-    # User table filters
+# update payload fields also written to the user row
+USER_FIELDS = ("name", "email", "tag", "location")
+
+def filter_query(
+    db: Session,
     user_name: Optional[str] = None,
     user_email: Optional[str] = None,
     user_tag: Optional[str] = None,
     user_location: Optional[str] = None,
     user_role: Optional[str] = None,
-    # Brand table filters
     brand_name: Optional[str] = None,
     brand_email: Optional[str] = None,
     phone_number: Optional[str] = None,
     brand_tag: Optional[str] = None,
     brand_location: Optional[str] = None,
-    event_date: Optional[str] = None,
-    db: Session = Depends(get_db)
+    event_date: Optional[date] = None,
+    event_from: Optional[date] = None,
+    event_to: Optional[date] = None,
+    near: Optional[str] = None,
+    radius_km: float = DEFAULT_RADIUS_KM,
+    paged: bool = False,
 ):
-    q = db.query(Brand, User).join(User, Brand.user_id == User.id)
+    """The brands restricted by the filter parameters, on the read model or
+    the profile/user join (see ``utils.read_model``). ``paged`` marks a query
+    read in keyset pages (see ``utils.geo.within``)."""
+    c = brand_columns()
+    q = brand_query(db)
     # user filters
     if user_name:
-        q = q.filter(User.name.ilike(f"%{user_name}%"))
+        q = narrow(q, "user.name", user_name, c["user_id"]).filter(c["user_name"].ilike(f"%{user_name}%"))
     if user_email:
-        q = q.filter(User.email.ilike(f"%{user_email}%"))
+        q = narrow(q, "user.email", user_email, c["user_id"]).filter(c["user_email"].ilike(f"%{user_email}%"))
     if user_tag:
-        q = q.filter(User.tag == user_tag)
+        q = q.filter(c["user_tag"] == user_tag)
     if user_location:
-        q = q.filter(User.location == user_location)
+        q = q.filter(c["user_location"] == user_location)
     if user_role:
-        q = q.filter(User.role == user_role)
+        q = q.filter(c["user_role"] == user_role)
     # brand filters
     if brand_name:
-        q = q.filter(Brand.name.ilike(f"%{brand_name}%"))
+        q = narrow(q, "brand.name", brand_name, c["brand_id"]).filter(c["brand_name"].ilike(f"%{brand_name}%"))
     if brand_email:
-        q = q.filter(Brand.email.ilike(f"%{brand_email}%"))
+        q = narrow(q, "brand.email", brand_email, c["brand_id"]).filter(c["brand_email"].ilike(f"%{brand_email}%"))
     if phone_number:
-        q = q.filter(Brand.phone_number.ilike(f"%{phone_number}%"))
+        q = narrow(q, "brand.phone_number", phone_number, c["brand_id"]) \
+            .filter(c["phone_number"].ilike(f"%{phone_number}%"))
     if brand_tag:
-        q = q.filter(Brand.tag == brand_tag)
+        q = q.filter(c["brand_tag"] == brand_tag)
     if brand_location:
-        q = q.filter(Brand.location == brand_location)
+        q = q.filter(c["brand_location"] == brand_location)
     if event_date:
-        q = q.filter(Brand.event_start <= event_date).filter(Brand.event_end >= event_date)
-
-    rows = q.all()
-    out = []
-    for brand, user in rows:
-        out.append({
-            "user_id": user.id,
-            "user_name": user.name,
-            "user_email": user.email,
-            "user_tag": user.tag,
-            "user_location": user.location,
-            "user_role": user.role,
-            "user_created_at": user.created_at,
-            "brand_id": brand.id,
-            "brand_name": brand.name,
-            "brand_email": brand.email,
-            "phone_number": brand.phone_number,
-            "brand_tag": brand.tag,
-            "brand_location": brand.location,
-            "event_start": brand.event_start,
-            "event_end": brand.event_end,
-        })
-    return out
+        q = overlapping(q, event_date, event_date, c)
+    if event_from or event_to:
+        if event_from and event_to and event_from > event_to:
+            raise HTTPException(status_code=422, detail="event_from must not be after event_to")
+        q = overlapping(q, event_from, event_to, c)
+    if near:
+        q = within(q, "brand.location", c["brand_id"], near_point(near), radius_km, paged)
+    return q
+
+def serialize_row(brand, user) -> str:
+    return BrandFullOut(**_brand_row(brand, user)).model_dump_json()
+
+def serialize_values(*values) -> str:
+    return BrandFullOut(**dict(zip(encoder.fields, values))).model_dump_json()
+
+def filter_rows(q, cursor, limit):
+    """One keyset page of ``filter_query`` as dicts in ``BrandFullOut``
+    field order; only the needed columns are selected in fast mode and on
+    the read model."""
+    c = brand_columns()
+    if FAST_JSON_ENABLED or read_model.READ_MODEL_ENABLED:
+        rows, next_cursor = keyset_page(q.with_entities(*c.values()), c["brand_id"], cursor, limit,
+                                        key=lambda row: row[_KEY])
+        return encoder.rows(rows), next_cursor
+    rows, next_cursor = keyset_page(q, Brand.id, cursor, limit)
+    return [_brand_row(brand, user) for brand, user in rows], next_cursor
+
+def stream_source(q):
+    """``(ordered query, row serializer)`` for the NDJSON stream of ``q``."""
+    c = brand_columns()
+    q = q.order_by(c["brand_id"])
+    if FAST_JSON_ENABLED:
+        return q.with_entities(*c.values()), encoder.line
+    if read_model.READ_MODEL_ENABLED:
+        return q.with_entities(*c.values()), serialize_values
+    return q, serialize_row
+
+@router.get("/filter", response_model=List[BrandFullOut])
+def filter_brands(
+    response: Response,
+    # User table filters
+    user_name: Optional[str] = None,
+    user_email: Optional[str] = None,
+    user_tag: Optional[str] = None,
+    user_location: Optional[str] = None,
+    user_role: Optional[str] = None,
+    # Brand table filters
+    brand_name: Optional[str] = None,
+    brand_email: Optional[str] = None,
+    phone_number: Optional[str] = None,
+    brand_tag: Optional[str] = None,
+    brand_location: Optional[str] = None,
+    event_date: Optional[date] = None,
+    event_from: Optional[date] = None,
+    event_to: Optional[date] = None,
+    # Radius search on the brand's location
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    # Pagination / streaming
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    if stream:
+        # the streamed body outlives this call, so it gets its own session on
+        # the same database; stream_ndjson closes it after the last row, and we
+        # close it here if building the query fails
+        db = Session(bind=db.get_bind(), autoflush=False)
+    try:
+        q = filter_query(
+            db, user_name, user_email, user_tag, user_location, user_role,
+            brand_name, brand_email, phone_number, brand_tag, brand_location,
+            event_date, event_from, event_to, near, radius_km, not stream,
+        )
+        if stream:
+            return StreamingResponse(stream_ndjson(*stream_source(q)), media_type="application/x-ndjson")
+    except BaseException:
+        if stream:
+            db.close()
+        raise
+
+    return page_response(encoder, response, *filter_rows(q, cursor, limit))
+
+@router.get("/facets", response_model=FacetsOut)
+def facet_counts(
+    user_name: Optional[str] = None,
+    user_email: Optional[str] = None,
+    user_tag: Optional[str] = None,
+    user_location: Optional[str] = None,
+    user_role: Optional[str] = None,
+    brand_name: Optional[str] = None,
+    brand_email: Optional[str] = None,
+    phone_number: Optional[str] = None,
+    brand_tag: Optional[str] = None,
+    brand_location: Optional[str] = None,
+    event_date: Optional[date] = None,
+    event_from: Optional[date] = None,
+    event_to: Optional[date] = None,
+    # Radius search on the brand's location
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    db: Session = Depends(get_read_db)
+):
+    """Brands matching the ``/filter`` parameters, counted per brand tag and location."""
+    counts = brand_facets.counts(db, {
+        "user_name": user_name, "user_email": user_email, "user_tag": user_tag, "user_location": user_location,
+        "user_role": user_role, "brand_name": brand_name, "brand_email": brand_email,
+        "phone_number": phone_number, "brand_tag": brand_tag, "brand_location": brand_location,
+        "event_date": event_date, "event_from": event_from, "event_to": event_to,
+        "near": near,
+    })
+    if counts is not None:
+        return counts
+    return brand_facets.query(filter_query(
+        db, user_name, user_email, user_tag, user_location, user_role,
+        brand_name, brand_email, phone_number, brand_tag, brand_location,
+        event_date, event_from, event_to, near, radius_km,
+    ), brand_columns())
+
+@router.get("/facets/stats", response_model=dict, dependencies=[Depends(require_ops_token)])
+def brand_facets_stats():
+    return brand_facets.stats()
 
 @router.get("/trending", response_model=List[dict])
-def trending_influencers(tag: Optional[str] = None, location: Optional[str] = None, db: Session = Depends(get_db)):
-    q = db.query(Influencer).join(User, Influencer.user_id == User.id)
-    if tag:
-        q = q.filter(User.tag == tag)
-    if location:
-        q = q.filter(User.location == location)
-    q = q.order_by(Influencer.reach.desc())
-    results = q.all()
-    out = []
-    for infl in results:
-        user = db.query(User).filter(User.id == infl.user_id).first()
-        out.append({
-            "influencer_id": infl.id,
-            "name": user.name if user else None,
-            "location": user.location if user else None,
-            "tag": user.tag if user else None,
-            "reach": infl.reach,
-            "verified": infl.verified
-        })
-    return out
+def trending_influencers(
+    tag: Optional[str] = None,
+    location: Optional[str] = None,
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db)
+):
+    """Influencers by reach, optionally by tag and exact location, or within
+    ``radius_km`` of ``near``."""
+    narrow = None
+    if near:
+        point = near_point(near)
+
+        def narrow(q):
+            return within(q, "user.location", influencer_columns()["user_id"], point, radius_km)
+    return leaderboard.top(db, tag=tag, location=location, limit=limit, offset=offset, narrow=narrow)
+
+@router.get("/suggestions", response_model=List[InfluencerSuggestionOut])
+def suggested_influencers(
+    authorization: Optional[str] = Header(None),
+    limit: int = Query(SUGGESTIONS_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Best-scoring influencers for the calling brand; see ``utils.suggestions``."""
+    user = get_principal(authorization, db)
+    if user.role != "brand":
+        raise HTTPException(status_code=403, detail="Only brands can access influencer suggestions")
+    return influencer_ranker.rank(db, user.tag, user.location, limit)
+
+def save_brand(principal, user_values: dict, profile_values: dict, db: Session) -> dict:
+    """Apply an update of the caller's brand profile in one transaction."""
+    if principal.role != "brand":
+        raise HTTPException(status_code=403, detail="Only brand users can update brand profile")
+    brand, _ = save_profile(db, Brand, principal.id, user_values, profile_values)
+    principal_cache.invalidate_user(principal.id)
+    read_router.wrote(principal.id)
+    brand_facets.record(brand.id, brand_facets.key_for(brand, principal))
+    response_cache.bump("users", "brands")
+    return brand._asdict()
 
 @router.put("/update", response_model=BrandOut)
 def update_brand(payload: BrandCreateUpdate, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Missing authorization")
-    try:
-        token_type, token = authorization.split()
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    payload_token = decode_token(token)
-    if not payload_token:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.query(User).filter(User.id == payload_token.get("sub")).first()
-    if not user or user.role != "brand":
-        raise HTTPException(status_code=403, detail="Only brand users can update brand profile")
-    brand = db.query(Brand).filter(Brand.user_id == user.id).first()
-    if not brand:
-        brand = Brand(user_id=user.id)
-        db.add(brand)
-        db.commit()
-        db.refresh(brand)
-
-    for key, value in payload.dict(exclude_unset=True).items():
-        setattr(brand, key, value)
-    if payload.name is not None:
-        user.name = payload.name
-    if payload.email is not None:
-        user.email = payload.email
-    if payload.tag is not None:
-        user.tag = payload.tag
-    if payload.location is not None:
-        user.location = payload.location
-
-    db.add(brand)
-    db.add(user)
-    db.commit()
-    db.refresh(brand)
-    return brand
+    """Replace the brand profile with ``payload``; null user fields keep their value."""
+    principal = get_principal(authorization, db)
+    return save_brand(
+        principal,
+        payload.model_dump(include=set(USER_FIELDS), exclude_none=True),
+        payload.model_dump(exclude_unset=True),
+        db,
+    )
+
+@router.patch("/update", response_model=BrandOut)
+def patch_brand(payload: BrandPatch, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Write only the non-null fields of the body, without reading the profile first."""
+    principal = get_principal(authorization, db)
+    return save_brand(
+        principal,
+        payload.model_dump(include=set(USER_FIELDS), exclude_none=True),
+        payload.model_dump(exclude_none=True),
+        db,
+    )
+
+@router.post("/bulk", response_model=BulkReport, dependencies=[Depends(require_ingest_token)])
+async def bulk_brands(request: Request):
+    """Create or update brands from an NDJSON (default) or CSV (``Content-Type: text/csv``) body."""
+    return await ingest(request, "brand", run_chunk_sync)
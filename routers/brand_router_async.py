@@ -0,0 +1,124 @@
+# Async (DB_ASYNC=true) variants of the brand endpoints. Queries run on the
+# AsyncEngine; the shared query logic in brand_router is reused through
+# AsyncSession.run_sync so both paths stay identical.
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import date
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from database import get_async_db
+from routers.dependencies import get_async_read_db, require_ingest_token, require_ops_token, run_chunk_async
+from routers import brand_router as sync
+from schemas.brand_schema import BrandCreateUpdate, BrandOut, BrandFullOut, BrandPatch
+from schemas.influencer_schema import InfluencerSuggestionOut
+from schemas.user_schema import BulkReport, FacetsOut
+from utils.bulk_ingest import ingest
+from utils.fast_json import page_response
+from utils.geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SUGGESTIONS_PAGE_SIZE, stream_ndjson_async
+
+router = APIRouter(prefix="/brands", tags=["Brands"])
+
+@router.get("/filter", response_model=List[BrandFullOut])
+async def filter_brands(
+    response: Response,
+    # User table filters
+    user_name: Optional[str] = None,
+    user_email: Optional[str] = None,
+    user_tag: Optional[str] = None,
+    user_location: Optional[str] = None,
+    user_role: Optional[str] = None,
+    # Brand table filters
+    brand_name: Optional[str] = None,
+    brand_email: Optional[str] = None,
+    phone_number: Optional[str] = None,
+    brand_tag: Optional[str] = None,
+    brand_location: Optional[str] = None,
+    event_date: Optional[date] = None,
+    event_from: Optional[date] = None,
+    event_to: Optional[date] = None,
+    # Radius search on the brand's location
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    # Pagination / streaming
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    def build(s):
+        return sync.filter_query(
+            s, user_name, user_email, user_tag, user_location, user_role,
+            brand_name, brand_email, phone_number, brand_tag, brand_location,
+            event_date, event_from, event_to, near, radius_km, not stream,
+        )
+
+    if stream:
+        q, serialize = await db.run_sync(lambda s: sync.stream_source(build(s)))
+        return StreamingResponse(
+            stream_ndjson_async(async_sessionmaker(db.bind, autoflush=False), q.statement, serialize),
+            media_type="application/x-ndjson",
+        )
+
+    page = await db.run_sync(lambda s: sync.filter_rows(build(s), cursor, limit))
+    return page_response(sync.encoder, response, *page)
+
+@router.get("/facets", response_model=FacetsOut)
+async def facet_counts(
+    user_name: Optional[str] = None,
+    user_email: Optional[str] = None,
+    user_tag: Optional[str] = None,
+    user_location: Optional[str] = None,
+    user_role: Optional[str] = None,
+    brand_name: Optional[str] = None,
+    brand_email: Optional[str] = None,
+    phone_number: Optional[str] = None,
+    brand_tag: Optional[str] = None,
+    brand_location: Optional[str] = None,
+    event_date: Optional[date] = None,
+    event_from: Optional[date] = None,
+    event_to: Optional[date] = None,
+    # Radius search on the brand's location
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    return await db.run_sync(lambda s: sync.facet_counts(
+        user_name, user_email, user_tag, user_location, user_role,
+        brand_name, brand_email, phone_number, brand_tag, brand_location,
+        event_date, event_from, event_to, near, radius_km, s,
+    ))
+
+router.get("/facets/stats", response_model=dict, dependencies=[Depends(require_ops_token)])(sync.brand_facets_stats)
+
+@router.get("/trending", response_model=List[dict])
+async def trending_influencers(
+    tag: Optional[str] = None,
+    location: Optional[str] = None,
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    return await db.run_sync(lambda s: sync.trending_influencers(tag, location, near, radius_km, limit, offset, s))
+
+@router.get("/suggestions", response_model=List[InfluencerSuggestionOut])
+async def suggested_influencers(
+    authorization: Optional[str] = Header(None),
+    limit: int = Query(SUGGESTIONS_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    return await db.run_sync(lambda s: sync.suggested_influencers(authorization, limit, s))
+
+@router.put("/update", response_model=BrandOut)
+async def update_brand(payload: BrandCreateUpdate, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda s: sync.update_brand(payload, authorization, s))
+
+@router.patch("/update", response_model=BrandOut)
+async def patch_brand(payload: BrandPatch, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda s: sync.patch_brand(payload, authorization, s))
+
+@router.post("/bulk", response_model=BulkReport, dependencies=[Depends(require_ingest_token)])
+async def bulk_brands(request: Request):
+    return await ingest(request, "brand", run_chunk_async)
@@ -0,0 +1,109 @@
+# routers/dependencies.py
+import hmac
+import os
+from fastapi import Depends, Header, HTTPException
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+import database
+from models.user import User
+from utils.bulk_ingest import ingest_chunk
+from utils.geo import parse_near
+from utils.principal_cache import Principal, principal_cache
+from utils.read_routing import read_router
+from utils.token_utils import decode_token
+
+BULK_INGEST_TOKEN = os.getenv("BULK_INGEST_TOKEN")
+# guards the internal /stats endpoints
+OPS_TOKEN = os.getenv("OPS_TOKEN")
+
+def get_db():
+    db = database.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(authorization: Optional[str] = Header(None)):
+    """Session for the read-only discovery endpoints: on a replica chosen by
+    ``read_router``, or on the primary when there is none or the caller has
+    just written."""
+    replica = read_router.choose(authorization)
+    db = replica.session_factory() if replica is not None else database.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(authorization: Optional[str] = Header(None)):
+    """``get_read_db`` for the DB_ASYNC routers."""
+    replica = read_router.choose(authorization)
+    session_factory = replica.async_session_factory if replica is not None else database.AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
+
+def get_principal(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> Principal:
+    """Resolve the bearer token to the caller's id, role, tag and location.
+
+    Served from ``principal_cache`` when possible; only a miss decodes the JWT
+    and reads the user row.
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing authorization header")
+    try:
+        token_type, token = authorization.split()
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid authorization header")
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    payload = decode_token(token)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    user = db.query(User).filter(User.id == payload.get("sub")).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    principal = Principal.from_user(user)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+def require_ingest_token(x_ingest_token: Optional[str] = Header(None)) -> None:
+    """Guard for the bulk endpoints, which create users without a login.
+    They stay disabled until BULK_INGEST_TOKEN is configured."""
+    if not BULK_INGEST_TOKEN:
+        raise HTTPException(status_code=403, detail="Bulk ingestion is disabled")
+    if not x_ingest_token or not hmac.compare_digest(x_ingest_token, BULK_INGEST_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid ingest token")
+
+def require_ops_token(x_ops_token: Optional[str] = Header(None)) -> None:
+    """Guard for the ``/stats`` endpoints, whose queue depths, shed counts and
+    replica health are for operators only. They stay disabled until
+    OPS_TOKEN is configured."""
+    if not OPS_TOKEN:
+        raise HTTPException(status_code=403, detail="Stats endpoints are disabled")
+    if not x_ops_token or not hmac.compare_digest(x_ops_token, OPS_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid ops token")
+
+def near_point(near: str) -> Tuple[float, float]:
+    """``(lat, lon)`` of a ``near`` query parameter; 422 when it is neither
+    coordinates nor a known place."""
+    try:
+        return parse_near(near)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+async def run_chunk_sync(role, records, report) -> None:
+    """``ingest`` callback for the sync routers: one session per chunk, run
+    in the threadpool so the event loop keeps serving."""
+    def work():
+        db = database.SessionLocal()
+        try:
+            ingest_chunk(db, role, records, report)
+        finally:
+            db.close()
+    await run_in_threadpool(work)
+
+async def run_chunk_async(role, records, report) -> None:
+    """``ingest`` callback for the DB_ASYNC routers."""
+    async with database.AsyncSessionLocal() as db:
+        await db.run_sync(ingest_chunk, role, records, report)
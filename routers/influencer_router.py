@@ -1,145 +1,342 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from database import SessionLocal
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from models.influencer import Influencer
+from models.job import Job
 from models.brand import Brand
 from models.user import User
-from schemas.influencer_schema import InfluencerCreateUpdate, InfluencerOut, InfluencerFullOut
-from utils.token_utils import decode_token
+from routers.dependencies import get_db, get_read_db, near_point, require_ingest_token, require_ops_token, run_chunk_sync, get_principal
+from schemas.influencer_schema import InfluencerCreateUpdate, InfluencerOut, InfluencerFullOut, InfluencerPatch
+from schemas.brand_schema import BrandSuggestionOut
+from schemas.user_schema import BulkReport, FacetsOut, JobOut
+from utils.bulk_ingest import ingest
+from utils.facets import influencer_facets
+from utils.fast_json import FAST_JSON_ENABLED, RowEncoder, page_response
+from utils.generations import generation_sync
+from utils.geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, within
+from utils.influencer_index import influencer_index
+from utils.jobs import MAX_IDEMPOTENCY_KEY, enqueue, job_queue
+from utils.leaderboard import leaderboard
+from utils.principal_cache import principal_cache
+from utils import read_model
+from utils.read_model import influencer_columns, influencer_query, project
+from utils.read_routing import read_router
+from utils.profiles import save_profile
+from utils.response_cache import response_cache
+from utils.search_index import narrow
+from utils.suggestions import brand_ranker
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SUGGESTIONS_PAGE_SIZE, decode_cursor, encode_cursor, keyset_page, stream_ndjson,
+)
 from fastapi import Header
 
 router = APIRouter(prefix="/influencers", tags=["Influencers"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _influencer_row(infl, user):
+    return {
+        "user_id": user.id,
+        "user_name": user.name,
+        "user_email": user.email,
+        "user_tag": user.tag,
+        "user_location": user.location,
+        "user_role": user.role,
+        "user_created_at": user.created_at,
+        "influencer_id": infl.id,
+        "reach": infl.reach,
+        "verified": infl.verified,
+        "influencer_email": infl.email,
+    }
 
-def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Missing authorization header")
-    try:
-        token_type, token = authorization.split()
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user = db.query(User).filter(User.id == payload.get("sub")).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+encoder = RowEncoder(InfluencerFullOut)
+_KEY = encoder.fields.index("influencer_id")
 
-@router.get("/filter", response_model=List[InfluencerFullOut])
-def filter_influencers(
-    # User table filters
+# update payload fields written to the user row and to the influencer row
+USER_FIELDS = ("name", "email", "tag", "location")
+PROFILE_FIELDS = ("reach", "verified", "email")
+
+def filter_query(
+    db: Session,
     user_name: Optional[str] = None,
     user_email: Optional[str] = None,
     user_tag: Optional[str] = None,
     user_location: Optional[str] = None,
     user_role: Optional[str] = None,
-    # Influencer table filters
-    min_reach: Optional[int] = Query(None, alias="reach"),
+    min_reach: Optional[int] = None,
     verified: Optional[bool] = None,
     influencer_email: Optional[str] = None,
-    db: Session = Depends(get_db)
+    near: Optional[str] = None,
+    radius_km: float = DEFAULT_RADIUS_KM,
+    paged: bool = False,
 ):
-    q = db.query(Influencer, User).join(User, Influencer.user_id == User.id)
+    """The influencers restricted by the filter parameters, on the read model
+    or the profile/user join (see ``utils.read_model``). ``paged`` marks a
+    query read in keyset pages (see ``utils.geo.within``)."""
+    c = influencer_columns()
+    q = influencer_query(db)
     if user_name:
-        q = q.filter(User.name.ilike(f"%{user_name}%"))
+        q = narrow(q, "user.name", user_name, c["user_id"]).filter(c["user_name"].ilike(f"%{user_name}%"))
     if user_email:
-        q = q.filter(User.email.ilike(f"%{user_email}%"))
+        q = narrow(q, "user.email", user_email, c["user_id"]).filter(c["user_email"].ilike(f"%{user_email}%"))
     if user_tag:
-        q = q.filter(User.tag == user_tag)
+        q = q.filter(c["user_tag"] == user_tag)
     if user_location:
-        q = q.filter(User.location == user_location)
+        q = q.filter(c["user_location"] == user_location)
     if user_role:
-        q = q.filter(User.role == user_role)
+        q = q.filter(c["user_role"] == user_role)
     if min_reach is not None:
-        q = q.filter(Influencer.reach >= min_reach)
+        q = q.filter(c["reach"] >= min_reach)
     if verified is not None:
-        q = q.filter(Influencer.verified == verified)
+        q = q.filter(c["verified"] == verified)
     if influencer_email:
-        q = q.filter(Influencer.email.ilike(f"%{influencer_email}%"))
-    rows = q.all()
-    out = []
-    for infl, user in rows:
-        out.append({
-            "user_id": user.id,
-            "user_name": user.name,
-            "user_email": user.email,
-            "user_tag": user.tag,
-            "user_location": user.location,
-            "user_role": user.role,
-            "user_created_at": user.created_at,
-            "influencer_id": infl.id,
-            "reach": infl.reach,
-            "verified": infl.verified,
-            "influencer_email": infl.email,
-        })
-    return out
-
-@router.get("/suggestions", response_model=List[dict])
-def suggested_brands(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    user = get_current_user(authorization, db)
+        q = narrow(q, "influencer.email", influencer_email, c["influencer_id"]) \
+            .filter(c["influencer_email"].ilike(f"%{influencer_email}%"))
+    if near:
+        q = within(q, "user.location", c["user_id"], near_point(near), radius_km, paged)
+    return q
+
+def indexed_page(cursor, limit, user_name, user_email, user_tag, user_location, user_role,
+                 min_reach, verified, influencer_email, near=None):
+    """Answer a filter page from ``influencer_index`` when it is loaded and
+    every predicate is supported; returns ``None`` to fall back to SQL."""
+    if not influencer_index.ready or user_name or user_email or influencer_email or near:
+        return None
+    rows, last_key = influencer_index.page(
+        decode_cursor(cursor), limit, user_tag, user_location, user_role, min_reach, verified,
+    )
+    return rows, encode_cursor(last_key) if last_key else None
+
+def serialize_row(infl, user) -> str:
+    return InfluencerFullOut(**_influencer_row(infl, user)).model_dump_json()
+
+def serialize_values(*values) -> str:
+    return InfluencerFullOut(**dict(zip(encoder.fields, values))).model_dump_json()
+
+def filter_rows(q, cursor, limit):
+    """One keyset page of ``filter_query`` as dicts in ``InfluencerFullOut``
+    field order; only the needed columns are selected in fast mode and on
+    the read model."""
+    c = influencer_columns()
+    if FAST_JSON_ENABLED or read_model.READ_MODEL_ENABLED:
+        rows, next_cursor = keyset_page(q.with_entities(*c.values()), c["influencer_id"], cursor, limit,
+                                        key=lambda row: row[_KEY])
+        return encoder.rows(rows), next_cursor
+    rows, next_cursor = keyset_page(q, Influencer.id, cursor, limit)
+    return [_influencer_row(infl, user) for infl, user in rows], next_cursor
+
+def stream_source(q):
+    """``(ordered query, row serializer)`` for the NDJSON stream of ``q``."""
+    c = influencer_columns()
+    q = q.order_by(c["influencer_id"])
+    if FAST_JSON_ENABLED:
+        return q.with_entities(*c.values()), encoder.line
+    if read_model.READ_MODEL_ENABLED:
+        return q.with_entities(*c.values()), serialize_values
+    return q, serialize_row
+
+@router.get("/filter", response_model=List[InfluencerFullOut])
+def filter_influencers(
+    response: Response,
+    # User table filters
+    user_name: Optional[str] = None,
+    user_email: Optional[str] = None,
+    user_tag: Optional[str] = None,
+    user_location: Optional[str] = None,
+    user_role: Optional[str] = None,
+    # Influencer table filters
+    min_reach: Optional[int] = Query(None, alias="reach"),
+    verified: Optional[bool] = None,
+    influencer_email: Optional[str] = None,
+    # Radius search on the user's location
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    # Pagination / streaming
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    if not stream:
+        page = indexed_page(
+            cursor, limit, user_name, user_email, user_tag, user_location, user_role,
+            min_reach, verified, influencer_email, near,
+        )
+        if page is not None:
+            return page_response(encoder, response, *page)
+
+    if stream:
+        # the streamed body outlives this call, so it gets its own session on
+        # the same database; stream_ndjson closes it after the last row, and we
+        # close it here if building the query fails
+        db = Session(bind=db.get_bind(), autoflush=False)
+    try:
+        q = filter_query(
+            db, user_name, user_email, user_tag, user_location, user_role,
+            min_reach, verified, influencer_email, near, radius_km, not stream,
+        )
+        if stream:
+            return StreamingResponse(stream_ndjson(*stream_source(q)), media_type="application/x-ndjson")
+    except BaseException:
+        if stream:
+            db.close()
+        raise
+
+    return page_response(encoder, response, *filter_rows(q, cursor, limit))
+
+@router.get("/facets", response_model=FacetsOut)
+def facet_counts(
+    user_name: Optional[str] = None,
+    user_email: Optional[str] = None,
+    user_tag: Optional[str] = None,
+    user_location: Optional[str] = None,
+    user_role: Optional[str] = None,
+    min_reach: Optional[int] = Query(None, alias="reach"),
+    verified: Optional[bool] = None,
+    influencer_email: Optional[str] = None,
+    # Radius search on the user's location
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    db: Session = Depends(get_read_db)
+):
+    """Influencers matching the ``/filter`` parameters, counted per tag, location and verified state."""
+    counts = influencer_facets.counts(db, {
+        "user_name": user_name, "user_email": user_email, "user_tag": user_tag, "user_location": user_location,
+        "user_role": user_role, "min_reach": min_reach, "verified": verified, "influencer_email": influencer_email,
+        "near": near,
+    })
+    if counts is not None:
+        return counts
+    return influencer_facets.query(filter_query(
+        db, user_name, user_email, user_tag, user_location, user_role,
+        min_reach, verified, influencer_email, near, radius_km,
+    ), influencer_columns())
+
+@router.get("/suggestions", response_model=List[BrandSuggestionOut])
+def suggested_brands(
+    authorization: Optional[str] = Header(None),
+    limit: int = Query(SUGGESTIONS_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Best-scoring brands for the calling influencer; see ``utils.suggestions``."""
+    user = get_principal(authorization, db)
     if user.role != "influencer":
         raise HTTPException(status_code=403, detail="Only influencers can access suggestions")
+    return brand_ranker.rank(db, user.tag, user.location, limit)
 
-    q = db.query(Brand)
-    if user.tag:
-        q = q.filter(Brand.tag == user.tag)
-    if user.location:
-        q = q.filter(Brand.location == user.location)
-    results = q.all()
-    return results
+def save_influencer(principal, user_values: dict, profile_values: dict, db: Session) -> dict:
+    """Apply an update of the caller's influencer profile in one transaction
+    and propagate it to the caches and in-memory views."""
+    if principal.role != "influencer":
+        raise HTTPException(status_code=403, detail="Only influencer role can update influencer profile")
+    infl, user = save_profile(db, Influencer, principal.id, user_values, profile_values, need_user=True)
+    principal_cache.invalidate_user(principal.id)
+    read_router.wrote(principal.id)
+    leaderboard.record(infl, user)
+    influencer_index.record(infl, user)
+    influencer_facets.record(infl.id, influencer_facets.key_for(infl, user))
+    # after the in-memory views, so no response is cached from stale data
+    response_cache.bump("users", "influencers")
+    return infl._asdict()
 
 @router.put("/update", response_model=InfluencerOut)
 def update_influencer(payload: InfluencerCreateUpdate, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    user = get_current_user(authorization, db)
+    """Save the profile; null fields keep their value, an omitted ``reach``/``verified`` resets to 0/false."""
+    principal = get_principal(authorization, db)
+    return save_influencer(
+        principal,
+        payload.model_dump(include=set(USER_FIELDS), exclude_none=True),
+        payload.model_dump(include=set(PROFILE_FIELDS), exclude_none=True),
+        db,
+    )
 
-    if user.role != "influencer":
-        raise HTTPException(status_code=403, detail="Only influencer role can update influencer profile")
-    infl = db.query(Influencer).filter(Influencer.user_id == user.id).first()
-    if not infl:
-        infl = Influencer(user_id=user.id)
-        db.add(infl)
-        db.commit()
-        db.refresh(infl)
-
-    if payload.reach is not None:
-        infl.reach = payload.reach
-    if payload.verified is not None:
-        infl.verified = payload.verified
-    if payload.email:
-        infl.email = payload.email
-    if payload.email is not None:
-        user.email = payload.email
-    if payload.name is not None:
-        user.name = payload.name
-    if payload.tag is not None:
-        user.tag = payload.tag
-    if payload.location is not None:
-        user.location = payload.location
-
-    db.add(infl)
-    db.add(user)
-    db.commit()
-    db.refresh(infl)
-    return infl
+@router.patch("/update", response_model=InfluencerOut)
+def patch_influencer(payload: InfluencerPatch, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Write only the non-null fields of the body, without reading the profile first."""
+    principal = get_principal(authorization, db)
+    return save_influencer(
+        principal,
+        payload.model_dump(include=set(USER_FIELDS), exclude_none=True),
+        payload.model_dump(include=set(PROFILE_FIELDS), exclude_none=True),
+        db,
+    )
+
+def verify_reach_batch(db: Session, jobs) -> tuple:
+    """``verify_reach`` job handler: mark the batch's influencers verified
+    with one ``UPDATE`` and rewrite their read-model rows. The worker may be
+    another process, so the change is also published to ``generation_sync``."""
+    targets = {job.target_id for job in jobs}
+    written = db.query(Influencer, User).join(User, Influencer.user_id == User.id) \
+        .filter(Influencer.id.in_(targets)).all()
+    found = {infl.id for infl, _ in written}
+    failures = {job.id: "Influencer not found" for job in jobs if job.target_id not in found}
+    if not written:
+        return failures, None
+    # also sets verified on the rows loaded above
+    db.execute(update(Influencer).where(Influencer.id.in_(found)).values(verified=True))
+    project(db, Influencer, [user.id for _, user in written])
+    # snapshot before commit expires the loaded rows
+    entries = [leaderboard.entry_for(infl, user) for infl, user in written]
+    index_rows = [influencer_index.row_for(infl, user) for infl, user in written] if influencer_index.enabled else []
+    facet_rows = [(infl.id, influencer_facets.key_for(infl, user)) for infl, user in written]
+    requesters = {job.requested_by for job in jobs if job.requested_by and job.id not in failures}
+    published = generation_sync.publish(db, "influencers")
+
+    def done():
+        for user_id in requesters:
+            read_router.wrote(user_id)
+        for entry in entries:
+            leaderboard.record_entry(entry)
+        influencer_index.record_rows(index_rows)
+        influencer_facets.record_rows(facet_rows)
+        response_cache.bump("influencers")
+        generation_sync.seen(published)
+    return failures, done
 
-@router.post("/{influencer_id}/verify-reach")
-def verify_reach(influencer_id: str, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    user = get_current_user(authorization, db)
+job_queue.register("verify_reach", verify_reach_batch)
+
+@router.post("/{influencer_id}/verify-reach", response_model=JobOut, status_code=202)
+def verify_reach(
+    influencer_id: str,
+    authorization: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_IDEMPOTENCY_KEY),
+    db: Session = Depends(get_db),
+):
+    """Queue a ``verify_reach`` job; poll ``GET /influencers/jobs/{id}`` for its result.
+    Repeating a request with the same ``Idempotency-Key`` returns the first job."""
+    user = get_principal(authorization, db)
     if user.role != "brand":
         raise HTTPException(status_code=403, detail="Only brand users can request verification (MVP)")
-    infl = db.query(Influencer).filter(Influencer.id == influencer_id).first()
-    if not infl:
+    if db.query(Influencer.id).filter(Influencer.id == influencer_id).first() is None:
         raise HTTPException(status_code=404, detail="Influencer not found")
-    infl.verified = True
-    db.add(infl)
+    # keys are per caller, so one client cannot collide with another's
+    key = f"{user.id}:{idempotency_key}" if idempotency_key else None
+    job = enqueue(db, "verify_reach", influencer_id, user.id, key)
+    if job.kind != "verify_reach" or job.target_id != influencer_id:
+        raise HTTPException(status_code=409, detail="Idempotency-Key already used for another request")
     db.commit()
-    db.refresh(infl)
-    return {"msg": "Influencer reach verified (manual toggle in MVP)", "influencer_id": influencer_id}
+    job_queue.notify()
+    # read while the session is open; commit expired the row
+    return JobOut.model_validate(job)
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def job_status(job_id: str, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Status of a job queued by the caller."""
+    user = get_principal(authorization, db)
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job is None or job.requested_by != user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/index/stats", response_model=dict, dependencies=[Depends(require_ops_token)])
+def influencer_index_stats():
+    return influencer_index.stats()
+
+@router.get("/facets/stats", response_model=dict, dependencies=[Depends(require_ops_token)])
+def influencer_facets_stats():
+    return influencer_facets.stats()
+
+@router.post("/bulk", response_model=BulkReport, dependencies=[Depends(require_ingest_token)])
+async def bulk_influencers(request: Request):
+    """Create or update influencers from an NDJSON (default) or CSV (``Content-Type: text/csv``) body."""
+    return await ingest(request, "influencer", run_chunk_sync)
@@ -0,0 +1,119 @@
+# Async (DB_ASYNC=true) variants of the influencer endpoints. Queries run on
+# the AsyncEngine; the shared query logic in influencer_router is reused
+# through AsyncSession.run_sync so both paths stay identical.
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from database import get_async_db
+from routers.dependencies import get_async_read_db, require_ingest_token, require_ops_token, run_chunk_async
+from routers import influencer_router as sync
+from schemas.influencer_schema import InfluencerCreateUpdate, InfluencerOut, InfluencerFullOut, InfluencerPatch
+from schemas.brand_schema import BrandSuggestionOut
+from schemas.user_schema import BulkReport, FacetsOut, JobOut
+from utils.bulk_ingest import ingest
+from utils.fast_json import page_response
+from utils.geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM
+from utils.jobs import MAX_IDEMPOTENCY_KEY
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SUGGESTIONS_PAGE_SIZE, stream_ndjson_async
+
+router = APIRouter(prefix="/influencers", tags=["Influencers"])
+
+@router.get("/filter", response_model=List[InfluencerFullOut])
+async def filter_influencers(
+    response: Response,
+    # User table filters
+    user_name: Optional[str] = None,
+    user_email: Optional[str] = None,
+    user_tag: Optional[str] = None,
+    user_location: Optional[str] = None,
+    user_role: Optional[str] = None,
+    # Influencer table filters
+    min_reach: Optional[int] = Query(None, alias="reach"),
+    verified: Optional[bool] = None,
+    influencer_email: Optional[str] = None,
+    # Radius search on the user's location
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    # Pagination / streaming
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    def build(s):
+        return sync.filter_query(
+            s, user_name, user_email, user_tag, user_location, user_role,
+            min_reach, verified, influencer_email, near, radius_km, not stream,
+        )
+
+    if stream:
+        q, serialize = await db.run_sync(lambda s: sync.stream_source(build(s)))
+        return StreamingResponse(
+            stream_ndjson_async(async_sessionmaker(db.bind, autoflush=False), q.statement, serialize),
+            media_type="application/x-ndjson",
+        )
+
+    page = sync.indexed_page(
+        cursor, limit, user_name, user_email, user_tag, user_location, user_role,
+        min_reach, verified, influencer_email, near,
+    )
+    if page is None:
+        page = await db.run_sync(lambda s: sync.filter_rows(build(s), cursor, limit))
+    return page_response(sync.encoder, response, *page)
+
+@router.get("/facets", response_model=FacetsOut)
+async def facet_counts(
+    user_name: Optional[str] = None,
+    user_email: Optional[str] = None,
+    user_tag: Optional[str] = None,
+    user_location: Optional[str] = None,
+    user_role: Optional[str] = None,
+    min_reach: Optional[int] = Query(None, alias="reach"),
+    verified: Optional[bool] = None,
+    influencer_email: Optional[str] = None,
+    # Radius search on the user's location
+    near: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    return await db.run_sync(lambda s: sync.facet_counts(
+        user_name, user_email, user_tag, user_location, user_role,
+        min_reach, verified, influencer_email, near, radius_km, s,
+    ))
+
+@router.get("/suggestions", response_model=List[BrandSuggestionOut])
+async def suggested_brands(
+    authorization: Optional[str] = Header(None),
+    limit: int = Query(SUGGESTIONS_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    return await db.run_sync(lambda s: sync.suggested_brands(authorization, limit, s))
+
+@router.put("/update", response_model=InfluencerOut)
+async def update_influencer(payload: InfluencerCreateUpdate, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda s: sync.update_influencer(payload, authorization, s))
+
+@router.patch("/update", response_model=InfluencerOut)
+async def patch_influencer(payload: InfluencerPatch, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda s: sync.patch_influencer(payload, authorization, s))
+
+@router.post("/{influencer_id}/verify-reach", response_model=JobOut, status_code=202)
+async def verify_reach(
+    influencer_id: str,
+    authorization: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_IDEMPOTENCY_KEY),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(lambda s: sync.verify_reach(influencer_id, authorization, idempotency_key, s))
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+async def job_status(job_id: str, authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda s: sync.job_status(job_id, authorization, s))
+
+router.get("/index/stats", response_model=dict, dependencies=[Depends(require_ops_token)])(sync.influencer_index_stats)
+router.get("/facets/stats", response_model=dict, dependencies=[Depends(require_ops_token)])(sync.influencer_facets_stats)
+
+@router.post("/bulk", response_model=BulkReport, dependencies=[Depends(require_ingest_token)])
+async def bulk_influencers(request: Request):
+    return await ingest(request, "influencer", run_chunk_async)
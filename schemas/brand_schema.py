@@ -13,6 +13,16 @@ class BrandCreateUpdate(BaseModel):
     event_start: Optional[date]
     event_end: Optional[date]
 
+class BrandPatch(BaseModel):
+    # PATCH /brands/update: omitted or null fields keep the stored value
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    phone_number: Optional[str] = None
+    tag: Optional[str] = None
+    location: Optional[str] = None
+    event_start: Optional[date] = None
+    event_end: Optional[date] = None
+
 class BrandOut(BaseModel):
     id: str
     user_id: str
@@ -49,3 +59,24 @@ class BrandFullOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+class BrandBulkRow(BrandCreateUpdate):
+    # one row of POST /brands/bulk; email identifies the user
+    name: str
+    email: EmailStr
+    phone_number: Optional[str] = None
+    tag: Optional[str] = None
+    location: Optional[str] = None
+    event_start: Optional[date] = None
+    event_end: Optional[date] = None
+    password: Optional[str] = None
+
+class BrandSuggestionOut(BaseModel):
+    # one ranked row of GET /influencers/suggestions
+    brand_id: str
+    brand_name: Optional[str]
+    brand_tag: Optional[str]
+    brand_location: Optional[str]
+    event_start: Optional[date]
+    event_end: Optional[date]
+    score: float
@@ -11,6 +11,15 @@ class InfluencerCreateUpdate(BaseModel):
     tag: Optional[str] = None
     location: Optional[str] = None
 
+class InfluencerPatch(BaseModel):
+    # PATCH /influencers/update: omitted or null fields keep the stored value
+    reach: Optional[int] = None
+    verified: Optional[bool] = None
+    email: Optional[EmailStr] = None
+    name: Optional[str] = None
+    tag: Optional[str] = None
+    location: Optional[str] = None
+
 class InfluencerOut(BaseModel):
     id: str
     user_id: str
@@ -39,3 +48,19 @@ class InfluencerFullOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+class InfluencerBulkRow(InfluencerCreateUpdate):
+    # one row of POST /influencers/bulk; email identifies the user
+    email: EmailStr
+    name: str
+    password: Optional[str] = None
+
+class InfluencerSuggestionOut(BaseModel):
+    # one ranked row of GET /brands/suggestions
+    influencer_id: str
+    name: str
+    tag: Optional[str]
+    location: Optional[str]
+    reach: Optional[int]
+    verified: Optional[bool]
+    score: float
@@ -1,6 +1,7 @@
 # schemas/user_schema.py
+from datetime import datetime
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Dict, List, Optional, Union
 
 class SignupSchema(BaseModel):
     name: str
@@ -24,3 +25,35 @@ class UserOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkReport(BaseModel):
+    processed: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[BulkRowError] = []
+
+class FacetCount(BaseModel):
+    value: Union[bool, str, None]
+    count: int
+
+class FacetsOut(BaseModel):
+    total: int
+    facets: Dict[str, List[FacetCount]]
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    target_id: Optional[str]
+    status: str  # 'queued', 'running', 'succeeded' or 'failed'
+    attempts: int
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
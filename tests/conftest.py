@@ -0,0 +1,49 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# settings are read at import time, so they go in before the app is imported
+_DATA_DIR = tempfile.mkdtemp(prefix="connector-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DATA_DIR, 'primary.db')}"
+os.environ["READ_DATABASE_URLS"] = ""
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+os.environ["JOB_WORKERS"] = "0"
+# tests poll cache_generations themselves
+os.environ["CACHE_SYNC_SECONDS"] = "0"
+os.environ["BULK_INGEST_TOKEN"] = "test-ingest"
+os.environ["OPS_TOKEN"] = "test-ops"
+
+import pytest
+from fastapi.testclient import TestClient
+import database
+import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation
+from utils.bulk_ingest import BulkReport, ingest_chunk
+from utils.migrations import migrate
+
+@pytest.fixture(scope="session")
+def data_dir():
+    return _DATA_DIR
+
+@pytest.fixture(scope="session")
+def influencers():
+    """Emails of the influencers tagged ``fitness`` in the primary database,
+    in insertion order; other tests add theirs under other tags."""
+    migrate(database.engine, log=None)
+    emails = [f"influencer{i:02d}@example.com" for i in range(25)]
+    db = database.SessionLocal()
+    try:
+        report = BulkReport()
+        ingest_chunk(db, "influencer", [
+            (i + 1, {"email": email, "name": f"Influencer {i}", "reach": i * 10, "tag": "fitness"})
+            for i, email in enumerate(emails)
+        ], report)
+        assert not report.errors
+    finally:
+        db.close()
+    return emails
+
+@pytest.fixture(scope="session")
+def client(influencers):
+    from main import app
+    with TestClient(app) as client:
+        yield client
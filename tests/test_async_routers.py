@@ -0,0 +1,68 @@
+# tests/test_async_routers.py
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import database
+from routers import auth_router_async, brand_router_async, influencer_router_async
+
+@pytest.fixture(scope="module")
+def async_client(influencers):
+    """The DB_ASYNC routers on ``sqlite+aiosqlite`` over the primary database.
+
+    DB_ASYNC is read once at import, so it is switched on here and the lazy
+    async engine and session factory are created afresh for this module.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(database, "DB_ASYNC", True)
+        for name in ("async_engine", "AsyncSessionLocal"):
+            mp.delattr(database, name, raising=False)
+        app = FastAPI()
+        for routes in (auth_router_async, influencer_router_async, brand_router_async):
+            app.include_router(routes.router)
+        with TestClient(app) as client:
+            yield client
+            client.portal.call(database.async_engine.dispose)
+
+def signup(client, email, role, tag):
+    response = client.post("/auth/signup", json={
+        "name": email.split("@")[0], "email": email, "password": "pw", "role": role, "tag": tag,
+    })
+    assert response.status_code == 200
+    response = client.post("/auth/login", json={"email": email, "password": "pw"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_async_engine_uses_the_async_driver(async_client):
+    assert async_client.post("/auth/login", json={"email": "nobody@example.com", "password": "pw"}).status_code == 401
+    assert database.async_engine.url.drivername == "sqlite+aiosqlite"
+
+def test_signup_login_and_influencer_update(async_client):
+    auth = signup(async_client, "async.influencer@example.com", "influencer", "podcasts")
+    assert async_client.post("/auth/login", json={
+        "email": "async.influencer@example.com", "password": "wrong"}).status_code == 401
+
+    response = async_client.put("/influencers/update", headers=auth, json={"reach": 900, "verified": True})
+    assert response.status_code == 200
+    assert (response.json()["reach"], response.json()["verified"]) == (900, True)
+
+    rows = async_client.get("/influencers/filter", params={"user_tag": "podcasts"}).json()
+    assert [(row["user_email"], row["reach"]) for row in rows] == [("async.influencer@example.com", 900)]
+    response = async_client.get("/influencers/filter", params={"user_tag": "podcasts", "stream": "true"})
+    assert [json.loads(line)["reach"] for line in response.text.splitlines()] == [900]
+
+def test_brand_filter_and_trending(async_client):
+    star = signup(async_client, "async.star@example.com", "influencer", "gaming")
+    assert async_client.patch("/influencers/update", headers=star, json={"reach": 700}).status_code == 200
+    auth = signup(async_client, "async.brand@example.com", "brand", "gaming")
+    response = async_client.put("/brands/update", headers=auth, json={
+        "name": "Async Brand", "email": "async.brand@example.com", "phone_number": "555-0100",
+        "tag": "gaming", "location": "Berlin", "event_start": None, "event_end": None,
+    })
+    assert response.status_code == 200
+
+    rows = async_client.get("/brands/filter", params={"brand_tag": "gaming"}).json()
+    assert [row["brand_email"] for row in rows] == ["async.brand@example.com"]
+
+    trending = async_client.get("/brands/trending", params={"tag": "gaming"}).json()
+    assert [(row["name"], row["reach"]) for row in trending] == [("async.star", 700)]
@@ -0,0 +1,28 @@
+# tests/test_bulk_ingest.py
+import json
+from schemas.influencer_schema import InfluencerFullOut
+
+INGEST = {"X-Ingest-Token": "test-ingest", "Content-Type": "application/x-ndjson"}
+
+def test_signed_up_user_gets_profile_defaults(client):
+    response = client.post("/auth/signup", json={
+        "name": "Signed Up", "email": "signedup@example.com", "password": "pw", "role": "influencer", "tag": "travel",
+    })
+    assert response.status_code == 200
+    response = client.post("/influencers/bulk", headers=INGEST,
+                           content=json.dumps({"email": "signedup@example.com", "name": "Signed Up"}))
+    assert response.status_code == 200
+    assert response.json()["failed"] == 0
+
+    rows = client.get("/influencers/filter", params={"user_tag": "travel"}).json()
+    assert [(row["user_email"], row["reach"], row["verified"]) for row in rows] == [("signedup@example.com", 0, False)]
+    InfluencerFullOut.model_validate(rows[0])
+
+def test_existing_profile_keeps_its_values(client):
+    client.post("/influencers/bulk", headers=INGEST, content=json.dumps(
+        {"email": "kept@example.com", "name": "Kept", "reach": 70, "verified": True, "tag": "food"}))
+    response = client.post("/influencers/bulk", headers=INGEST,
+                           content=json.dumps({"email": "kept@example.com", "name": "Kept Again"}))
+    assert response.json()["updated"] == 1
+    rows = client.get("/influencers/filter", params={"user_tag": "food"}).json()
+    assert [(row["user_name"], row["reach"], row["verified"]) for row in rows] == [("Kept Again", 70, True)]
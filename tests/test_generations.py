@@ -0,0 +1,106 @@
+# tests/test_generations.py
+from sqlalchemy import select
+import database
+from models.cache_generation import CacheGeneration
+from utils.generations import GenerationSync, generation_sync
+from utils.response_cache import response_cache
+
+def publish(*names):
+    with database.SessionLocal() as db:
+        published = GenerationSync.publish(db, *names)
+        db.commit()
+    return published
+
+def listening(sync, name):
+    calls = []
+    sync.listen(name, lambda: calls.append(name))
+    return calls
+
+def test_first_poll_takes_the_current_generations(influencers):
+    publish("t_first")
+    sync = GenerationSync(poll_seconds=0)
+    calls = listening(sync, "t_first")
+    assert sync.poll(database.SessionLocal) == []
+    assert calls == []
+
+def test_changes_from_elsewhere_run_the_listeners(influencers):
+    publish("t_remote")
+    sync = GenerationSync(poll_seconds=0)
+    calls = listening(sync, "t_remote")
+    sync.poll(database.SessionLocal)
+    publish("t_remote")
+    publish("t_remote")
+    assert sync.poll(database.SessionLocal) == ["t_remote"]
+    assert calls == ["t_remote"]
+    assert sync.poll(database.SessionLocal) == []
+
+def test_a_table_first_published_after_startup_counts_as_a_change(influencers):
+    sync = GenerationSync(poll_seconds=0)
+    calls = listening(sync, "t_new")
+    sync.poll(database.SessionLocal)
+    assert publish("t_new") == {"t_new": 1}
+    sync.poll(database.SessionLocal)
+    assert calls == ["t_new"]
+
+def test_own_changes_do_not_reload(influencers):
+    sync = GenerationSync(poll_seconds=0)
+    calls = listening(sync, "t_own")
+    publish("t_own")
+    sync.poll(database.SessionLocal)
+    sync.seen(publish("t_own"))
+    assert sync.poll(database.SessionLocal) == []
+    assert calls == []
+
+def test_own_change_after_a_missed_one_still_reloads(influencers):
+    sync = GenerationSync(poll_seconds=0)
+    calls = listening(sync, "t_mixed")
+    publish("t_mixed")
+    sync.poll(database.SessionLocal)
+    publish("t_mixed")
+    sync.seen(publish("t_mixed"))
+    assert sync.poll(database.SessionLocal) == ["t_mixed"]
+    assert calls == ["t_mixed"]
+
+def test_listeners_run_again_once_settled(influencers, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("utils.generations.time.monotonic", lambda: clock[0])
+    sync = GenerationSync(poll_seconds=0, settle_seconds=5)
+    calls = listening(sync, "t_settle")
+    sync.poll(database.SessionLocal)
+    publish("t_settle")
+    sync.poll(database.SessionLocal)
+    clock[0] += 4
+    sync.poll(database.SessionLocal)
+    assert calls == ["t_settle"]
+    clock[0] += 1
+    sync.poll(database.SessionLocal)
+    sync.poll(database.SessionLocal)
+    assert calls == ["t_settle", "t_settle"]
+
+def stored(name):
+    with database.SessionLocal() as db:
+        return db.execute(select(CacheGeneration.generation).where(CacheGeneration.name == name)).scalar() or 0
+
+def test_write_paths_publish_without_reloading_their_own_process(client):
+    generation_sync.poll(database.SessionLocal)
+    before = {name: stored(name) for name in ("users", "influencers")}
+    cached = response_cache.generations(("users", "influencers"))
+    response = client.post("/auth/signup", json={
+        "name": "Publisher", "email": "publisher@example.com", "password": "pw", "role": "influencer",
+    })
+    assert response.status_code == 200
+    response = client.post("/influencers/bulk", headers={"X-Ingest-Token": "test-ingest"},
+                           content='{"email": "publisher@example.com", "name": "Publisher", "tag": "music"}')
+    assert response.json()["failed"] == 0
+    assert stored("users") == before["users"] + 2
+    assert stored("influencers") == before["influencers"] + 1
+    # bumped once per write by the write itself, not again by the poll
+    assert response_cache.generations(("users", "influencers")) == (cached[0] + 2, cached[1] + 1)
+    assert generation_sync.poll(database.SessionLocal) == []
+
+def test_write_in_another_process_bumps_the_response_cache(client):
+    generation_sync.poll(database.SessionLocal)
+    cached = response_cache.generations(("brands",))
+    publish("brands")
+    assert generation_sync.poll(database.SessionLocal) == ["brands"]
+    assert response_cache.generations(("brands",)) == (cached[0] + 1,)
@@ -0,0 +1,57 @@
+# tests/test_leaderboard.py
+import pytest
+import database
+from models.influencer import Influencer
+from models.user import User
+from utils.leaderboard import TrendingLeaderboard
+
+@pytest.fixture
+def board(influencers, monkeypatch):
+    board = TrendingLeaderboard(k=5, refresh_seconds=300)
+    board.loads = []
+    load = board._load
+    def counted(db, key):
+        board.loads.append(key)
+        return load(db, key)
+    monkeypatch.setattr(board, "_load", counted)
+    return board
+
+def write_reach(db, influencer_id, reach):
+    """Commit a new reach and return the entry the write endpoints record."""
+    db.query(Influencer).filter(Influencer.id == influencer_id).update({"reach": reach})
+    db.commit()
+    infl, user = db.query(Influencer, User).join(User, Influencer.user_id == User.id) \
+        .filter(Influencer.id == influencer_id).one()
+    return TrendingLeaderboard.entry_for(infl, user)
+
+def from_sql(db, **filters):
+    return TrendingLeaderboard(k=5).top(db, limit=5, **filters)
+
+def test_update_within_a_truncated_bucket_is_applied_in_place(board):
+    with database.SessionLocal() as db:
+        top = board.top(db, limit=5)
+        board.top(db, tag="fitness", limit=5)
+        assert len(board.loads) == 2
+        assert db.query(Influencer).count() > board.k
+        # the second best overtakes the first, the last one moves up a place
+        board.record_entry(write_reach(db, top[1]["influencer_id"], top[0]["reach"] + 5))
+        board.record_entry(write_reach(db, top[4]["influencer_id"], top[3]["reach"] + 1))
+        assert board.top(db, limit=5) == from_sql(db)
+        assert board.top(db, tag="fitness", limit=5) == from_sql(db, tag="fitness")
+        assert len(board.loads) == 2
+
+def test_row_entering_a_truncated_bucket_pushes_the_last_one_out(board):
+    with database.SessionLocal() as db:
+        top = board.top(db, tag="fitness", limit=5)
+        outside = db.query(Influencer.id).join(User, Influencer.user_id == User.id) \
+            .filter(User.tag == "fitness", Influencer.id.notin_([e["influencer_id"] for e in top])).first()[0]
+        board.record_entry(write_reach(db, outside, top[0]["reach"] + 100))
+        assert board.top(db, tag="fitness", limit=5) == from_sql(db, tag="fitness")
+        assert len(board.loads) == 1
+
+def test_row_falling_out_of_a_truncated_bucket_reloads_it(board):
+    with database.SessionLocal() as db:
+        top = board.top(db, tag="fitness", limit=5)
+        board.record_entry(write_reach(db, top[0]["influencer_id"], 0))
+        assert board.top(db, tag="fitness", limit=5) == from_sql(db, tag="fitness")
+        assert len(board.loads) == 2
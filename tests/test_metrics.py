@@ -0,0 +1,45 @@
+# tests/test_metrics.py
+import re
+
+OPS = {"X-Ops-Token": "test-ops"}
+
+def _sample(client, name, route):
+    body = client.get("/metrics", headers=OPS).text
+    match = re.search(rf'^{name}\{{method="GET",route="{re.escape(route)}"\}} (\S+)$', body, re.M)
+    return float(match.group(1)) if match else 0.0
+
+def test_streamed_body_is_counted(client, influencers):
+    statements = _sample(client, "db_statements_total", "/influencers/filter")
+    rows = _sample(client, "db_rows_fetched_total", "/influencers/filter")
+    response = client.get("/influencers/filter", params={"stream": "true", "user_tag": "fitness"})
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == len(influencers)
+    # the rows are only fetched while the body is streamed
+    assert _sample(client, "db_statements_total", "/influencers/filter") > statements
+    assert _sample(client, "db_rows_fetched_total", "/influencers/filter") >= rows + len(influencers)
+
+def test_recorded_after_the_last_chunk():
+    import asyncio
+
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from fastapi.testclient import TestClient
+
+    from utils.metrics import Metrics, MetricsMiddleware, _current
+
+    registry = Metrics(enabled=True)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/slow")
+    def slow():
+        async def body():
+            for _ in range(3):
+                await asyncio.sleep(0.01)
+                _current.get().statements += 1
+                yield "x\n"
+        return StreamingResponse(body())
+
+    assert TestClient(app).get("/slow").text == "x\n" * 3
+    assert registry._db_statements[("GET", "/slow")] == 3
+    assert registry._requests[("GET", "/slow", 200)] == 1
@@ -0,0 +1,11 @@
+# tests/test_ops_token.py
+import pytest
+
+OPERATOR_ONLY = ["/metrics", "/auth/admission/stats", "/auth/jobs/stats", "/auth/read-routing/stats",
+                 "/influencers/facets/stats", "/brands/facets/stats"]
+
+@pytest.mark.parametrize("path", OPERATOR_ONLY)
+def test_operator_endpoints_need_the_ops_token(client, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"X-Ops-Token": "wrong"}).status_code == 401
+    assert client.get(path, headers={"X-Ops-Token": "test-ops"}).status_code == 200
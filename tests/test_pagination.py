@@ -0,0 +1,103 @@
+# tests/test_pagination.py
+import importlib
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+import database
+from models.influencer import Influencer
+from models.user import User
+from utils.pagination import decode_cursor, encode_cursor, keyset_page
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("0b7c6f1e-5a2d-4d0b-9a61-3f1f2b8d9c11")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == "0b7c6f1e-5a2d-4d0b-9a61-3f1f2b8d9c11"
+
+@pytest.mark.parametrize("cursor", [None, ""])
+def test_no_cursor_starts_at_the_beginning(cursor):
+    assert decode_cursor(cursor) is None
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "e30", "!!!!", encode_cursor("x")[:-3] + "@@@"])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor)
+    assert raised.value.status_code == 400
+    assert raised.value.detail == "Invalid cursor"
+
+def test_keyset_page_walks_every_row_once(influencers):
+    db = database.SessionLocal()
+    try:
+        q = db.query(Influencer, User).join(User, Influencer.user_id == User.id)
+        expected = sorted(str(infl.id) for infl, _ in q.all())
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(q, Influencer.id, cursor, 7)
+            assert len(rows) <= 7
+            seen.extend(str(infl.id) for infl, _ in rows)
+            if cursor is None:
+                break
+            assert len(rows) == 7
+        assert seen == expected
+    finally:
+        db.close()
+
+def test_keyset_page_with_key_function(influencers):
+    db = database.SessionLocal()
+    try:
+        q = db.query(Influencer.id, Influencer.reach).join(User, Influencer.user_id == User.id).filter(User.tag == "fitness")
+        rows, cursor = keyset_page(q, Influencer.id, None, 10, key=lambda row: str(row.id))
+        assert decode_cursor(cursor) == str(rows[-1].id)
+        rest, _ = keyset_page(q, Influencer.id, cursor, 100, key=lambda row: str(row.id))
+        assert len(rows) + len(rest) == len(influencers)
+        assert str(rest[0].id) > str(rows[-1].id)
+    finally:
+        db.close()
+
+def test_last_page_has_no_cursor(influencers):
+    db = database.SessionLocal()
+    try:
+        q = db.query(Influencer).join(User, Influencer.user_id == User.id).filter(User.tag == "fitness")
+        rows, cursor = keyset_page(q, Influencer.id, None, len(influencers))
+        assert len(rows) == len(influencers)
+        assert cursor is None
+    finally:
+        db.close()
+
+def test_filter_endpoint_pages_with_the_next_cursor_header(client, influencers):
+    names, cursor = [], None
+    while True:
+        params = {"limit": 10, "user_tag": "fitness", **({"cursor": cursor} if cursor else {})}
+        response = client.get("/influencers/filter", params=params)
+        assert response.status_code == 200
+        names.extend(row["user_name"] for row in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert sorted(names) == sorted(f"Influencer {i}" for i in range(len(influencers)))
+
+@pytest.mark.parametrize("path", ["/influencers/filter", "/brands/filter"])
+def test_filter_endpoint_rejects_an_invalid_cursor(client, path):
+    response = client.get(path, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+@pytest.mark.parametrize("path, router", [("/influencers/filter", "routers.influencer_router"),
+                                          ("/brands/filter", "routers.brand_router")])
+def test_stream_session_is_closed_when_the_query_fails(client, monkeypatch, path, router):
+    opened = []
+
+    class TrackedSession(Session):
+        closed = False
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    monkeypatch.setattr(importlib.import_module(router), "Session", TrackedSession)
+    response = client.get(path, params={"stream": "true", "near": "no such place"})
+    assert response.status_code == 422
+    assert len(opened) == 1 and opened[0].closed
@@ -0,0 +1,145 @@
+# tests/test_read_routing.py
+import os
+import pytest
+from sqlalchemy import create_engine
+import database
+import routers.dependencies
+from models.user import User
+from utils.migrations import migrate
+from utils.read_routing import ReadRouter
+from utils.token_utils import create_access_token
+
+def bearer(user_id: str) -> str:
+    return f"Bearer {create_access_token(user_id, 'brand')}"
+
+@pytest.fixture
+def replica_url(data_dir):
+    """An empty, migrated replica, so reads served by it find no influencers."""
+    path = os.path.join(data_dir, "replica.db")
+    if os.path.exists(path):
+        os.remove(path)
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    migrate(engine, log=None)
+    engine.dispose()
+    return url
+
+@pytest.fixture
+def make_router():
+    routers = []
+    def make(urls, **options):
+        options.setdefault("health_interval", 0)
+        router = ReadRouter(urls, **options)
+        routers.append(router)
+        return router
+    yield make
+    for router in routers:
+        router.stop()
+
+def unreachable(data_dir):
+    return f"sqlite:///{os.path.join(data_dir, 'missing', 'replica.db')}"
+
+def test_without_replicas_everything_reads_the_primary(make_router):
+    router = make_router([])
+    router.wrote("user-1")
+    assert not router.enabled
+    assert router.choose(bearer("user-1")) is None
+    assert router.stats()["pinned_users"] == 0
+
+def test_writer_is_pinned_to_the_primary(make_router, replica_url):
+    router = make_router([replica_url])
+    router.wrote("writer")
+    assert router.pinned(bearer("writer"))
+    assert router.choose(bearer("writer")) is None
+    assert router.pinned_reads == 1
+    # other callers, and anonymous ones, still go to the replica
+    assert router.choose(bearer("someone-else")) is router.replicas[0]
+    assert router.choose(None) is router.replicas[0]
+    assert router.replicas[0].reads == 2
+
+@pytest.mark.parametrize("authorization", [None, "", "Bearer", "Bearer not-a-jwt", "Basic a b"])
+def test_malformed_authorization_is_not_pinned(make_router, replica_url, authorization):
+    router = make_router([replica_url])
+    router.wrote("writer")
+    assert not router.pinned(authorization)
+
+def test_pin_expires_after_the_window(make_router, replica_url, monkeypatch):
+    router = make_router([replica_url], sticky_seconds=5)
+    clock = [1000.0]
+    monkeypatch.setattr("utils.read_routing.time.monotonic", lambda: clock[0])
+    router.wrote("writer")
+    clock[0] += 4.9
+    assert router.choose(bearer("writer")) is None
+    clock[0] += 0.2
+    assert router.choose(bearer("writer")) is router.replicas[0]
+    assert router.stats()["pinned_users"] == 0
+
+def test_zero_window_disables_pinning(make_router, replica_url):
+    router = make_router([replica_url], sticky_seconds=0)
+    router.wrote("writer")
+    assert router.settle_seconds == 0
+    assert router.choose(bearer("writer")) is router.replicas[0]
+
+def test_unhealthy_replica_leaves_the_rotation(make_router, replica_url, data_dir):
+    router = make_router([unreachable(data_dir), replica_url])
+    assert router.check() == 1
+    down, up = router.replicas
+    assert not down.healthy and down.error
+    assert all(router.choose() is up for _ in range(4))
+    assert down.reads == 0
+
+def test_falls_back_to_the_primary_when_no_replica_is_healthy(make_router, data_dir):
+    router = make_router([unreachable(data_dir)])
+    router.start()
+    assert not router.replicas[0].healthy
+    assert router.choose() is None
+    assert router.fallback_reads == 1
+
+def test_replica_returns_after_a_good_probe(make_router, replica_url):
+    router = make_router([replica_url])
+    replica = router.replicas[0]
+    replica.mark_down("disconnect: OperationalError")
+    assert router.choose() is None
+    assert replica.probe(router.max_lag)
+    assert replica.error is None
+    assert router.choose() is replica
+    assert replica.failures == 1
+
+def test_round_robin_alternates(make_router, replica_url):
+    router = make_router([replica_url, replica_url])
+    chosen = [router.choose() for _ in range(4)]
+    assert chosen == router.replicas * 2
+
+def test_least_connections_prefers_the_idle_replica(make_router, replica_url):
+    router = make_router([replica_url, replica_url], policy="least_connections")
+    busy, idle = router.replicas
+    with busy.engine.connect():
+        assert busy.connections == 1
+        assert [router.choose() for _ in range(3)] == [idle] * 3
+    assert busy.connections == 0
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(RuntimeError):
+        ReadRouter([], policy="random")
+
+def test_filter_endpoint_follows_the_router(client, influencers, make_router, replica_url, data_dir, monkeypatch):
+    router = make_router([replica_url])
+    monkeypatch.setattr(routers.dependencies, "read_router", router)
+    with database.SessionLocal() as db:
+        writer_id = str(db.query(User.id).filter(User.email == influencers[0]).scalar())
+
+    def count(authorization=None):
+        headers = {"Authorization": authorization} if authorization else {}
+        response = client.get("/influencers/filter", params={"user_tag": "fitness", "limit": 1000}, headers=headers)
+        assert response.status_code == 200
+        return len(response.json())
+
+    # the replica is empty, so a read served by it finds nothing
+    assert count() == 0
+    router.wrote(writer_id)
+    assert count(bearer(writer_id)) == len(influencers)
+    assert count(bearer("someone-else")) == 0
+
+    router.replicas[0].mark_down("disconnect: OperationalError")
+    assert count() == len(influencers)
+    assert router.fallback_reads == 1
@@ -0,0 +1,273 @@
+# utils/admission.py
+"""Admission control: per-route-class concurrency limits with load shedding,
+and a per-client token bucket on login.
+
+Every request is assigned a route class (``route_class``). A class admits
+at most ``concurrency`` requests at once; further requests wait in a FIFO
+queue of at most ``queue`` entries for up to ``timeout`` seconds. A request
+that finds the queue full, or is still waiting at its deadline, is answered
+``503`` with a ``Retry-After`` estimated from the class's recent service
+time and queue depth. A burst on one class therefore queues and sheds
+within that class instead of taking the threadpool and the connection pool
+away from the others. The defaults add up to fewer requests than the 40
+threads of the sync routers' threadpool. Routes outside every class (stats,
+``/metrics``) are not limited.
+
+``ADMISSION_LIMITS`` overrides classes as ``class=concurrency:queue:timeout``
+pairs, e.g. ``search=32:128:1.5,bulk=1:0:0``.
+
+``POST /auth/login`` is additionally limited per client address to
+``LOGIN_RATE_PER_MINUTE`` attempts with bursts of ``LOGIN_BURST``; excess
+attempts get ``429`` with ``Retry-After``. Behind a proxy every client
+shares the proxy's address unless uvicorn is run with ``--proxy-headers``.
+
+Limits, queues and buckets are per process.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Dict, Optional, Tuple
+from starlette.responses import JSONResponse
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+LOGIN_RATE_PER_MINUTE = float(os.getenv("LOGIN_RATE_PER_MINUTE", "10"))
+LOGIN_BURST = int(os.getenv("LOGIN_BURST", "5"))
+# client addresses whose buckets are kept; the least recently seen are dropped
+LOGIN_BUCKETS = 100000
+# weight of the latest request in the per-class service time average
+SERVICE_TIME_WEIGHT = 0.1
+
+# class -> (concurrency, queue, timeout seconds)
+DEFAULT_LIMITS: Dict[str, Tuple[int, int, float]] = {
+    "search": (16, 64, 2.0),
+    "write": (8, 32, 2.0),
+    "auth": (8, 32, 2.0),
+    "bulk": (2, 2, 5.0),
+}
+SEARCH_PATHS = frozenset((
+    "/influencers/filter", "/influencers/facets", "/influencers/suggestions",
+    "/brands/filter", "/brands/facets", "/brands/trending", "/brands/suggestions",
+))
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """The admission class of a request, or ``None`` for unlimited routes."""
+    if path in ("/auth/login", "/auth/signup"):
+        return "auth"
+    if method == "POST" and path.endswith("/bulk"):
+        return "bulk"
+    if path in SEARCH_PATHS:
+        return "search"
+    if (method in ("PUT", "PATCH") and path.endswith("/update")) or (method == "POST" and path.endswith("/verify-reach")):
+        return "write"
+    return None
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, int, float]]:
+    """``DEFAULT_LIMITS`` with the classes named in ``spec`` replaced."""
+    limits = dict(DEFAULT_LIMITS)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            name, values = item.split("=")
+            concurrency, queue, timeout = values.split(":")
+            limits[name.strip()] = (int(concurrency), int(queue), float(timeout))
+        except ValueError:
+            raise RuntimeError(f"ADMISSION_LIMITS: expected class=concurrency:queue:timeout, got {item!r}")
+    unknown = set(limits) - set(DEFAULT_LIMITS)
+    if unknown:
+        raise RuntimeError(f"ADMISSION_LIMITS: unknown classes {', '.join(sorted(unknown))}")
+    return limits
+
+class Shed(Exception):
+    """Raised by ``ConcurrencyLimit.acquire`` when a request is not admitted."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class ConcurrencyLimit:
+    """Slots and bounded FIFO wait queue of one route class. Used from the
+    event loop only, so it needs no lock."""
+
+    def __init__(self, name: str, concurrency: int, queue: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: deque = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.shed = Counter()
+        self.service_time = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request has likely drained."""
+        return max(1, math.ceil(self.service_time * (self.waiting + 1) / max(self.concurrency, 1)))
+
+    def _reject(self, reason: str):
+        self.shed[reason] += 1
+        return Shed(reason, self.retry_after())
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in the queue if needed; raises ``Shed``."""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if self.waiting >= self.queue:
+            raise self._reject("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.waiting)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just as the wait ended
+                if isinstance(e, asyncio.CancelledError):
+                    self.release()
+                    raise
+                self.admitted += 1
+                return
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject("timeout")
+        self.admitted += 1
+
+    def release(self, elapsed: Optional[float] = None) -> None:
+        """Free a slot, handing it to the oldest waiter still waiting."""
+        if elapsed is not None:
+            self.service_time += SERVICE_TIME_WEIGHT * (elapsed - self.service_time)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {"concurrency": self.concurrency, "queue": self.queue, "timeout": self.timeout,
+                "active": self.active, "waiting": self.waiting, "max_waiting": self.max_queued,
+                "admitted": self.admitted, "queued": self.queued, "shed": dict(self.shed),
+                "service_time_ms": round(self.service_time * 1000, 2)}
+
+class TokenBuckets:
+    """Per-key token buckets holding up to ``burst`` tokens, refilled at
+    ``rate_per_minute``. A rate of 0 disables them."""
+
+    def __init__(self, rate_per_minute: float = LOGIN_RATE_PER_MINUTE, burst: int = LOGIN_BURST,
+                 max_keys: int = LOGIN_BUCKETS):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def take(self, key: str) -> float:
+        """Spend one token of ``key``; returns 0 when allowed, else the
+        seconds until a token is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+            self.allowed += 1
+        else:
+            wait = (1 - tokens) / self.rate
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "rate_per_minute": self.rate * 60, "burst": self.burst,
+                "clients": len(self._buckets), "allowed": self.allowed, "limited": self.limited}
+
+class AdmissionControl:
+    """Route-class limits plus the login buckets; see the module docstring."""
+
+    def __init__(self, enabled: bool = ADMISSION_ENABLED, limits: Optional[Dict[str, tuple]] = None,
+                 login: Optional[TokenBuckets] = None):
+        self.enabled = enabled
+        if limits is None:
+            limits = parse_limits(os.getenv("ADMISSION_LIMITS", ""))
+        self.limits = {name: ConcurrencyLimit(name, *values) for name, values in limits.items()}
+        self.login = login if login is not None else TokenBuckets()
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "classes": {name: lim.stats() for name, lim in self.limits.items()},
+                "login": self.login.stats()}
+
+    def collect(self) -> list:
+        """``metrics.add_collector`` hook."""
+        if not self.enabled:
+            return []
+        limits = sorted(self.limits.items())
+        return [
+            ("admission_active", "gauge", "Requests holding a slot, by route class.",
+             [({"class": name}, lim.active) for name, lim in limits]),
+            ("admission_waiting", "gauge", "Requests waiting for a slot, by route class.",
+             [({"class": name}, lim.waiting) for name, lim in limits]),
+            ("admission_shed_total", "counter", "Requests answered 503 without running, by route class and reason.",
+             [({"class": name, "reason": reason}, lim.shed[reason])
+              for name, lim in limits for reason in ("queue_full", "timeout")]),
+            ("login_rate_limited_total", "counter", "Login attempts answered 429 by the per-client buckets.",
+             [({}, self.login.limited)]),
+        ]
+
+admission = AdmissionControl()
+
+class AdmissionMiddleware:
+    """ASGI middleware applying ``admission``. It wraps the app directly
+    rather than through ``call_next`` so a slot is held until the whole
+    response, including a streamed body, has been sent."""
+
+    def __init__(self, app, control: AdmissionControl = admission):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.control.enabled:
+            return await self.app(scope, receive, send)
+        method, path = scope["method"], scope["path"]
+        if path == "/auth/login" and method == "POST" and self.control.login.enabled:
+            client = scope.get("client")
+            wait = self.control.login.take(client[0] if client else "")
+            if wait:
+                response = JSONResponse({"detail": "Too many login attempts, retry later"}, status_code=429,
+                                        headers={"Retry-After": str(math.ceil(wait))})
+                return await response(scope, receive, send)
+        name = route_class(method, path)
+        limit = self.control.limits.get(name) if name else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+        try:
+            await limit.acquire()
+        except Shed as e:
+            response = JSONResponse({"detail": "Server busy, retry shortly"}, status_code=503,
+                                    headers={"Retry-After": str(e.retry_after)})
+            return await response(scope, receive, send)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release(time.perf_counter() - started)
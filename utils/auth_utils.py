@@ -1,8 +1,23 @@
 # utils/auth_utils.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "64"))
+# "thread" works because bcrypt releases the GIL while hashing; "process"
+# isolates the work completely at the cost of pickling each call.
+PASSWORD_HASH_MODE = os.getenv("PASSWORD_HASH_MODE", "thread")
+PASSWORD_REHASH_ON_LOGIN = os.getenv("PASSWORD_REHASH_ON_LOGIN", "false").lower() in ("1", "true", "yes")
 
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -10,3 +25,105 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
     except Exception:
         return False
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when ``hashed_password`` was made with a cost other than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+def _timed(fn, args, submitted_at):
+    # module level so it can be pickled into a process pool
+    started_at = time.time()
+    result = fn(*args)
+    return result, started_at - submitted_at, time.time() - started_at
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+class PasswordHasher:
+    """Bounded executor for bcrypt so hashing never runs on a request worker.
+
+    At most ``queue_depth`` calls may be waiting or running at once; further
+    calls fail immediately with ``PasswordHasherBusy`` instead of queueing.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_depth: int = PASSWORD_HASH_QUEUE,
+                 mode: str = PASSWORD_HASH_MODE):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.mode = mode
+        self._slots = threading.BoundedSemaphore(queue_depth)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "in_flight": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+        }
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise PasswordHasherBusy()
+        with self._lock:
+            self._stats["in_flight"] += 1
+        future = self._get_executor().submit(_timed, fn, args, time.time())
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        self._slots.release()
+        with self._lock:
+            self._stats["in_flight"] -= 1
+            if future.exception() is None:
+                _, waited, took = future.result()
+                self._stats["completed"] += 1
+                self._stats["queue_wait_seconds_total"] += waited
+                self._stats["queue_wait_seconds_max"] = max(self._stats["queue_wait_seconds_max"], waited)
+                self._stats["hash_seconds_total"] += took
+                self._stats["hash_seconds_max"] = max(self._stats["hash_seconds_max"], took)
+
+    def hash(self, password: str) -> str:
+        return self._submit(hash_password, password).result()[0]
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._submit(verify_password, password, hashed).result()[0]
+
+    def hash_many(self, passwords) -> list:
+        """Hash a batch in waves of ``workers`` so a bulk job never holds more
+        than one wave of queue slots and interactive logins still get through."""
+        hashes = []
+        for i in range(0, len(passwords), self.workers):
+            futures = [self._submit(hash_password, p) for p in passwords[i:i + self.workers]]
+            hashes.extend(f.result()[0] for f in futures)
+        return hashes
+
+    async def hash_async(self, password: str) -> str:
+        return (await asyncio.wrap_future(self._submit(hash_password, password)))[0]
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return (await asyncio.wrap_future(self._submit(verify_password, password, hashed)))[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        out.update(workers=self.workers, queue_depth=self.queue_depth, mode=self.mode)
+        return out
+
+password_hasher = PasswordHasher()
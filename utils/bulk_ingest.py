@@ -0,0 +1,271 @@
+# utils/bulk_ingest.py
+"""Chunked NDJSON/CSV ingestion behind ``POST /influencers/bulk`` and
+``POST /brands/bulk``.
+
+Rows are read from the request body as it arrives, validated with the bulk
+row schemas and written ``BULK_CHUNK_SIZE`` at a time: one multi-row upsert
+into ``users`` (keyed by email) and one into the profile table (keyed by
+``user_id``), committed together. A row's ``None`` fields keep the stored
+value, mirroring the PUT update endpoints. Failures are reported per row.
+
+A record (an NDJSON line, or a CSV record with its quoted line breaks) is
+buffered whole, so one longer than ``BULK_MAX_RECORD_BYTES`` is reported as
+a failed row and skipped instead of growing in memory; an unterminated CSV
+quote would otherwise swallow the rest of the upload.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+from pydantic import ValidationError
+from sqlalchemy import select
+from models.brand import Brand
+from models.influencer import Influencer
+from models.keys import new_id
+from models.user import User
+from schemas.brand_schema import BrandBulkRow
+from schemas.influencer_schema import InfluencerBulkRow
+from schemas.user_schema import BulkReport, BulkRowError
+from utils.auth_utils import password_hasher
+from utils.event_index import index_events
+from utils.facets import brand_facets, influencer_facets
+from utils.generations import generation_sync
+from utils.geo import FIELDS as GEO_FIELDS, index_locations
+from utils.influencer_index import influencer_index
+from utils.leaderboard import leaderboard
+from utils.principal_cache import principal_cache
+from utils.read_model import project
+from utils.response_cache import response_cache
+from utils.search_index import FIELDS, index_values
+from utils.upsert import upsert
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+BULK_MAX_RECORD_BYTES = int(os.getenv("BULK_MAX_RECORD_BYTES", str(64 * 1024)))
+# stored for users created without a password; bcrypt can never match it
+UNUSABLE_PASSWORD = "!"
+
+# role -> (row schema, profile model, profile columns taken from the row)
+SPECS = {
+    "influencer": (InfluencerBulkRow, Influencer, ("reach", "verified", "email")),
+    "brand": (BrandBulkRow, Brand, ("name", "email", "phone_number", "tag", "location", "event_start", "event_end")),
+}
+PROFILE_DEFAULTS = {"reach": 0, "verified": False}
+
+class ParseError(str):
+    """Stands in for a record that could not be decoded."""
+
+async def _iter_lines(request, limit: int):
+    """Yield the decoded lines of the body; ``None`` stands in for a line
+    longer than ``limit`` bytes, whose bytes are dropped as they arrive."""
+    buffer = b""
+    skipping = False
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if skipping:
+                # the rest of an oversized line
+                skipping = False
+                continue
+            yield None if len(line) > limit else line.decode("utf-8", errors="replace").rstrip("\r")
+        if len(buffer) > limit:
+            if not skipping:
+                yield None
+            skipping, buffer = True, b""
+    if buffer and not skipping:
+        yield buffer.decode("utf-8", errors="replace").rstrip("\r")
+
+async def iter_records(request, limit: int = BULK_MAX_RECORD_BYTES):
+    """Yield ``(row_number, dict | ParseError)`` from an NDJSON or CSV body."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    is_csv = content_type in ("text/csv", "application/csv")
+    too_long = ParseError(f"record longer than {limit} bytes")
+    header = None
+    pending = ""
+    row_no = 0
+    async for line in _iter_lines(request, limit):
+        if line is None:
+            if is_csv and header is None:
+                row_no += 1
+                yield row_no, ParseError(f"header longer than {limit} bytes")
+                return
+            # a CSV record in progress ends here too
+            pending = ""
+            row_no += 1
+            yield row_no, too_long
+            continue
+        if is_csv:
+            pending += line
+            if pending.count('"') % 2:
+                if len(pending.encode("utf-8")) > limit:
+                    # most likely an unterminated quote: drop it and resume at the next line
+                    pending = ""
+                    row_no += 1
+                    yield row_no, too_long
+                    continue
+                # quoted field continues on the next line
+                pending += "\n"
+                continue
+            record, pending = next(csv.reader([pending]), []), ""
+            if header is None:
+                header = [h.strip() for h in record]
+                continue
+            if not any(record):
+                continue
+            row_no += 1
+            yield row_no, {k: (v if v != "" else None) for k, v in zip(header, record)}
+        else:
+            if not line.strip():
+                continue
+            row_no += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_no, ParseError(f"invalid JSON: {e}")
+                continue
+            yield row_no, record if isinstance(record, dict) else ParseError("expected a JSON object")
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors())
+
+def ingest_chunk(db, role: str, records, report: BulkReport) -> None:
+    """Validate and upsert one chunk of ``(row_number, record)`` pairs."""
+    schema, model, profile_cols = SPECS[role]
+    valid = {}
+    for row_no, record in records:
+        report.processed += 1
+        if isinstance(record, ParseError):
+            report.errors.append(BulkRowError(row=row_no, error=record))
+            continue
+        try:
+            row = schema.model_validate(record)
+        except ValidationError as e:
+            report.errors.append(BulkRowError(row=row_no, error=_describe(e)))
+            continue
+        if row.email in valid:
+            report.errors.append(BulkRowError(row=valid[row.email][0], error=f"superseded by row {row_no} with the same email"))
+        valid[row.email] = (row_no, row)
+
+    existing = {
+        email: (user_id, user_role)
+        for user_id, email, user_role in db.execute(
+            select(User.id, User.email, User.role).where(User.email.in_(list(valid)))
+        )
+    }
+    for email, (user_id, user_role) in existing.items():
+        if user_role != role:
+            row_no, _ = valid.pop(email)
+            report.errors.append(BulkRowError(row=row_no, error=f"email is registered to a user with role {user_role!r}"))
+    if not valid:
+        return
+
+    try:
+        with_password = [e for e in valid if e not in existing and valid[e][1].password]
+        hashes = dict(zip(with_password, password_hasher.hash_many([valid[e][1].password for e in with_password])))
+
+        now = datetime.utcnow()
+        user_rows = []
+        for email, (row_no, row) in valid.items():
+            user_rows.append({
+                "id": existing[email][0] if email in existing else new_id(),
+                "name": row.name,
+                "email": email,
+                "password_hash": hashes.get(email, UNUSABLE_PASSWORD),
+                "tag": row.tag,
+                "location": row.location,
+                "role": role,
+                "created_at": now,
+            })
+        # a user of another role keeps its row untouched
+        upsert(db, User, user_rows, ["email"], ["name", "tag", "location"], coalesce_cols=["tag", "location"],
+               update_if={"role": role})
+        # check the roles again under the row locks: a concurrent chunk may have
+        # created one of the new emails with another role since ``existing`` was read
+        generated = {r["email"]: r["id"] for r in user_rows}
+        stored = {
+            email: (user_id, user_role)
+            for user_id, email, user_role in db.execute(
+                select(User.id, User.email, User.role).where(User.email.in_(list(valid))).with_for_update()
+            )
+        }
+        for email, (user_id, user_role) in stored.items():
+            if user_role != role:
+                row_no, _ = valid.pop(email)
+                report.errors.append(BulkRowError(row=row_no, error=f"email is registered to a user with role {user_role!r}"))
+        # created by this chunk; a same-role concurrent insert counts as an update
+        new_emails = [e for e in valid if e not in existing and stored[e][0] == generated[e]]
+
+        # users who signed up without a profile get the defaults too
+        with_profile = set(db.execute(
+            select(model.user_id).where(model.user_id.in_([stored[e][0] for e in valid]))
+        ).scalars())
+        profile_rows = []
+        for email, (row_no, row) in valid.items():
+            is_new = stored[email][0] not in with_profile
+            fields = row.model_dump(include=set(profile_cols), exclude_unset=True)
+            profile = {"id": new_id(), "user_id": stored[email][0]}
+            for col in profile_cols:
+                value = fields.get(col)
+                if value is None and is_new:
+                    value = PROFILE_DEFAULTS.get(col)
+                profile[col] = value
+            profile_rows.append(profile)
+        upsert(db, model, profile_rows, ["user_id"], profile_cols, coalesce_cols=profile_cols)
+
+        user_ids = [r["user_id"] for r in profile_rows]
+        written = db.query(model, User).join(User, model.user_id == User.id).filter(User.id.in_(user_ids)).all()
+        for field, (indexed_model, attr) in FIELDS.items():
+            position = 0 if indexed_model is model else 1 if indexed_model is User else None
+            if position is not None:
+                index_values(db, field, [(pair[position].id, getattr(pair[position], attr)) for pair in written])
+        points = []
+        for field, (indexed_model, attr) in GEO_FIELDS.items():
+            position = 0 if indexed_model is model else 1 if indexed_model is User else None
+            if position is not None:
+                points.extend((field, pair[position].id, getattr(pair[position], attr)) for pair in written)
+        index_locations(db, points)
+        if model is Brand:
+            index_events(db, [(brand.id, brand.event_start, brand.event_end) for brand, _ in written])
+        project(db, model, user_ids)
+        # snapshot before commit expires the loaded rows
+        entries = [leaderboard.entry_for(infl, user) for infl, user in written] if model is Influencer else []
+        index_rows = [influencer_index.row_for(infl, user) for infl, user in written] \
+            if model is Influencer and influencer_index.enabled else []
+        facets = influencer_facets if model is Influencer else brand_facets
+        facet_rows = [(profile.id, facets.key_for(profile, user)) for profile, user in written]
+        published = generation_sync.publish(db, User.__tablename__, model.__tablename__)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        for row_no, _ in valid.values():
+            report.errors.append(BulkRowError(row=row_no, error=f"chunk not written: {e.__class__.__name__}"))
+        return
+
+    for email in valid:
+        if email in existing:
+            principal_cache.invalidate_user(existing[email][0])
+    for entry in entries:
+        leaderboard.record_entry(entry)
+    influencer_index.record_rows(index_rows)
+    facets.record_rows(facet_rows)
+    response_cache.bump(User.__tablename__, model.__tablename__)
+    generation_sync.seen(published)
+    report.created += len(new_emails)
+    report.updated += len(valid) - len(new_emails)
+
+async def ingest(request, role: str, run_chunk) -> BulkReport:
+    """Drive ``run_chunk(role, records, report)`` over the request body in
+    chunks of ``BULK_CHUNK_SIZE``; ``run_chunk`` is awaited so callers can
+    push the database work off the event loop."""
+    report = BulkReport()
+    chunk = []
+    async for item in iter_records(request):
+        chunk.append(item)
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await run_chunk(role, chunk, report)
+            chunk = []
+    if chunk:
+        await run_chunk(role, chunk, report)
+    report.failed = len(report.errors)
+    report.errors.sort(key=lambda e: e.row)
+    return report
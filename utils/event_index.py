@@ -0,0 +1,126 @@
+# utils/event_index.py
+"""Calendar-bucket index behind the brand event-window filters.
+
+An event window ``[event_start, event_end]`` is stored in the
+``brand_event_buckets`` side table as one row per ``EVENT_BUCKET_DAYS``-day
+bucket it touches; windows spanning more than ``MAX_EVENT_BUCKETS`` buckets
+get a single row in ``LONG_BUCKET`` instead. A window can only overlap
+``[date_from, date_to]`` if it shares a bucket with it, so ``overlapping``
+looks the candidates up through the table's primary key (the query range's
+buckets plus ``LONG_BUCKET``) and the exact ``event_start <= date_to AND
+event_end >= date_from`` test runs only on them. The cost follows the
+number of events near the range rather than the size of ``brands``, which
+matters once past campaigns accumulate and any one window holds a small
+share of them.
+
+The table is written in the same transaction as the brand row. Run
+``python -m utils.event_index`` once to backfill existing data before setting
+``EVENT_INDEX_ENABLED=true``.
+"""
+import os
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import delete, func, insert, or_, select
+from models.brand import Brand
+from models.brand_event import BrandEventBucket
+
+EVENT_INDEX_ENABLED = os.getenv("EVENT_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+EVENT_BUCKET_DAYS = int(os.getenv("EVENT_BUCKET_DAYS", "7"))
+MAX_EVENT_BUCKETS = 16
+LONG_BUCKET = -1
+# query ranges wider than this read most of the table anyway; scan instead
+MAX_PROBE_BUCKETS = 104
+# windows with more bucket rows than this are served by scanning
+CANDIDATE_CAP = 5000
+
+def bucket(day: date) -> int:
+    return day.toordinal() // EVENT_BUCKET_DAYS
+
+def buckets(start: Optional[date], end: Optional[date]) -> List[int]:
+    """Buckets of an event window; none unless both ends are set and ordered,
+    since the filters never match such rows."""
+    if start is None or end is None or end < start:
+        return []
+    first, last = bucket(start), bucket(end)
+    if last - first + 1 > MAX_EVENT_BUCKETS:
+        return [LONG_BUCKET]
+    return list(range(first, last + 1))
+
+def index_events(db, items) -> None:
+    """Rewrite the buckets of ``(brand_id, event_start, event_end)`` triples
+    with one ``DELETE`` and one ``INSERT``; call before ``commit``."""
+    items = list(items)
+    if not items:
+        return
+    db.execute(delete(BrandEventBucket).where(
+        BrandEventBucket.brand_id.in_([brand_id for brand_id, _, _ in items])
+    ))
+    rows = [{"bucket": b, "brand_id": brand_id} for brand_id, start, end in items for b in buckets(start, end)]
+    if rows:
+        db.execute(insert(BrandEventBucket), rows)
+
+def _bucket_rows(db, in_range) -> int:
+    """Bucket rows of a window, capped at ``CANDIDATE_CAP`` so the count stays
+    a short index range scan."""
+    capped = select(BrandEventBucket.brand_id).where(in_range).limit(CANDIDATE_CAP).subquery()
+    return db.execute(select(func.count()).select_from(capped)).scalar()
+
+def overlapping(q, date_from: Optional[date], date_to: Optional[date], columns: Optional[dict] = None):
+    """Restrict ``q`` to brands whose event window overlaps ``[date_from, date_to]``.
+
+    Either end may be ``None`` for an open range. Only closed ranges with
+    fewer than ``CANDIDATE_CAP`` bucket rows are narrowed through the bucket
+    table; wider or busier windows match densely enough that the plain scan
+    is faster. ``columns`` maps ``brand_id``, ``event_start`` and
+    ``event_end`` to the columns of ``q``, those of ``brands`` by default.
+    """
+    if columns is None:
+        columns = {"brand_id": Brand.id, "event_start": Brand.event_start, "event_end": Brand.event_end}
+    if date_from is not None:
+        q = q.filter(columns["event_end"] >= date_from)
+    if date_to is not None:
+        q = q.filter(columns["event_start"] <= date_to)
+    if not EVENT_INDEX_ENABLED or date_from is None or date_to is None:
+        # an open range matches every past or every future event: scanning is cheaper
+        return q
+    first, last = bucket(date_from), bucket(date_to)
+    if last - first + 1 > MAX_PROBE_BUCKETS:
+        return q
+    in_range = or_(BrandEventBucket.bucket.between(first, last), BrandEventBucket.bucket == LONG_BUCKET)
+    if _bucket_rows(q.session, in_range) >= CANDIDATE_CAP:
+        # a busy window matches densely: the id-ordered scan fills a page
+        # sooner than random lookups of every candidate
+        return q
+    return q.filter(columns["brand_id"].in_(select(BrandEventBucket.brand_id).where(in_range)))
+
+def rebuild(db, batch_size: int = 5000) -> int:
+    """Recreate the whole index from ``brands``. Returns rows written."""
+    db.execute(delete(BrandEventBucket))
+    written = 0
+    last_id = ""
+    while True:
+        rows = db.execute(
+            select(Brand.id, Brand.event_start, Brand.event_end)
+            .where(Brand.id > last_id)
+            .order_by(Brand.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        batch = [{"bucket": b, "brand_id": brand_id} for brand_id, start, end in rows for b in buckets(start, end)]
+        if batch:
+            db.execute(insert(BrandEventBucket), batch)
+            written += len(batch)
+        last_id = rows[-1][0]
+    db.commit()
+    return written
+
+if __name__ == "__main__":
+    from database import SessionLocal, engine
+    from utils.migrations import check
+    check(engine)
+    session = SessionLocal()
+    try:
+        print(f"indexed {rebuild(session)} event bucket rows")
+    finally:
+        session.close()
@@ -0,0 +1,207 @@
+# utils/facets.py
+"""Facet counts behind ``/influencers/facets`` and ``/brands/facets``.
+
+``FacetCounts`` keeps the number of profiles per combination of a few
+low-cardinality dimensions (tag, location, role, verified), plus the
+combination each profile is in, so a write moves one profile from its old
+combination to its new one without reading anything. A request whose
+filters are all equality tests on those dimensions, including the
+unfiltered case, is answered by summing the matching combinations, which
+are a few hundred at most whatever the table size. Any other filter
+(substrings, reach, event dates) falls back to one ``GROUP BY`` over the
+filtered query.
+
+Counts are loaded with one joined query on first use and reloaded after
+``FACETS_REFRESH_SECONDS`` so writes handled by other workers show up, or on
+first use after ``expire``. The per-profile map costs roughly 150 bytes per
+row.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from models.brand import Brand
+from models.influencer import Influencer
+from models.user import User
+
+FACETS_ENABLED = os.getenv("FACETS_ENABLED", "true").lower() in ("1", "true", "yes")
+FACETS_REFRESH_SECONDS = float(os.getenv("FACETS_REFRESH_SECONDS", "300"))
+
+def _order(item):
+    value, count = item
+    return (-count, value is None, str(value))
+
+def summarize(facets: Tuple[str, ...], combos) -> dict:
+    """Fold ``(values, count)`` pairs, values in ``facets`` order, into the response."""
+    totals = {name: Counter() for name in facets}
+    total = 0
+    for values, count in combos:
+        total += count
+        for name, value in zip(facets, values):
+            totals[name][value] += count
+    return {
+        "total": total,
+        "facets": {
+            name: [{"value": v, "count": n} for v, n in sorted(totals[name].items(), key=_order)]
+            for name in facets
+        },
+    }
+
+class FacetCounts:
+    """Profile counts per combination of ``dimensions`` for one profile table.
+
+    ``dimensions`` maps filter parameter names to columns; ``facets`` names
+    the dimensions that are reported, the others only narrow.
+    """
+
+    def __init__(self, model, dimensions: Dict[str, object], facets: Tuple[str, ...],
+                 enabled: bool = FACETS_ENABLED, refresh_seconds: float = FACETS_REFRESH_SECONDS):
+        self.model = model
+        self.dimensions = dimensions
+        self.facets = facets
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self._names = tuple(dimensions)
+        self._positions = tuple(self._names.index(name) for name in facets)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._counts: Optional[Counter] = None
+        self._rows: Dict[str, tuple] = {}
+        self._interned: Dict[tuple, tuple] = {}
+        self._loaded_at = 0.0
+        self._expired_at = float("-inf")
+        # writes seen while a reload runs, replayed onto its result
+        self._journal: Optional[list] = None
+
+    def key_for(self, profile, user) -> tuple:
+        """Dimension values of a profile row and its user (anything with the
+        user's attributes, e.g. a principal)."""
+        return tuple(
+            getattr(user if column.class_ is User else profile, column.key)
+            for column in self.dimensions.values()
+        )
+
+    def answerable(self, filters: dict) -> bool:
+        """True when every active filter is an equality test on a dimension."""
+        return all(name in self.dimensions for name, value in filters.items() if value not in (None, ""))
+
+    def counts(self, db, filters: dict) -> Optional[dict]:
+        """The facet response for ``filters`` from memory, or ``None`` when
+        disabled or a filter needs SQL."""
+        if not self.enabled or not self.answerable(filters):
+            return None
+        self._ensure_loaded(db)
+        tests = [(i, filters[name]) for i, name in enumerate(self._names) if filters.get(name) not in (None, "")]
+        positions = self._positions
+        with self._lock:
+            combos = [
+                (tuple(key[i] for i in positions), n)
+                for key, n in self._counts.items()
+                if n and all(key[i] == value for i, value in tests)
+            ]
+        return summarize(self.facets, combos)
+
+    def query(self, q, columns: Optional[Dict[str, object]] = None) -> dict:
+        """The facet response for a filter query, with one ``GROUP BY``.
+        ``columns`` maps dimension names to the columns of ``q``,
+        ``dimensions`` by default."""
+        columns = [(columns or self.dimensions)[name] for name in self.facets]
+        rows = q.with_entities(*columns, func.count()).group_by(*columns).all()
+        return summarize(self.facets, ((tuple(row[:-1]), row[-1]) for row in rows))
+
+    def _fresh(self) -> bool:
+        return self._counts is not None and self._loaded_at > self._expired_at \
+            and time.monotonic() - self._loaded_at <= self.refresh_seconds
+
+    def _ensure_loaded(self, db) -> None:
+        with self._lock:
+            fresh = self._fresh()
+        if fresh:
+            return
+        with self._load_lock:
+            with self._lock:
+                if self._fresh():
+                    return
+                self._journal = []
+            try:
+                self._load(db)
+            finally:
+                with self._lock:
+                    self._journal = None
+
+    def _load(self, db) -> None:
+        model = self.model
+        started = time.monotonic()
+        rows = db.query(model.id, *self.dimensions.values()).join(User, model.user_id == User.id).all()
+        counts = Counter()
+        by_id = {}
+        interned = {}
+        for row in rows:
+            key = tuple(row[1:])
+            key = interned.setdefault(key, key)
+            by_id[row[0]] = key
+            counts[key] += 1
+        with self._lock:
+            self._counts, self._rows, self._interned = counts, by_id, interned
+            for row_id, key in self._journal:
+                self._apply(row_id, key)
+            # changes the query may have missed are newer than its start
+            self._loaded_at = started
+
+    def record(self, row_id: str, key: tuple) -> None:
+        """Move profile ``row_id`` to combination ``key``; call after the write commits."""
+        self.record_rows([(row_id, key)])
+
+    def record_rows(self, rows) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._journal is not None:
+                self._journal.extend(rows)
+            if self._counts is not None:
+                for row_id, key in rows:
+                    self._apply(row_id, key)
+
+    def _apply(self, row_id: str, key: tuple) -> None:
+        key = self._interned.setdefault(key, key)
+        old = self._rows.get(row_id)
+        if old is key:
+            return
+        if old is not None:
+            self._counts[old] -= 1
+        self._counts[key] += 1
+        self._rows[row_id] = key
+
+    def expire(self) -> None:
+        """Reload the counts on next use, e.g. after another process wrote."""
+        with self._lock:
+            self._expired_at = time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts = None
+            self._rows = {}
+            self._interned = {}
+
+    def stats(self) -> dict:
+        with self._lock:
+            loaded = self._counts is not None
+            return {
+                "enabled": self.enabled,
+                "rows": len(self._rows),
+                "combinations": sum(1 for n in self._counts.values() if n) if loaded else 0,
+                "loaded_seconds_ago": round(time.monotonic() - self._loaded_at, 1) if loaded else None,
+            }
+
+influencer_facets = FacetCounts(
+    Influencer,
+    {"user_tag": User.tag, "user_location": User.location, "user_role": User.role, "verified": Influencer.verified},
+    facets=("user_tag", "user_location", "verified"),
+)
+brand_facets = FacetCounts(
+    Brand,
+    {"brand_tag": Brand.tag, "brand_location": Brand.location, "user_role": User.role},
+    facets=("brand_tag", "brand_location"),
+)
@@ -0,0 +1,76 @@
+# utils/fast_json.py
+"""Direct JSON encoding of filter rows, bypassing per-row pydantic validation.
+
+FastAPI validates every returned dict against the ``response_model``,
+dumps it in JSON mode and encodes the result again with ``json.dumps``.
+For a page of 1000 rows that is most of the request's CPU, spent checking
+values the database already holds in the declared types. ``RowEncoder``
+encodes rows straight to bytes with orjson instead; the output is
+byte-identical to FastAPI's for the same model (same key order, compact
+separators, raw UTF-8, ISO-8601 dates with ``Z`` for UTC).
+
+The one normalization pydantic applies to stored data is on ``EmailStr``
+fields, whose domain is lower-cased. Every write path stores emails already
+normalized, so only values that are not plainly canonical go through the
+validator.
+"""
+import os
+from typing import Iterable, List, Optional, Sequence, Union, get_args
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel, EmailStr, TypeAdapter
+
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", "true").lower() in ("1", "true", "yes")
+
+_OPTIONS = orjson.OPT_UTC_Z
+_email = TypeAdapter(EmailStr)
+
+def _is_email(annotation) -> bool:
+    return annotation is EmailStr or EmailStr in get_args(annotation)
+
+def _canonical_email(value: Optional[str]) -> bool:
+    # ASCII with a lower-case domain is returned unchanged by EmailStr
+    return value is None or (value.isascii() and value[value.rfind("@"):].islower())
+
+class RowEncoder:
+    """Encodes rows with the fields of ``model``, in declaration order."""
+
+    def __init__(self, model: type[BaseModel]):
+        self.fields = tuple(model.model_fields)
+        self.email_fields = tuple(
+            name for name, field in model.model_fields.items() if _is_email(field.annotation)
+        )
+
+    def rows(self, tuples: Iterable[Sequence]) -> List[dict]:
+        """Dicts from column tuples selected in ``fields`` order."""
+        fields = self.fields
+        return [dict(zip(fields, values)) for values in tuples]
+
+    def _normalize(self, row: dict) -> dict:
+        for name in self.email_fields:
+            if not _canonical_email(row[name]):
+                row[name] = _email.validate_python(row[name])
+        return row
+
+    def dumps(self, rows: List[dict]) -> bytes:
+        for row in rows:
+            self._normalize(row)
+        return orjson.dumps(rows, option=_OPTIONS)
+
+    def line(self, *values) -> str:
+        """One NDJSON line body, for ``stream_ndjson`` over projected columns."""
+        return orjson.dumps(self._normalize(dict(zip(self.fields, values))), option=_OPTIONS).decode("utf-8")
+
+    def response(self, rows: List[dict], next_cursor: Optional[str] = None) -> Response:
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return Response(self.dumps(rows), media_type="application/json", headers=headers)
+
+def page_response(encoder: RowEncoder, response: Response, rows: List[dict],
+                  next_cursor: Optional[str]) -> Union[Response, List[dict]]:
+    """Return a filter page: pre-encoded when ``FAST_JSON_ENABLED``, otherwise
+    the dicts for FastAPI to validate against the route's ``response_model``."""
+    if FAST_JSON_ENABLED:
+        return encoder.response(rows, next_cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
@@ -0,0 +1,161 @@
+# utils/generations.py
+"""Table generations shared between processes through the database.
+
+Each process keeps its in-memory views (response cache, trending
+leaderboard, influencer index, facet counts) current with the writes it
+makes itself; writes made elsewhere only show up after a view's refresh
+interval or TTL. So every write path (signup, profile saves, bulk
+ingestion and the job handlers, which may run in ``python -m utils.jobs
+run``) calls ``publish(db, table)`` in its transaction, which increments
+the table's row of ``cache_generations``. Every API process polls that table every
+``CACHE_SYNC_SECONDS`` and runs the listeners registered for each table
+whose generation moved; they expire the affected views, which reload on
+next use. The listeners run again ``settle_seconds`` later, so a view
+reloaded from a replica that had not caught up is reloaded once more.
+
+The increment holds the row lock until the commit, so a table's generations
+commit in order. Concurrent writes to a table queue on that lock, so
+writers publish as late in the transaction as they can. After the commit the publisher hands the result to
+``seen``: a process that has already applied its own write does not reload,
+unless another process published in between.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import insert, select, update
+from models.cache_generation import CacheGeneration
+
+CACHE_SYNC_SECONDS = float(os.getenv("CACHE_SYNC_SECONDS", "1"))
+
+logger = logging.getLogger(__name__)
+
+class GenerationSync:
+    """Publishes and polls ``cache_generations``; see the module docstring."""
+
+    def __init__(self, poll_seconds: float = CACHE_SYNC_SECONDS, settle_seconds: float = 0.0):
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.session_factory = None
+        self._listeners: Dict[str, List[Callable[[], None]]] = defaultdict(list)
+        self._lock = threading.Lock()
+        # table -> generation this process is current with; empty until the first poll
+        self._generations: Dict[str, int] = {}
+        self._polled = False
+        # table -> monotonic time of the second listener run
+        self._settling: Dict[str, float] = {}
+        self.polls = 0
+        self.errors = 0
+        self.changes = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def listen(self, name: str, callback: Callable[[], None]) -> None:
+        """Run ``callback()`` when another process publishes a change to ``name``."""
+        self._listeners[name].append(callback)
+
+    # writers
+
+    @staticmethod
+    def publish(db, *names: str) -> Dict[str, int]:
+        """Increment the generations of ``names`` in ``db``'s transaction.
+        Pass the result to ``seen`` once it has committed."""
+        published = {}
+        # one lock order for every writer
+        for name in sorted(set(names)):
+            result = db.execute(update(CacheGeneration).where(CacheGeneration.name == name)
+                                .values(generation=CacheGeneration.generation + 1),
+                                execution_options={"synchronize_session": False})
+            if not result.rowcount:
+                db.execute(insert(CacheGeneration).values(name=name, generation=1))
+            published[name] = db.execute(
+                select(CacheGeneration.generation).where(CacheGeneration.name == name)
+            ).scalar_one()
+        return published
+
+    def seen(self, published: Dict[str, int]) -> None:
+        """Record generations this process committed and has applied itself."""
+        with self._lock:
+            for name, generation in published.items():
+                if self._generations.get(name) == generation - 1:
+                    self._generations[name] = generation
+
+    # readers
+
+    def poll(self, session_factory=None) -> List[str]:
+        """Read the generations once and run the listeners of the tables that
+        changed since the last poll. Returns those tables."""
+        db = (session_factory or self.session_factory)()
+        try:
+            rows = db.execute(select(CacheGeneration.name, CacheGeneration.generation)).all()
+        finally:
+            db.close()
+        now = time.monotonic()
+        changed = []
+        with self._lock:
+            for name, generation in rows:
+                known = self._generations.get(name, 0 if self._polled else None)
+                if known is not None and generation > known:
+                    changed.append(name)
+                    if self.settle_seconds > 0:
+                        self._settling[name] = now + self.settle_seconds
+                self._generations[name] = max(generation, known or 0)
+            self._polled = True
+            settled = [name for name, at in self._settling.items() if at <= now and name not in changed]
+            for name in settled:
+                del self._settling[name]
+            self.polls += 1
+            self.changes.update(changed)
+        for name in changed + settled:
+            for callback in self._listeners.get(name, ()):
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("cache listener for %s failed", name)
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                logger.exception("cache generation poll failed")
+
+    def start(self, session_factory) -> None:
+        """Take the current generations and keep polling in a background thread."""
+        self.session_factory = session_factory
+        if self._thread is not None or self.poll_seconds <= 0 or not self._listeners:
+            return
+        self.poll()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="cache-generation-sync")
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"running": self._thread is not None, "poll_seconds": self.poll_seconds,
+                    "settle_seconds": self.settle_seconds, "polls": self.polls, "errors": self.errors,
+                    "generations": dict(self._generations), "changes": dict(self.changes)}
+
+    def collect(self) -> list:
+        """``metrics.add_collector`` hook."""
+        with self._lock:
+            polls, errors, changes = self.polls, self.errors, sorted(self.changes.items())
+        return [
+            ("cache_generation_polls_total", "counter", "Polls of the cache_generations table.", [({}, polls)]),
+            ("cache_generation_poll_errors_total", "counter", "Failed cache_generations polls.", [({}, errors)]),
+            ("cache_generation_changes_total", "counter", "Changes published by other processes, by table.",
+             [({"table": name}, n) for name, n in changes]),
+        ]
+
+generation_sync = GenerationSync()
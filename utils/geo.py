@@ -0,0 +1,230 @@
+# utils/geo.py
+"""Location normalization and the grid index behind the ``near`` filters.
+
+Free-text locations ("Navi Mumbai", "Bombay", "Andheri West, Mumbai") are
+resolved against the bundled offline gazetteer (``data/gazetteer.csv``: a
+place, its aliases and coordinates) to a canonical place. The place and its
+coordinates are stored in the ``geo_points`` side table, one row per located
+user or brand, together with the ``GEO_CELL_DEGREES`` grid cell they fall in.
+Cells are numbered row by row, so the cells a circle can touch form one
+contiguous range per grid row. ``within`` looks the candidates up through
+the ``(field, cell)`` index with one ``BETWEEN`` per row and checks the
+exact distance only on them, instead of computing a distance for every row.
+
+The table is written in the same transaction as the row it describes. Run
+``python -m utils.geo`` once to backfill existing data, and again after
+changing the gazetteer or ``GEO_CELL_DEGREES``.
+"""
+import csv
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import and_, delete, func, insert, or_, select
+from models.brand import Brand
+from models.geo_point import GeoPoint
+from models.user import User
+
+GAZETTEER_PATH = os.getenv(
+    "GAZETTEER_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "gazetteer.csv"),
+)
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", "0.1"))
+DEFAULT_RADIUS_KM = 25.0
+MAX_RADIUS_KM = 500.0
+KM_PER_DEGREE = 111.2
+# longest run of words looked up as one place name
+MAX_NAME_WORDS = 4
+# paged searches with more points than this in their cells are tested per row
+CANDIDATE_CAP = 10000
+
+_COLUMNS = math.ceil(360 / GEO_CELL_DEGREES)
+
+# field name -> (model, location attribute)
+FIELDS = {
+    "user.location": (User, "location"),
+    "brand.location": (Brand, "location"),
+}
+
+class Place(NamedTuple):
+    name: str
+    state: str
+    lat: float
+    lon: float
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Dict[str, Place]:
+    """Normalized name and alias -> ``Place``."""
+    names = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            place = Place(row["name"], row["state"], float(row["lat"]), float(row["lon"]))
+            for name in [row["name"], *(row["aliases"] or "").split("|")]:
+                if name.strip():
+                    names.setdefault(_normalize(name), place)
+    return names
+
+gazetteer = load_gazetteer()
+
+@lru_cache(maxsize=4096)
+def resolve(text: Optional[str]) -> Optional[Place]:
+    """The gazetteer place a location string names, or ``None``.
+
+    The whole string is tried first, then the longest run of words that is
+    a known name, leftmost first, so "Andheri West, Mumbai" resolves to
+    Mumbai while "Navi Mumbai" stays Navi Mumbai.
+    """
+    if not text:
+        return None
+    key = _normalize(text)
+    if key in gazetteer:
+        return gazetteer[key]
+    words = key.split()
+    for n in range(min(MAX_NAME_WORDS, len(words)), 0, -1):
+        for i in range(len(words) - n + 1):
+            place = gazetteer.get(" ".join(words[i:i + n]))
+            if place is not None:
+                return place
+    return None
+
+def parse_near(text: str) -> Tuple[float, float]:
+    """``(lat, lon)`` of a ``near`` parameter: ``"<lat>,<lon>"`` or a place name.
+    Raises ``ValueError`` with a message for the client."""
+    parts = text.split(",")
+    if len(parts) == 2:
+        try:
+            lat, lon = float(parts[0]), float(parts[1])
+        except ValueError:
+            lat = lon = None
+        if lat is not None:
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ValueError("near must be '<lat>,<lon>' with lat in [-90, 90] and lon in [-180, 180]")
+            return lat, lon
+    place = resolve(text)
+    if place is None:
+        raise ValueError(f"near: unknown place {text!r}; pass '<lat>,<lon>' instead")
+    return place.lat, place.lon
+
+def cell(lat: float, lon: float) -> int:
+    row = int((lat + 90) // GEO_CELL_DEGREES)
+    col = min(int((lon + 180) // GEO_CELL_DEGREES), _COLUMNS - 1)
+    return row * _COLUMNS + col
+
+def cell_ranges(lat: float, lon: float, radius_km: float) -> List[Tuple[int, int]]:
+    """Inclusive cell ranges, one per grid row, covering the circle. Ranges
+    are clamped at the antimeridian rather than wrapped."""
+    dlat = radius_km / KM_PER_DEGREE
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    widest = math.cos(math.radians(max(abs(south), abs(north))))
+    dlon = 180.0 if widest < 1e-6 else min(radius_km / (KM_PER_DEGREE * widest), 180.0)
+    first_col = cell(0.0, max(lon - dlon, -180.0)) % _COLUMNS
+    last_col = cell(0.0, min(lon + dlon, 180.0)) % _COLUMNS
+    ranges = []
+    for row in range(cell(south, 0.0) // _COLUMNS, cell(north, 0.0) // _COLUMNS + 1):
+        lo, hi = row * _COLUMNS + first_col, row * _COLUMNS + last_col
+        if ranges and ranges[-1][1] + 1 == lo:
+            ranges[-1] = (ranges[-1][0], hi)
+        else:
+            ranges.append((lo, hi))
+    return ranges
+
+def _candidates(db, in_range) -> int:
+    """Points in a search's cells, capped at ``CANDIDATE_CAP`` so the count
+    stays a short index range scan."""
+    capped = select(GeoPoint.row_id).where(in_range).limit(CANDIDATE_CAP).subquery()
+    return db.execute(select(func.count()).select_from(capped)).scalar()
+
+def within(q, field: str, id_column, point: Tuple[float, float], radius_km: float, paged: bool = False):
+    """Restrict ``q`` to rows whose ``field`` location lies within
+    ``radius_km`` of ``point``; ``id_column`` is the row id ``field`` is
+    keyed by.
+
+    The distance uses the equirectangular approximation at the centre's
+    latitude, well under 1% off at these radii, so it stays plain SQL
+    arithmetic on every dialect. The rows are looked up from the points in
+    the circle's cells. Set ``paged`` when ``q`` is read one id-ordered page
+    at a time: if the cells then hold ``CANDIDATE_CAP`` points or more, each
+    row is tested through the primary key instead, so the page stops as
+    soon as it is full rather than first collecting every candidate.
+    """
+    lat, lon = point
+    dy = (GeoPoint.lat - lat) * KM_PER_DEGREE
+    dx = (GeoPoint.lon - lon) * (KM_PER_DEGREE * math.cos(math.radians(lat)))
+    close = dx * dx + dy * dy <= radius_km * radius_km
+    # field repeated per range so each one is its own index range scan
+    # (SQLite otherwise seeks on field alone and filters the ranges)
+    in_range = or_(*(and_(GeoPoint.field == field, GeoPoint.cell.between(lo, hi))
+                     for lo, hi in cell_ranges(lat, lon, radius_km)))
+    if paged and _candidates(q.session, in_range) >= CANDIDATE_CAP:
+        return q.filter(
+            select(GeoPoint.row_id).where(GeoPoint.field == field, GeoPoint.row_id == id_column, close).exists()
+        )
+    return q.filter(id_column.in_(select(GeoPoint.row_id).where(in_range, close)))
+
+def point_rows(items) -> List[dict]:
+    """``geo_points`` rows for the resolvable ``(field, row_id, location)`` triples."""
+    rows = []
+    for field, row_id, text in items:
+        place = resolve(text)
+        if place is not None:
+            rows.append({"field": field, "row_id": row_id, "place": place.name,
+                         "lat": place.lat, "lon": place.lon, "cell": cell(place.lat, place.lon)})
+    return rows
+
+def index_locations(db, items) -> None:
+    """Rewrite the points of ``(field, row_id, location)`` triples with one
+    ``DELETE`` and one ``INSERT``; call before ``commit``. Locations the
+    gazetteer does not know are left out."""
+    items = list(items)
+    if not items:
+        return
+    by_field = {}
+    for field, row_id, _ in items:
+        by_field.setdefault(field, []).append(row_id)
+    db.execute(delete(GeoPoint).where(or_(*(
+        and_(GeoPoint.field == field, GeoPoint.row_id.in_(ids)) for field, ids in by_field.items()
+    ))))
+    rows = point_rows(items)
+    if rows:
+        db.execute(insert(GeoPoint), rows)
+
+def rebuild(db, batch_size: int = 5000) -> Tuple[int, Counter]:
+    """Recreate the whole table from ``users`` and ``brands``. Returns the
+    rows written and the unresolved location strings with their counts."""
+    db.execute(delete(GeoPoint))
+    written = 0
+    unresolved = Counter()
+    for field, (model, attr) in FIELDS.items():
+        column = getattr(model, attr)
+        last_id = ""
+        while True:
+            rows = db.execute(
+                select(model.id, column).where(model.id > last_id).order_by(model.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            batch = point_rows((field, row_id, text) for row_id, text in rows)
+            if batch:
+                db.execute(insert(GeoPoint), batch)
+                written += len(batch)
+            unresolved.update(text for _, text in rows if text and resolve(text) is None)
+            last_id = rows[-1][0]
+    db.commit()
+    return written, unresolved
+
+if __name__ == "__main__":
+    from database import SessionLocal, engine
+    from utils.migrations import check
+    check(engine)
+    session = SessionLocal()
+    try:
+        written, unresolved = rebuild(session)
+        print(f"located {written} rows; {sum(unresolved.values())} rows in "
+              f"{len(unresolved)} unknown locations")
+        for text, n in unresolved.most_common(20):
+            print(f"{n:>8}  {text}")
+    finally:
+        session.close()
@@ -0,0 +1,322 @@
+# utils/influencer_index.py
+"""In-memory columnar index behind ``/influencers/filter``.
+
+Holds every Influencer+User row sorted by influencer id. The equality and
+range predicates (tag, location, role, min reach, verified) are evaluated on
+compact NumPy columns: tag/location/role as dictionary codes, reach as an
+int64 array and verified as an int8 flag array (-1 for NULL). Ids live in a
+fixed-width bytes array and ``created_at`` in a datetime64 column; the other
+strings needed to render a row are packed into one string per row. Because rows are
+in id order, a page is found by bisecting to the cursor and scanning forward
+block by block until ``limit + 1`` matches are found, which yields exactly
+the rows and cursor of the SQL keyset path.
+
+The index is loaded at startup, updated by the write endpoints and
+reloaded in a background thread every ``INFLUENCER_INDEX_REFRESH_SECONDS``
+so writes handled by other workers show up. ``expire`` starts a reload at
+once and sends requests to SQL until it has finished. Substring filters are
+not supported; requests using them fall back to SQL.
+"""
+import os
+import threading
+import time
+from typing import List, Optional
+import numpy as np
+from models.influencer import Influencer
+from models.user import User
+
+INFLUENCER_INDEX_ENABLED = os.getenv("INFLUENCER_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+INFLUENCER_INDEX_REFRESH_SECONDS = float(os.getenv("INFLUENCER_INDEX_REFRESH_SECONDS", "300"))
+SCAN_BLOCK = 65536
+NULL_REACH = np.iinfo(np.int64).min
+NO_CODE = -2  # never equals a stored code, including -1 for NULL
+# packed payload: user_id, user_name, user_email, influencer_email
+SEP, NULL = "\x1f", "\x00"
+
+# column order of a row; load query and row_for produce the same layout
+COLUMNS = (
+    Influencer.id, Influencer.reach, Influencer.verified, Influencer.email,
+    User.id, User.name, User.email, User.tag, User.location, User.role, User.created_at,
+)
+
+class _Dictionary:
+    """Value <-> small integer code, with -1 for NULL."""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value) -> int:
+        return self.codes.get(value, NO_CODE)
+
+    def decode(self, code: int):
+        return None if code < 0 else self.values[code]
+
+def _pack(row):
+    fields = (row[4], row[5], row[6], row[3])
+    if any(f is not None and (SEP in f or f == NULL) for f in fields):
+        return fields  # rare: keep the tuple rather than escape
+    return SEP.join(NULL if f is None else f for f in fields)
+
+def _unpack(payload):
+    if isinstance(payload, tuple):
+        return payload
+    fields = payload.split(SEP)
+    if NULL in payload:
+        fields = [None if f == NULL else f for f in fields]
+    return fields
+
+def _ids(values, width: int = 36) -> np.ndarray:
+    encoded = [v.encode("ascii") for v in values]
+    width = max([width] + [len(v) for v in encoded])
+    return np.array(encoded, dtype=f"S{width}")
+
+class _Columns:
+    def __init__(self, rows):
+        self.tags = _Dictionary()
+        self.locations = _Dictionary()
+        self.roles = _Dictionary()
+        n = len(rows)
+        self.ids = _ids([r[0] for r in rows])
+        self.payload: List = [_pack(r) for r in rows]
+        self.created = np.array([r[10] for r in rows], dtype="datetime64[us]")
+        self.tag = np.fromiter((self.tags.encode(r[7]) for r in rows), dtype=np.int32, count=n)
+        self.location = np.fromiter((self.locations.encode(r[8]) for r in rows), dtype=np.int32, count=n)
+        self.role = np.fromiter((self.roles.encode(r[9]) for r in rows), dtype=np.int16, count=n)
+        self.reach = np.fromiter((NULL_REACH if r[1] is None else r[1] for r in rows), dtype=np.int64, count=n)
+        self.verified = np.fromiter((-1 if r[2] is None else int(bool(r[2])) for r in rows), dtype=np.int8, count=n)
+
+    def __len__(self):
+        return len(self.payload)
+
+    def find(self, key: str, side: str = "left") -> int:
+        return int(np.searchsorted(self.ids, key.encode("ascii"), side=side))
+
+    def encode_row(self, row):
+        return (
+            self.tags.encode(row[7]), self.locations.encode(row[8]), self.roles.encode(row[9]),
+            NULL_REACH if row[1] is None else row[1],
+            -1 if row[2] is None else int(bool(row[2])),
+            np.datetime64(row[10], "us") if row[10] is not None else np.datetime64("NaT"),
+            _pack(row),
+        )
+
+    def apply(self, rows) -> None:
+        """Upsert ``rows`` (in ``COLUMNS`` layout): existing ids are updated in
+        place, new ids are spliced in with one copy per column."""
+        new = {}
+        for row in rows:
+            i = self.find(row[0])
+            tag, location, role, reach, verified, created, payload = self.encode_row(row)
+            if i < len(self) and self.ids[i] == row[0].encode("ascii"):
+                self.tag[i], self.location[i], self.role[i] = tag, location, role
+                self.reach[i], self.verified[i], self.created[i] = reach, verified, created
+                self.payload[i] = payload
+            else:
+                new[row[0]] = (tag, location, role, reach, verified, created, payload)
+        if not new:
+            return
+        keys = sorted(new)
+        positions = [self.find(k) for k in keys]
+        values = [new[k] for k in keys]
+        added = _ids(keys, self.ids.dtype.itemsize)
+        if added.dtype.itemsize > self.ids.dtype.itemsize:
+            self.ids = self.ids.astype(added.dtype)
+        self.ids = np.insert(self.ids, positions, added)
+        self.tag = np.insert(self.tag, positions, [v[0] for v in values])
+        self.location = np.insert(self.location, positions, [v[1] for v in values])
+        self.role = np.insert(self.role, positions, [v[2] for v in values])
+        self.reach = np.insert(self.reach, positions, [v[3] for v in values])
+        self.verified = np.insert(self.verified, positions, [v[4] for v in values])
+        self.created = np.insert(self.created, positions, [v[5] for v in values])
+        self.payload = _splice(self.payload, positions, [v[6] for v in values])
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.ids, self.tag, self.location, self.role, self.reach,
+                                      self.verified, self.created))
+
+def _splice(items: list, positions, values) -> list:
+    out, prev = [], 0
+    for pos, value in zip(positions, values):
+        out.extend(items[prev:pos])
+        out.append(value)
+        prev = pos
+    out.extend(items[prev:])
+    return out
+
+class InfluencerIndex:
+    """Columnar copy of the influencer filter join; see the module docstring."""
+
+    def __init__(self, enabled: bool = INFLUENCER_INDEX_ENABLED,
+                 refresh_seconds: float = INFLUENCER_INDEX_REFRESH_SECONDS):
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._columns: Optional[_Columns] = None
+        self._loaded_at = 0.0
+        # start of the latest load or reload, failed ones included
+        self._attempted_at = 0.0
+        self._expired_at = float("-inf")
+        self._session_factory = None
+        # writes seen while a background reload runs, replayed onto its result
+        self._journal: Optional[list] = None
+
+    @property
+    def ready(self) -> bool:
+        # an expired copy is not served, even while its reload runs
+        return self.enabled and self._columns is not None and self._loaded_at > self._expired_at
+
+    @staticmethod
+    def row_for(infl, user) -> tuple:
+        return (
+            infl.id, infl.reach, infl.verified, infl.email,
+            user.id, user.name, user.email, user.tag, user.location, user.role, user.created_at,
+        )
+
+    def load(self, session_factory) -> int:
+        """Build the index from the database; returns the row count."""
+        self._session_factory = session_factory
+        with self._lock:
+            self._journal = []
+            started = self._attempted_at = time.monotonic()
+        try:
+            db = session_factory()
+            try:
+                rows = db.query(*COLUMNS).join(User, Influencer.user_id == User.id).order_by(Influencer.id).all()
+            finally:
+                db.close()
+            columns = _Columns(rows)
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            columns.apply(self._journal)
+            self._journal = None
+            self._columns = columns
+            # changes the query may have missed are newer than its start
+            self._loaded_at = started
+        if started <= self._expired_at:
+            # expired while loading
+            self._maybe_refresh()
+        return len(columns)
+
+    def _maybe_refresh(self) -> None:
+        if self._session_factory is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            expired = self._loaded_at <= self._expired_at and self._attempted_at <= self._expired_at
+            due = expired or bool(self.refresh_seconds) and now - self._attempted_at > self.refresh_seconds
+            if self._journal is not None or not due:
+                return
+            # claim the reload so concurrent requests do not start another
+            self._attempted_at = now
+        threading.Thread(target=self.load, args=(self._session_factory,), daemon=True,
+                         name="influencer-index-reload").start()
+
+    def expire(self) -> None:
+        """Reload in the background, e.g. after another process wrote; until
+        then ``ready`` is false."""
+        with self._lock:
+            self._expired_at = time.monotonic()
+        self._maybe_refresh()
+
+    def record(self, infl, user) -> None:
+        self.record_rows([self.row_for(infl, user)])
+
+    def record_rows(self, rows) -> None:
+        """Apply rows captured with ``row_for``; call after the write commits."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._journal is not None:
+                self._journal.extend(rows)
+            if self._columns is not None:
+                self._columns.apply(rows)
+
+    def page(self, after: Optional[str], limit: int, user_tag: Optional[str] = None,
+             user_location: Optional[str] = None, user_role: Optional[str] = None,
+             min_reach: Optional[int] = None, verified: Optional[bool] = None):
+        """Rows after id ``after`` matching every given predicate, as
+        ``(rows, last_id_or_None)`` with the same semantics as ``keyset_page``."""
+        self._maybe_refresh()
+        with self._lock:
+            cols = self._columns
+            tests = []
+            if user_tag:
+                tests.append((cols.tag, cols.tags.lookup(user_tag)))
+            if user_location:
+                tests.append((cols.location, cols.locations.lookup(user_location)))
+            if user_role:
+                tests.append((cols.role, cols.roles.lookup(user_role)))
+            if verified is not None:
+                tests.append((cols.verified, int(verified)))
+            if any(code == NO_CODE for _, code in tests):
+                return [], None
+
+            start = cols.find(after, side="right") if after is not None else 0
+            found = []
+            n = len(cols)
+            while start < n and len(found) <= limit:
+                stop = min(start + SCAN_BLOCK, n)
+                mask = np.ones(stop - start, dtype=np.bool_)
+                for column, code in tests:
+                    mask &= column[start:stop] == code
+                if min_reach is not None:
+                    mask &= cols.reach[start:stop] >= min_reach
+                found.extend((np.flatnonzero(mask)[:limit + 1 - len(found)] + start).tolist())
+                start = stop
+            rows = self._render(cols, found[:limit])
+        next_key = rows[-1]["influencer_id"] if len(found) > limit else None
+        return rows, next_key
+
+    @staticmethod
+    def _render(cols: _Columns, idx: List[int]) -> List[dict]:
+        # gather each column once for the whole page rather than per cell
+        tags = cols.tag[idx].tolist()
+        locations = cols.location[idx].tolist()
+        roles = cols.role[idx].tolist()
+        reach = cols.reach[idx].tolist()
+        verified = cols.verified[idx].tolist()
+        created = cols.created[idx].tolist()  # NaT -> None
+        ids = cols.ids[idx].tolist()
+        out = []
+        for j, i in enumerate(idx):
+            user_id, name, email, infl_email = _unpack(cols.payload[i])
+            out.append({
+                "user_id": user_id,
+                "user_name": name,
+                "user_email": email,
+                "user_tag": cols.tags.decode(tags[j]),
+                "user_location": cols.locations.decode(locations[j]),
+                "user_role": cols.roles.decode(roles[j]),
+                "user_created_at": created[j],
+                "influencer_id": ids[j].decode("ascii"),
+                "reach": None if reach[j] == NULL_REACH else reach[j],
+                "verified": None if verified[j] < 0 else bool(verified[j]),
+                "influencer_email": infl_email,
+            })
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            cols = self._columns
+            return {
+                "enabled": self.enabled,
+                "rows": len(cols) if cols is not None else 0,
+                "column_bytes": cols.nbytes() if cols is not None else 0,
+                "loaded_seconds_ago": round(time.monotonic() - self._loaded_at, 1) if cols is not None else None,
+                "reloading": self._journal is not None,
+            }
+
+influencer_index = InfluencerIndex()
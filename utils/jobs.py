@@ -0,0 +1,336 @@
+# utils/jobs.py
+"""Persistent background jobs and the worker pool that runs them.
+
+    python -m utils.jobs enqueue verify_reach <influencer id>...   # or ids on stdin
+    python -m utils.jobs run [--once]                              # a worker process
+    python -m utils.jobs status
+
+Jobs are rows of the ``jobs`` table (``models.job``), so they survive
+restarts and are shared by every worker process. ``enqueue`` adds one in the
+caller's transaction; with an idempotency key, a second request carrying the
+same key gets the first job back instead of a new one.
+
+``JobQueue.start`` runs ``JOB_WORKERS`` threads per process (0 leaves the
+jobs to ``python -m utils.jobs run``). A worker claims up to
+``JOB_BATCH_SIZE`` due jobs at once: it picks candidates, then marks them
+``running`` with its claim token and a lease of ``JOB_LEASE_SECONDS`` in one
+``UPDATE`` that only matches rows still due, so two workers never get the
+same job. The jobs of a kind go to its handler together, which writes their
+results with batched statements; the handler's writes and the status
+updates commit in one transaction. If a batch fails its jobs are retried one
+by one, so a bad job does not hold back the others, and a failed job is
+queued again after ``JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)`` (capped
+at ``JOB_RETRY_MAX_SECONDS``, with jitter) until ``JOB_MAX_ATTEMPTS``. Jobs
+of a worker that died are claimed again once their lease has run out.
+
+Handlers are registered with ``job_queue.register(kind, handler)``;
+``handler(db, jobs)`` gets the claimed rows (``id``, ``target_id``,
+``requested_by``, ``attempts``) and returns ``(failures, done)``: job id ->
+error for jobs that cannot succeed (failed without retry), and a callable
+run after the commit (for in-memory views) or ``None``. That callable only
+reaches the views of the process running the job, so a handler also
+publishes its writes with ``utils.generations`` for the API processes.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from models.job import Job
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "100"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "300"))
+STATUSES = ("queued", "running", "succeeded", "failed")
+# longest client-supplied idempotency key; the caller's id and ":" fill the rest of the column
+MAX_IDEMPOTENCY_KEY = 63
+# rows per INSERT of enqueue_many
+ENQUEUE_CHUNK = 1000
+# status updates touch no loaded Job objects
+BULK = {"synchronize_session": False}
+
+logger = logging.getLogger(__name__)
+
+def enqueue(db, kind: str, target_id: Optional[str] = None, requested_by: Optional[str] = None,
+            key: Optional[str] = None) -> Job:
+    """Add a job in the caller's transaction (commit it, then ``notify``).
+    With ``key``, the job already holding that idempotency key is returned
+    instead; the caller decides whether it matches the request."""
+    if key is not None:
+        existing = db.query(Job).filter(Job.idempotency_key == key).first()
+        if existing is not None:
+            return existing
+    job = Job(kind=kind, target_id=target_id, requested_by=requested_by, idempotency_key=key)
+    try:
+        with db.begin_nested():
+            db.add(job)
+    except IntegrityError:
+        # a concurrent request with the same key inserted first
+        if key is None:
+            raise
+        return db.query(Job).filter(Job.idempotency_key == key).one()
+    return job
+
+def enqueue_many(db, kind: str, target_ids, requested_by: Optional[str] = None) -> int:
+    """Add one job per target with multi-row inserts and commit. Returns the jobs added."""
+    added = 0
+    target_ids = list(target_ids)
+    for start in range(0, len(target_ids), ENQUEUE_CHUNK):
+        chunk = target_ids[start:start + ENQUEUE_CHUNK]
+        db.execute(insert(Job), [{"kind": kind, "target_id": target_id, "requested_by": requested_by}
+                                 for target_id in chunk])
+        added += len(chunk)
+    db.commit()
+    return added
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retrying a job that has failed ``attempts`` times."""
+    delay = min(JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+class JobQueue:
+    """Claims and runs jobs; see the module docstring."""
+
+    def __init__(self, workers: int = JOB_WORKERS, batch_size: int = JOB_BATCH_SIZE,
+                 poll_seconds: float = JOB_POLL_SECONDS, lease_seconds: float = JOB_LEASE_SECONDS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.handlers: Dict[str, Callable] = {}
+        self.session_factory = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.batches = 0
+        self.retries = 0
+        # (kind, "succeeded" | "failed") -> jobs finished by this process
+        self.finished: Counter = Counter()
+
+    def register(self, kind: str, handler: Callable) -> None:
+        self.handlers[kind] = handler
+
+    def notify(self) -> None:
+        """Wake the idle workers of this process; call after committing new jobs."""
+        self._wake.set()
+
+    # claiming
+
+    def claim(self, db) -> tuple:
+        """Claim up to ``batch_size`` due jobs. Returns the claim token and the
+        claimed rows, oldest first."""
+        now = datetime.utcnow()
+        due = (Job.status.in_(("queued", "running"))) & (Job.available_at <= now)
+        ids = db.execute(
+            select(Job.id).where(due).order_by(Job.available_at).limit(self.batch_size)
+        ).scalars().all()
+        if not ids:
+            return None, []
+        token = str(uuid.uuid4())
+        db.execute(update(Job).where(Job.id.in_(ids), due).values(
+            status="running", claim=token, attempts=Job.attempts + 1,
+            available_at=now + timedelta(seconds=self.lease_seconds),
+        ), execution_options=BULK)
+        db.commit()
+        rows = db.execute(
+            select(Job.id, Job.kind, Job.target_id, Job.requested_by, Job.attempts)
+            .where(Job.claim == token).order_by(Job.created_at)
+        ).all()
+        return token, rows
+
+    # running
+
+    def run_once(self, session_factory=None) -> int:
+        """Claim one batch and run it. Returns the jobs claimed."""
+        db = (session_factory or self.session_factory)()
+        try:
+            token, rows = self.claim(db)
+        finally:
+            db.close()
+        by_kind = defaultdict(list)
+        for row in rows:
+            by_kind[row.kind].append(row)
+        for kind, jobs in by_kind.items():
+            self._run_batch(session_factory or self.session_factory, token, kind, jobs)
+        return len(rows)
+
+    def _run_batch(self, session_factory, token: str, kind: str, jobs: list) -> None:
+        handler = self.handlers.get(kind)
+        db = session_factory()
+        try:
+            if handler is None:
+                failures, done = {job.id: f"no handler for job kind {kind!r}" for job in jobs}, None
+            else:
+                failures, done = handler(db, jobs)
+            self._finish(db, token, jobs, failures)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(jobs) > 1:
+                db.close()
+                for job in jobs:
+                    self._run_batch(session_factory, token, kind, [job])
+                return
+            logger.warning("job %s (%s) failed on attempt %d: %s", jobs[0].id, kind, jobs[0].attempts, e)
+            self._retry(db, token, jobs[0], f"{e.__class__.__name__}: {e}".splitlines()[0])
+            db.commit()
+            return
+        finally:
+            db.close()
+        with self._lock:
+            self.batches += 1
+            self.finished[(kind, "failed")] += len(failures)
+            self.finished[(kind, "succeeded")] += len(jobs) - len(failures)
+        if done is not None:
+            done()
+
+    def _finish(self, db, token: str, jobs: list, failures: Dict[str, str]) -> None:
+        now = datetime.utcnow()
+        mine = Job.claim == token
+        succeeded = [job.id for job in jobs if job.id not in failures]
+        if succeeded:
+            db.execute(update(Job).where(Job.id.in_(succeeded), mine).values(
+                status="succeeded", claim=None, error=None, finished_at=now), execution_options=BULK)
+        by_error = defaultdict(list)
+        for job_id, error in failures.items():
+            by_error[error[:500]].append(job_id)
+        for error, ids in by_error.items():
+            db.execute(update(Job).where(Job.id.in_(ids), mine).values(
+                status="failed", claim=None, error=error, finished_at=now), execution_options=BULK)
+
+    def _retry(self, db, token: str, job, error: str) -> None:
+        now = datetime.utcnow()
+        values = {"claim": None, "error": error[:500]}
+        if job.attempts >= self.max_attempts:
+            values.update(status="failed", finished_at=now)
+            with self._lock:
+                self.finished[(job.kind, "failed")] += 1
+        else:
+            values.update(status="queued", available_at=now + timedelta(seconds=backoff_seconds(job.attempts)))
+            with self._lock:
+                self.retries += 1
+        db.execute(update(Job).where(Job.id == job.id, Job.claim == token).values(**values), execution_options=BULK)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("job worker failed to claim a batch")
+                claimed = 0
+            if not claimed:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def start(self, session_factory, workers: Optional[int] = None) -> None:
+        """Run ``workers`` (default ``JOB_WORKERS``) worker threads."""
+        self.session_factory = session_factory
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers if workers is None else workers):
+            thread = threading.Thread(target=self._run, daemon=True, name=f"job-worker-{i}")
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Stop the workers after their current batch."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    # reporting
+
+    def counts(self, db) -> Dict[str, int]:
+        """Jobs in the table by status."""
+        rows = db.execute(select(Job.status, func.count()).group_by(Job.status)).all()
+        return {status: 0 for status in STATUSES} | dict(rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = {f"{kind}:{outcome}": n for (kind, outcome), n in sorted(self.finished.items())}
+        return {"workers": len(self._threads), "batch_size": self.batch_size, "poll_seconds": self.poll_seconds,
+                "lease_seconds": self.lease_seconds, "max_attempts": self.max_attempts,
+                "kinds": sorted(self.handlers), "batches": self.batches, "retries": self.retries,
+                "finished": finished}
+
+    def collect(self) -> list:
+        """``metrics.add_collector`` hook."""
+        with self._lock:
+            finished = sorted(self.finished.items())
+            batches, retries = self.batches, self.retries
+        return [
+            ("job_workers", "gauge", "Job worker threads in this process.", [({}, len(self._threads))]),
+            ("job_batches_total", "counter", "Job batches committed by this process.", [({}, batches)]),
+            ("job_retries_total", "counter", "Failed job attempts queued again with backoff.", [({}, retries)]),
+            ("jobs_finished_total", "counter", "Jobs finished by this process, by kind and outcome.",
+             [({"kind": kind, "outcome": outcome}, n) for (kind, outcome), n in finished]),
+        ]
+
+job_queue = JobQueue()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("enqueue", help="queue one job per target id")
+    add.add_argument("kind")
+    add.add_argument("target_ids", nargs="*", help="ids (default: one per line on stdin)")
+    run = commands.add_parser("run", help="run JOB_WORKERS workers until interrupted")
+    run.add_argument("--once", action="store_true", help="run the due jobs, then exit")
+    commands.add_parser("status", help="print the jobs by status")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal, engine
+    from utils.migrations import check
+    # registers the handlers
+    import routers.influencer_router  # noqa: F401
+    # under ``python -m`` this module is __main__; the handlers are on the imported instance
+    from utils.jobs import enqueue_many, job_queue
+    check(engine)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.command == "enqueue":
+        if args.kind not in job_queue.handlers:
+            sys.exit(f"unknown job kind {args.kind!r}; known: {', '.join(sorted(job_queue.handlers))}")
+        target_ids = args.target_ids or [line.strip() for line in sys.stdin if line.strip()]
+        db = SessionLocal()
+        try:
+            print(f"queued {enqueue_many(db, args.kind, target_ids)} {args.kind} jobs")
+        finally:
+            db.close()
+    elif args.command == "run" and args.once:
+        total = 0
+        while claimed := job_queue.run_once(SessionLocal):
+            total += claimed
+        print(f"ran {total} jobs")
+    elif args.command == "run":
+        job_queue.start(SessionLocal)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            job_queue.stop()
+    else:
+        db = SessionLocal()
+        try:
+            print(" ".join(f"{status}={n}" for status, n in job_queue.counts(db).items()))
+        finally:
+            db.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+# utils/leaderboard.py
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+from utils.read_model import influencer_columns, influencer_query
+
+TOP_K = int(os.getenv("TRENDING_TOP_K", "1000"))
+REFRESH_SECONDS = float(os.getenv("TRENDING_REFRESH_SECONDS", "60"))
+
+BucketKey = Tuple[Optional[str], Optional[str]]
+
+def _rank_key(entry: dict):
+    return (-(entry["reach"] or 0), entry["influencer_id"])
+
+def _buckets_for(entry: dict) -> List[BucketKey]:
+    tag, location = entry["tag"], entry["location"]
+    return [(None, None), (tag, None), (None, location), (tag, location)]
+
+class _Bucket:
+    __slots__ = ("keys", "truncated", "loaded_at")
+
+    def __init__(self, keys, truncated, loaded_at):
+        self.keys = keys
+        self.truncated = truncated
+        # when its query started, so changes it may have missed are newer
+        self.loaded_at = loaded_at
+
+class TrendingLeaderboard:
+    """Top-K influencers by reach for the global, tag, location and
+    (tag, location) buckets.
+
+    Buckets are loaded from the database on first use with one query on the
+    read model (or the profile/user join, see ``utils.read_model``) and then kept current by ``record`` from the write endpoints. A bucket only
+    holds its best ``k`` rows; a written row moves to its new rank within
+    each bucket. Only when a row leaves a truncated bucket (its new rank falls
+    past the last one held, or it moved to another tag or location) is the
+    bucket dropped and reloaded on the next read, since the row taking its
+    place is only known to the database. Buckets are also reloaded
+    after ``refresh_seconds`` so writes handled by other workers show up,
+    and on first use after ``expire``.
+
+    Only influencers held by at least one bucket are kept (``_refs`` counts
+    the buckets per id). A bucket query runs outside the lock, so writes
+    recorded meanwhile are journaled and replayed over its rows, which may
+    predate them.
+    """
+
+    def __init__(self, k: int = TOP_K, refresh_seconds: float = REFRESH_SECONDS):
+        self.k = k
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._buckets: Dict[BucketKey, _Bucket] = {}
+        self._entries: Dict[str, dict] = {}
+        # influencer id -> loaded buckets holding it
+        self._refs: Dict[str, int] = {}
+        # entries recorded while bucket queries run; None when none runs
+        self._journal: Optional[List[dict]] = None
+        self._loading = 0
+        self._expired_at = float("-inf")
+
+    @staticmethod
+    def _query(db, tag: Optional[str], location: Optional[str]):
+        c = influencer_columns()
+        q = influencer_query(db).with_entities(
+            c["influencer_id"], c["user_name"], c["user_location"], c["user_tag"], c["reach"], c["verified"]
+        )
+        if tag:
+            q = q.filter(c["user_tag"] == tag)
+        if location:
+            q = q.filter(c["user_location"] == location)
+        return q.order_by(c["reach"].desc(), c["influencer_id"])
+
+    @staticmethod
+    def _entry(row) -> dict:
+        return {
+            "influencer_id": row[0],
+            "name": row[1],
+            "location": row[2],
+            "tag": row[3],
+            "reach": row[4],
+            "verified": row[5],
+        }
+
+    def _load(self, db, key: BucketKey) -> _Bucket:
+        with self._lock:
+            if self._journal is None:
+                self._journal = []
+            start = len(self._journal)
+            self._loading += 1
+        started = time.monotonic()
+        try:
+            rows = self._query(db, *key).limit(self.k + 1).all()
+        except BaseException:
+            with self._lock:
+                self._end_load()
+            raise
+        entries = [self._entry(r) for r in rows[:self.k]]
+        bucket = _Bucket(sorted(_rank_key(e) for e in entries), truncated=len(rows) > self.k, loaded_at=started)
+        with self._lock:
+            self._drop_bucket(key)
+            for e in entries:
+                if self._entries.get(e["influencer_id"]) != e:
+                    # keep the other loaded buckets consistent with fresher data
+                    self._apply(e)
+                self._entries[e["influencer_id"]] = e
+            self._buckets[key] = bucket
+            for rank in bucket.keys:
+                self._add_ref(rank[1])
+            # writes recorded during the query win over its rows
+            for entry in self._journal[start:]:
+                self._apply(entry)
+            self._end_load()
+        return bucket
+
+    def _end_load(self) -> None:
+        self._loading -= 1
+        if not self._loading:
+            self._journal = None
+
+    def top(self, db, tag: Optional[str] = None, location: Optional[str] = None,
+            limit: int = 50, offset: int = 0, narrow=None) -> List[dict]:
+        """The ``limit`` best influencers from ``offset``. ``narrow`` maps the
+        SQL query to a restricted one (e.g. ``utils.geo.within``); such
+        requests are not bucketed and always go to SQL."""
+        key = (tag or None, location or None)
+        if offset + limit <= self.k and narrow is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                expired_at = self._expired_at
+            if bucket is None or bucket.loaded_at <= expired_at \
+                    or time.monotonic() - bucket.loaded_at > self.refresh_seconds:
+                bucket = self._load(db, key)
+            with self._lock:
+                # a write may have dropped the bucket since, taking its entries along
+                if self._buckets.get(key) is bucket:
+                    window = bucket.keys[offset:offset + limit]
+                    return [dict(self._entries[k[1]]) for k in window]
+        # deeper than the maintained window, not a bucket, or just dropped: answer straight from SQL
+        q = self._query(db, *key)
+        if narrow is not None:
+            q = narrow(q)
+        rows = q.offset(offset).limit(limit).all()
+        return [self._entry(r) for r in rows]
+
+    @staticmethod
+    def entry_for(infl, user) -> dict:
+        return {
+            "influencer_id": infl.id,
+            "name": user.name,
+            "location": user.location,
+            "tag": user.tag,
+            "reach": infl.reach,
+            "verified": infl.verified,
+        }
+
+    def record(self, infl, user) -> None:
+        """Apply a written influencer row (and its user) to the loaded buckets."""
+        self.record_entry(self.entry_for(infl, user))
+
+    def record_entry(self, entry: dict) -> None:
+        """Like ``record`` for an entry captured with ``entry_for``; lets bulk
+        writers snapshot rows before ``commit`` expires them."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(entry)
+            self._apply(entry)
+
+    def _apply(self, entry: dict) -> None:
+        influencer_id = entry["influencer_id"]
+        old = self._entries.get(influencer_id)
+        rank = _rank_key(entry)
+        keys = set(_buckets_for(entry))
+        old_rank = _rank_key(old) if old is not None else None
+        for key in keys | (set(_buckets_for(old)) if old is not None else set()):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            held = old is not None and self._discard(bucket, old_rank)
+            if key in keys and not (bucket.truncated and (not bucket.keys or rank > bucket.keys[-1])):
+                self._place(bucket, rank)
+            elif held and bucket.truncated:
+                # left the rows held: the one taking its place is only in the database
+                self._drop_bucket(key)
+        if self._refs.get(influencer_id):
+            self._entries[influencer_id] = entry
+        else:
+            # in no loaded bucket (or cut by truncation): nothing would read it
+            self._entries.pop(influencer_id, None)
+
+    def _add_ref(self, influencer_id: str) -> None:
+        self._refs[influencer_id] = self._refs.get(influencer_id, 0) + 1
+
+    def _drop_ref(self, influencer_id: str) -> None:
+        left = self._refs[influencer_id] - 1
+        if left:
+            self._refs[influencer_id] = left
+        else:
+            del self._refs[influencer_id]
+            self._entries.pop(influencer_id, None)
+
+    def _drop_bucket(self, key: BucketKey) -> None:
+        bucket = self._buckets.pop(key, None)
+        if bucket is not None:
+            for rank in bucket.keys:
+                self._drop_ref(rank[1])
+
+    def _discard(self, bucket: _Bucket, rank) -> bool:
+        """Take ``rank`` out of ``bucket``; returns whether it was held."""
+        i = bisect_left(bucket.keys, rank)
+        if i < len(bucket.keys) and bucket.keys[i] == rank:
+            del bucket.keys[i]
+            self._drop_ref(rank[1])
+            return True
+        return False
+
+    def _place(self, bucket: _Bucket, rank) -> None:
+        insort(bucket.keys, rank)
+        self._add_ref(rank[1])
+        if len(bucket.keys) > self.k:
+            for dropped in bucket.keys[self.k:]:
+                self._drop_ref(dropped[1])
+            del bucket.keys[self.k:]
+            bucket.truncated = True
+
+    def expire(self) -> None:
+        """Reload every bucket on its next read, e.g. after another process wrote."""
+        with self._lock:
+            self._expired_at = time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._entries.clear()
+            self._refs.clear()
+
+leaderboard = TrendingLeaderboard()
@@ -0,0 +1,288 @@
+# utils/metrics.py
+"""Per-route request and SQL metrics, rendered in Prometheus text format.
+
+``MetricsMiddleware`` times every request and attaches a ``RequestStats``
+to the request's context; SQLAlchemy cursor events on the instrumented
+engines add each statement, its database time and the rows fetched through
+it. Once the last body chunk has been sent (so a streamed body's queries
+and time count too) the totals are folded into per-route series:
+
+- ``http_requests_total{method,route,status}``
+- ``http_request_duration_seconds{method,route}`` (histogram)
+- ``db_statements_per_request{method,route}`` (histogram)
+- ``db_statements_total``, ``db_seconds_total``, ``db_rows_fetched_total``
+
+With ``DEV_MODE=true`` each request also groups its statements by their
+normalized text and logs a warning when one shape repeats
+``N_PLUS_ONE_THRESHOLD`` times or more (the N+1 pattern), and any statement
+slower than ``SLOW_QUERY_MS`` is logged.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+from sqlalchemy import event
+from starlette.routing import Match
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+DEV_MODE = os.getenv("DEV_MODE", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER_RUN = re.compile(r"(\?|%s|:\w+)(\s*,\s*(\?|%s|:\w+))+")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+def normalize(statement: str) -> str:
+    """Collapse literals and IN-lists so repeated per-row queries share one key."""
+    text = _LITERAL.sub("?", statement)
+    text = _PLACEHOLDER_RUN.sub("?", text)
+    return " ".join(text.split())
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds", "rows", "shapes")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.shapes = Counter() if DEV_MODE else None
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+class _CountingCursor:
+    """DBAPI cursor proxy that counts the rows handed to SQLAlchemy."""
+
+    __slots__ = ("_cursor", "_stats")
+
+    def __init__(self, cursor, stats: RequestStats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._stats.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._stats.rows += len(rows)
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._stats.rows += 1
+            yield row
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, buckets, value: float) -> None:
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+def _labels(**labels) -> str:
+    def escape(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metrics:
+    """Process-wide registry fed by ``MetricsMiddleware`` and engine events."""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._requests = Counter()
+        self._latency = defaultdict(lambda: _Histogram(LATENCY_BUCKETS))
+        self._statements = defaultdict(lambda: _Histogram(STATEMENT_BUCKETS))
+        self._db_statements = Counter()
+        self._db_seconds = Counter()
+        self._db_rows = Counter()
+        self._n_plus_one = Counter()
+        self._slow = Counter()
+        self._collectors: List[Callable[[], list]] = []
+
+    def add_collector(self, collect: Callable[[], list]) -> None:
+        """Register ``collect() -> [(name, type, help, [(labels_dict, value), ...]), ...]``
+        for values owned by other components (caches, pools, limiters)."""
+        self._collectors.append(collect)
+
+    # engine events
+
+    def instrument(self, engine) -> None:
+        """Attach the cursor events to a sync ``Engine`` (use ``.sync_engine``
+        for an ``AsyncEngine``). Instrumenting an engine again is a no-op."""
+        if event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            context._metrics_started = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        started = getattr(context, "_metrics_started", None)
+        if stats is None or started is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        if cursor.description is not None:
+            context.cursor = _CountingCursor(cursor, stats)
+        if stats.shapes is not None:
+            stats.shapes[normalize(statement)] += 1
+            if elapsed * 1000 >= SLOW_QUERY_MS:
+                logger.warning("slow query (%.0f ms): %s", elapsed * 1000, " ".join(statement.split())[:500])
+                stats.shapes["__slow__"] += 1
+
+    # requests
+
+    @staticmethod
+    def _route(scope) -> str:
+        route = scope.get("route")
+        if route is None:
+            # answered before routing (e.g. by the response cache)
+            for candidate in scope["app"].routes:
+                if candidate.matches(scope)[0] == Match.FULL:
+                    route = candidate
+                    break
+        return getattr(route, "path", "unmatched")
+
+    def _record(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats) -> None:
+        key = (method, route)
+        flagged = []
+        if stats.shapes is not None:
+            slow = stats.shapes.pop("__slow__", 0)
+            flagged = [(shape, n) for shape, n in stats.shapes.items() if n >= N_PLUS_ONE_THRESHOLD]
+            for shape, n in flagged:
+                logger.warning("possible N+1 in %s %s: %d x %s", method, route, n, shape[:300])
+        with self._lock:
+            self._requests[(method, route, status)] += 1
+            self._latency[key].observe(LATENCY_BUCKETS, elapsed)
+            self._statements[key].observe(STATEMENT_BUCKETS, stats.statements)
+            self._db_statements[key] += stats.statements
+            self._db_seconds[key] += stats.db_seconds
+            self._db_rows[key] += stats.rows
+            if stats.shapes is not None:
+                self._n_plus_one[key] += len(flagged)
+                self._slow[key] += slow
+
+    # exposition
+
+    def render(self) -> str:
+        out = []
+
+        def header(name, kind, help_text):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, help_text, series, buckets):
+            header(name, "histogram", help_text)
+            for (method, route), h in sorted(series.items()):
+                for bound, n in zip(buckets, h.counts):
+                    out.append(f"{name}_bucket{_labels(method=method, route=route, le=_number(bound))} {n}")
+                out.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {h.count}")
+                out.append(f"{name}_sum{_labels(method=method, route=route)} {_number(h.total)}")
+                out.append(f"{name}_count{_labels(method=method, route=route)} {h.count}")
+
+        def counter(name, help_text, series):
+            header(name, "counter", help_text)
+            for (method, route), value in sorted(series.items()):
+                out.append(f"{name}{_labels(method=method, route=route)} {_number(value)}")
+
+        with self._lock:
+            header("http_requests_total", "counter", "Requests served, by route and status.")
+            for (method, route, status), n in sorted(self._requests.items(), key=lambda kv: tuple(map(str, kv[0]))):
+                out.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {n}")
+            histogram("http_request_duration_seconds", "Request latency.", self._latency, LATENCY_BUCKETS)
+            histogram("db_statements_per_request", "SQL statements issued per request.",
+                      self._statements, STATEMENT_BUCKETS)
+            counter("db_statements_total", "SQL statements issued.", self._db_statements)
+            counter("db_seconds_total", "Time spent executing SQL statements.", self._db_seconds)
+            counter("db_rows_fetched_total", "Rows fetched from the database.", self._db_rows)
+            if DEV_MODE:
+                counter("db_n_plus_one_total", "Statement shapes repeated N_PLUS_ONE_THRESHOLD times "
+                        "or more within one request.", self._n_plus_one)
+                counter("db_slow_queries_total", f"Statements slower than {SLOW_QUERY_MS:g} ms.", self._slow)
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                header(name, kind, help_text)
+                for labels, value in samples:
+                    out.append(f"{name}{_labels(**labels) if labels else ''} {_number(value)}")
+        return "\n".join(out) + "\n"
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding ``metrics``; add it last so it wraps the
+    others. It wraps the app directly rather than through ``call_next`` so a
+    request is recorded after its whole body, streamed ones included, has
+    been sent."""
+
+    def __init__(self, app, registry: Metrics = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            return await self.app(scope, receive, send)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+        recorded = False
+
+        def record() -> None:
+            nonlocal recorded
+            recorded = True
+            self.registry._record(scope["method"], self.registry._route(scope), status,
+                                  time.perf_counter() - started, stats)
+
+        async def send_counted(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not recorded:
+                record()
+
+        try:
+            await self.app(scope, receive, send_counted)
+        finally:
+            _current.reset(token)
+            if not recorded:
+                # failed or disconnected before the last chunk
+                record()
@@ -0,0 +1,182 @@
+# utils/migrate_ids.py
+"""Convert the id columns of an existing database between ``CHAR(36)`` and ``BINARY(16)``.
+
+    python -m utils.migrate_ids --to binary16            # dry run: plan and row counts
+    python -m utils.migrate_ids --to binary16 --apply
+    python -m utils.migrate_ids --to char36 --apply      # roll back
+
+Every table is copied into ``<table>_new`` with the target key type, in
+primary-key order and ``--batch-size`` rows per transaction. The tables are
+then swapped by renaming (``<table>`` -> ``<table>_old``, ``<table>_new`` ->
+``<table>``), indexes and foreign keys are attached to the new tables, and
+the old ones are dropped unless ``--keep-old`` is given.
+
+Id values do not change, so issued tokens, cursors and ids held by clients
+stay valid; only rows created afterwards get ``ID_VERSION`` ids. Stop the
+API workers first (writes made during the copy are not carried over) and
+restart them with ``ID_STORAGE`` set to the target, otherwise startup
+refuses to run against a mismatched layout.
+"""
+import argparse
+import sys
+import time
+from sqlalchemy import Column, ForeignKey, ForeignKeyConstraint, MetaData, Table, func, inspect, literal, select, text, tuple_
+from sqlalchemy.schema import AddConstraint
+from sqlalchemy.types import String
+from database import Base
+from models.keys import ID_STORAGE, UUIDKey
+
+# parents before children
+TABLES = ("users", "influencers", "brands", "brand_event_buckets", "geo_points", "search_trigrams", "influencer_search", "brand_search", "jobs")
+
+def stored_layout(bind):
+    """``"char36"`` or ``"binary16"`` as found in ``users.id``; ``None`` without a users table."""
+    inspector = inspect(bind)
+    if not inspector.has_table("users"):
+        return None
+    column = next(c for c in inspector.get_columns("users") if c["name"] == "id")
+    # SQLite reflects BINARY(16) as NUMERIC, so anything that is not text is binary
+    return "char36" if isinstance(column["type"], String) else "binary16"
+
+def check_id_storage(bind) -> None:
+    stored = stored_layout(bind)
+    if stored is not None and stored != ID_STORAGE:
+        raise RuntimeError(
+            f"users.id is stored as {stored} but ID_STORAGE={ID_STORAGE}; "
+            f"run `python -m utils.migrate_ids --to {ID_STORAGE} --apply` or set ID_STORAGE={stored}"
+        )
+
+def layout_tables(metadata: MetaData, storage: str, suffix: str = "", foreign_keys: bool = True) -> dict:
+    """Copies of the model tables named ``<table><suffix>`` whose id columns
+    use ``storage``, with foreign keys pointing at the suffixed parents.
+    Explicit indexes are left out; see ``_indexes``."""
+    tables = {}
+    for name in TABLES:
+        model_table = Base.metadata.tables[name]
+        columns = []
+        for column in model_table.columns:
+            keys = [ForeignKey(f"{fk.column.table.name}{suffix}.{fk.column.name}")
+                    for fk in column.foreign_keys] if foreign_keys else []
+            columns.append(Column(
+                column.name,
+                UUIDKey(storage) if isinstance(column.type, UUIDKey) else column.type.copy(),
+                *keys,
+                primary_key=column.primary_key,
+                nullable=column.nullable,
+                unique=column.unique,
+            ))
+        tables[name] = Table(name + suffix, metadata, *columns)
+    return tables
+
+def _indexes():
+    return [index for name in TABLES for index in Base.metadata.tables[name].indexes]
+
+def copy_table(engine, source: Table, target: Table, batch_size: int, log=print) -> int:
+    key = list(source.primary_key.columns)
+    last = None
+    copied = 0
+    t0 = time.perf_counter()
+    while True:
+        q = select(source).order_by(*key).limit(batch_size)
+        if last is not None:
+            # typed binds so binary ids are compared as bytes, not text
+            q = q.where(tuple_(*key) > tuple_(*(literal(v, c.type) for c, v in zip(key, last))))
+        with engine.begin() as conn:
+            rows = conn.execute(q).all()
+            if not rows:
+                break
+            conn.execute(target.insert(), [row._asdict() for row in rows])
+        copied += len(rows)
+        last = [getattr(rows[-1], c.name) for c in key]
+        if log and copied % (batch_size * 20) == 0:
+            log(f"  {source.name}: {copied} rows ({time.perf_counter() - t0:.0f}s)")
+    return copied
+
+def migrate(engine, target: str, batch_size: int = 5000, keep_old: bool = False, log=print) -> dict:
+    """Rewrite every table with ``target`` id storage. Returns rows copied per table."""
+    stored = stored_layout(engine)
+    if stored is None:
+        raise RuntimeError("no users table; nothing to migrate")
+    if stored == target:
+        raise RuntimeError(f"ids are already stored as {target}")
+    sqlite = engine.dialect.name == "sqlite"
+    existing = set(inspect(engine).get_table_names())
+    leftovers = sorted(existing & {f"{name}{suffix}" for name in TABLES for suffix in ("_new", "_old")})
+    if leftovers:
+        raise RuntimeError(f"tables left from an earlier run: {', '.join(leftovers)}; drop them first")
+
+    source = layout_tables(MetaData(), stored)
+    # SQLite cannot add a foreign key later but rewrites references on rename,
+    # so its new tables point at users_new from the start
+    new_metadata = MetaData()
+    new = layout_tables(new_metadata, target, suffix="_new", foreign_keys=sqlite)
+    present = [name for name in TABLES if name in existing]
+    new_metadata.create_all(engine, tables=[new[name] for name in present])
+
+    counts = {}
+    for name in present:
+        counts[name] = copy_table(engine, source[name], new[name], batch_size, log)
+        log(f"copied {name}: {counts[name]} rows")
+
+    with engine.begin() as conn:
+        for name in present:
+            expected = conn.execute(select(func.count()).select_from(source[name])).scalar()
+            if expected != counts[name]:
+                raise RuntimeError(f"{name}: {expected} rows in the source but {counts[name]} copied")
+        for index in _indexes():
+            if index.table.name in present:
+                index.drop(conn, checkfirst=True)
+        if sqlite:
+            for name in present:
+                conn.execute(text(f'ALTER TABLE "{name}" RENAME TO "{name}_old"'))
+            for name in present:
+                conn.execute(text(f'ALTER TABLE "{name}_new" RENAME TO "{name}"'))
+        else:
+            conn.execute(text("RENAME TABLE " + ", ".join(
+                f"`{name}` TO `{name}_old`, `{name}_new` TO `{name}`" for name in present
+            )))
+        for index in _indexes():
+            if index.table.name in present:
+                index.create(conn)
+        if not sqlite:
+            final = layout_tables(MetaData(), target)
+            for name in present:
+                for constraint in final[name].constraints:
+                    if isinstance(constraint, ForeignKeyConstraint):
+                        conn.execute(AddConstraint(constraint))
+        if not keep_old:
+            for name in reversed(present):
+                conn.execute(text(f'DROP TABLE {engine.dialect.identifier_preparer.quote(name + "_old")}'))
+    if sqlite and not keep_old:
+        # give the pages of the dropped tables back to the filesystem
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--to", required=True, choices=("char36", "binary16"))
+    parser.add_argument("--apply", action="store_true", help="perform the migration (default: dry run)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--keep-old", action="store_true", help="keep the original tables as <table>_old")
+    args = parser.parse_args(argv)
+
+    from database import engine
+    stored = stored_layout(engine)
+    print(f"{engine.url.render_as_string(hide_password=True)}: ids stored as {stored}")
+    if not args.apply:
+        with engine.connect() as conn:
+            for name in TABLES:
+                if inspect(conn).has_table(name):
+                    rows = conn.execute(select(func.count()).select_from(Base.metadata.tables[name])).scalar()
+                    print(f"  {name}: {rows} rows")
+        print(f"dry run; add --apply to rewrite them as {args.to}")
+        return 0
+    t0 = time.perf_counter()
+    counts = migrate(engine, args.to, args.batch_size, args.keep_old)
+    print(f"migrated {counts} to {args.to} in {time.perf_counter() - t0:.1f}s; restart with ID_STORAGE={args.to}")
+    return 0
+
+if __name__ == "__main__":
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+    sys.exit(main())
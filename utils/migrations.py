@@ -0,0 +1,106 @@
+# utils/migrations.py
+"""Versioned schema migrations, applied once per deploy rather than by every worker.
+
+    python -m utils.migrations            # apply pending migrations
+    python -m utils.migrations --status   # print the applied and the latest version
+
+``MIGRATIONS`` lists ``(version, name, apply)`` in order; ``apply`` gets a
+connection and runs in one transaction with the insert of its
+``schema_migrations`` row (MySQL commits DDL implicitly, so a failed
+migration there has to be finished or undone by hand). Migrations only ever
+get appended; a schema change means a new entry.
+
+At startup a worker only calls ``check``, which reads the recorded version
+instead of reflecting every table, and refuses to serve an older schema. ``AUTO_MIGRATE=true``
+makes startup apply pending migrations instead, which suits a single
+development process but not several workers starting at once.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select
+from database import Base
+
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+
+metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# tables as of version 1, parents before children; create_all skips existing
+# ones, so databases created by earlier releases at startup are adopted as is
+INITIAL_TABLES = (
+    "users", "influencers", "brands", "brand_event_buckets", "geo_points", "search_trigrams",
+    "influencer_search", "brand_search",
+)
+
+def _create_tables(conn, names) -> None:
+    import models.user, models.influencer, models.brand, models.brand_event, models.geo_point, models.search_trigram, models.influencer_search, models.brand_search, models.job, models.cache_generation  # noqa: F401
+    Base.metadata.create_all(conn, tables=[Base.metadata.tables[name] for name in names])
+
+MIGRATIONS = [
+    (1, "initial tables", lambda conn: _create_tables(conn, INITIAL_TABLES)),
+    (2, "background jobs", lambda conn: _create_tables(conn, ("jobs",))),
+    (3, "cache generations", lambda conn: _create_tables(conn, ("cache_generations",))),
+]
+LATEST = MIGRATIONS[-1][0]
+
+def current_version(conn) -> int:
+    """The highest applied version, 0 for a database never migrated."""
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+def migrate(engine, log=print) -> list:
+    """Apply the pending migrations in order. Returns the versions applied."""
+    with engine.begin() as conn:
+        metadata.create_all(conn)
+        version = current_version(conn)
+    applied = []
+    for number, name, apply in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            apply(conn)
+            conn.execute(schema_migrations.insert().values(version=number, name=name, applied_at=datetime.utcnow()))
+        applied.append(number)
+        if log:
+            log(f"applied {number}: {name}")
+    return applied
+
+def check(engine) -> int:
+    """Raise unless the database is at ``LATEST`` or newer. Returns its version."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < LATEST:
+        raise RuntimeError(
+            f"database schema is at version {version}, this release needs {LATEST}; "
+            "run `python -m utils.migrations` (or set AUTO_MIGRATE=true for a single dev process)"
+        )
+    return version
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--status", action="store_true", help="print the versions and apply nothing")
+    args = parser.parse_args(argv)
+
+    from database import engine
+    from utils.migrate_ids import check_id_storage
+    if args.status:
+        with engine.connect() as conn:
+            print(f"{engine.url.render_as_string(hide_password=True)}: "
+                  f"version {current_version(conn)}, latest {LATEST}")
+        return 0
+    # tables created below must match the id layout of the existing ones
+    check_id_storage(engine)
+    applied = migrate(engine)
+    print(f"schema at version {LATEST}" + ("" if applied else " (nothing to apply)"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# utils/pagination.py
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+SUGGESTIONS_PAGE_SIZE = 20
+STREAM_CHUNK_SIZE = 1000
+
+def encode_cursor(last_key: str) -> str:
+    """Turn the sort key of the last row on a page into an opaque token."""
+    raw = json.dumps({"k": last_key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[str]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return str(data["k"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_page(q, key_column, cursor: Optional[str], limit: int, key=None):
+    """Apply keyset pagination to ``q`` ordered by ``key_column``.
+
+    ``key_column`` must belong to the first entity of each row unless
+    ``key(row)`` is given to read the sort key, e.g. from a column
+    projection. One extra row is fetched to find out whether another page
+    exists, so no COUNT query is needed. Returns ``(rows, next_cursor)``.
+    """
+    last_key = decode_cursor(cursor)
+    if last_key is not None:
+        q = q.filter(key_column > last_key)
+    rows = q.order_by(key_column).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(key(last) if key else getattr(last[0], key_column.key))
+    return rows, next_cursor
+
+def stream_ndjson(q, serialize, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Yield one JSON line per row, reading ``q`` through a server-side cursor.
+
+    ``q`` must be bound to a session owned by the caller of the generator;
+    the session is closed once the last row has been sent.
+    """
+    db = q.session
+    try:
+        rows = q.execution_options(stream_results=True).yield_per(chunk_size)
+        for row in rows:
+            yield serialize(*row) + "\n"
+    finally:
+        db.close()
+
+async def stream_ndjson_async(session_factory, stmt, serialize, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Async counterpart of ``stream_ndjson`` for ``DB_ASYNC`` deployments.
+
+    Runs ``stmt`` on a fresh session from ``session_factory`` so the stream
+    is independent of the request's session.
+    """
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for row in result:
+            yield serialize(*row) + "\n"
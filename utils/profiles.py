@@ -0,0 +1,92 @@
+# utils/profiles.py
+"""Single-transaction profile writes behind the influencer/brand update endpoints.
+
+``save_profile`` changes the caller's user row with one ``UPDATE`` and
+creates or changes their profile with one upsert keyed by the unique
+``user_id`` (``INSERT ... ON DUPLICATE KEY UPDATE`` on MySQL, ``INSERT ...
+ON CONFLICT DO UPDATE`` on SQLite), so nothing is read before writing and
+two concurrent first saves cannot both try to insert a profile. Only the
+columns the request supplies appear in either statement.
+
+On dialects with ``RETURNING`` the written rows come back from the
+statements themselves; elsewhere one joined ``SELECT`` in the same
+transaction reads them. The trigram index is rewritten for the supplied
+text columns, the geo points for a supplied location, the event buckets
+for a supplied brand event date and the caller's read-model row, in the
+same transaction, which also publishes the change to the other processes
+(``utils.generations``).
+"""
+from typing import Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.orm import Bundle
+from models.brand import Brand
+from models.keys import new_id
+from models.user import User
+from utils.event_index import index_events
+from utils.generations import generation_sync
+from utils.geo import FIELDS as GEO_FIELDS, index_locations
+from utils.read_model import project
+from utils.search_index import FIELDS, index_changes
+from utils.upsert import upsert_statement
+
+# user columns needed by the in-memory views; never the password hash
+USER_COLUMNS = (User.id, User.name, User.email, User.tag, User.location, User.role, User.created_at)
+
+def save_profile(db, model, user_id: str, user_values: dict, profile_values: dict,
+                 need_user: bool = False) -> Tuple[object, Optional[object]]:
+    """Write ``user_values`` to user ``user_id`` and upsert ``profile_values``
+    into its ``model`` profile, then commit.
+
+    Returns ``(profile, user)`` rows with attribute access. ``user`` is only
+    guaranteed when ``need_user`` is set; it is ``None`` otherwise unless it
+    came back for free from the ``UPDATE``.
+    """
+    dialect = db.get_bind().dialect
+    profile_columns = tuple(model.__table__.c)
+    user = None
+    if user_values:
+        stmt = update(User).where(User.id == user_id).values(user_values) \
+            .execution_options(synchronize_session=False)
+        if dialect.update_returning:
+            user = db.execute(stmt.returning(*USER_COLUMNS)).one()
+        else:
+            db.execute(stmt)
+
+    # with nothing to change, a no-op assignment still returns the stored row
+    update_cols = list(profile_values) or ["user_id"]
+    stmt = upsert_statement(
+        db, model, [{"id": new_id(), "user_id": user_id, **profile_values}], ["user_id"], update_cols,
+    )
+    if dialect.insert_returning:
+        profile = db.execute(stmt.returning(*profile_columns)).one()
+    else:
+        profile = None
+        db.execute(stmt)
+    if profile is None or (need_user and user is None):
+        profile, user = db.execute(
+            select(Bundle("profile", *profile_columns), Bundle("user", *USER_COLUMNS))
+            .join_from(model, User, model.user_id == User.id)
+            .where(model.user_id == user_id)
+        ).one()
+
+    changes = []
+    for field, (indexed_model, attr) in FIELDS.items():
+        if indexed_model is User and attr in user_values:
+            changes.append((field, user_id, user_values[attr]))
+        elif indexed_model is model and attr in profile_values:
+            changes.append((field, profile.id, profile_values[attr]))
+    index_changes(db, changes)
+    points = []
+    for field, (indexed_model, attr) in GEO_FIELDS.items():
+        if indexed_model is User and attr in user_values:
+            points.append((field, user_id, user_values[attr]))
+        elif indexed_model is model and attr in profile_values:
+            points.append((field, profile.id, profile_values[attr]))
+    index_locations(db, points)
+    if model is Brand and ("event_start" in profile_values or "event_end" in profile_values):
+        index_events(db, [(profile.id, profile.event_start, profile.event_end)])
+    project(db, model, [user_id])
+    published = generation_sync.publish(db, User.__tablename__, model.__tablename__)
+    db.commit()
+    generation_sync.seen(published)
+    return profile, user
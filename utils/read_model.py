@@ -0,0 +1,117 @@
+# utils/read_model.py
+"""Denormalized read model behind the discovery endpoints.
+
+Discovery filters mix user columns (tag, location, role) with profile
+columns (reach, verified, brand tag and location), so on the profile/user
+join no single index covers a query: the database walks one table and
+probes the other per row. ``influencer_search`` and ``brand_search`` hold
+one merged row per profile, with columns named after ``InfluencerFullOut``
+and ``BrandFullOut``, and composite indexes over the merged fields, e.g.
+``(user_tag, user_location, reach DESC, influencer_id)`` for the leaderboard
+and ``(user_tag, user_location, influencer_id)`` for id-ordered filter pages.
+
+The rows are rewritten from the join by ``project`` in the same transaction
+as every write to a user or profile (one ``DELETE`` and one ``INSERT ...
+SELECT`` per table), so they are never behind the tables they copy. With
+``READ_MODEL_ENABLED`` the filter, facets and trending queries read the
+read model instead of the join; ``influencer_columns``/``brand_columns``
+give the columns to filter and project on either way. Run ``python -m
+utils.read_model`` once to backfill existing data before enabling it.
+"""
+import os
+from sqlalchemy import delete, insert, select
+from models.brand import Brand
+from models.brand_search import BrandSearch
+from models.influencer import Influencer
+from models.influencer_search import InfluencerSearch
+from models.user import User
+
+READ_MODEL_ENABLED = os.getenv("READ_MODEL_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# InfluencerFullOut's fields as columns of the profile/user join, in declaration order
+INFLUENCER_JOIN = {
+    "user_id": User.id, "user_name": User.name, "user_email": User.email, "user_tag": User.tag,
+    "user_location": User.location, "user_role": User.role, "user_created_at": User.created_at,
+    "influencer_id": Influencer.id, "reach": Influencer.reach, "verified": Influencer.verified,
+    "influencer_email": Influencer.email,
+}
+# BrandFullOut's fields as columns of the profile/user join, in declaration order
+BRAND_JOIN = {
+    "user_id": User.id, "user_name": User.name, "user_email": User.email, "user_tag": User.tag,
+    "user_location": User.location, "user_role": User.role, "user_created_at": User.created_at,
+    "brand_id": Brand.id, "brand_name": Brand.name, "brand_email": Brand.email,
+    "phone_number": Brand.phone_number, "brand_tag": Brand.tag, "brand_location": Brand.location,
+    "event_start": Brand.event_start, "event_end": Brand.event_end,
+}
+INFLUENCER_SEARCH = {name: getattr(InfluencerSearch, name) for name in INFLUENCER_JOIN}
+BRAND_SEARCH = {name: getattr(BrandSearch, name) for name in BRAND_JOIN}
+
+# read-model table -> (profile model, source columns by read-model column)
+VIEWS = {
+    InfluencerSearch: (Influencer, INFLUENCER_JOIN),
+    BrandSearch: (Brand, BRAND_JOIN),
+}
+
+def influencer_columns() -> dict:
+    """``InfluencerFullOut`` field -> column of the query ``influencer_query`` builds."""
+    return INFLUENCER_SEARCH if READ_MODEL_ENABLED else INFLUENCER_JOIN
+
+def brand_columns() -> dict:
+    """``BrandFullOut`` field -> column of the query ``brand_query`` builds."""
+    return BRAND_SEARCH if READ_MODEL_ENABLED else BRAND_JOIN
+
+def influencer_query(db):
+    """Every influencer with its user: the read model when enabled, else the join."""
+    if READ_MODEL_ENABLED:
+        return db.query(InfluencerSearch)
+    return db.query(Influencer, User).select_from(Influencer).join(User, Influencer.user_id == User.id)
+
+def brand_query(db):
+    """Every brand with its user: the read model when enabled, else the join."""
+    if READ_MODEL_ENABLED:
+        return db.query(BrandSearch)
+    return db.query(Brand, User).select_from(Brand).join(User, Brand.user_id == User.id)
+
+def _copy(table, where):
+    """``INSERT ... SELECT`` of the joined rows matching ``where`` into ``table``."""
+    model, columns = VIEWS[table]
+    rows = select(*columns.values()).join_from(model, User, model.user_id == User.id).where(where)
+    return insert(table).from_select(list(columns), rows)
+
+def project(db, model, user_ids) -> None:
+    """Rewrite the ``model`` (``Influencer`` or ``Brand``) read-model rows of
+    ``user_ids`` from the tables; call after the writes and before ``commit``."""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return
+    table = InfluencerSearch if model is Influencer else BrandSearch
+    db.flush()
+    db.execute(delete(table).where(table.user_id.in_(user_ids)))
+    db.execute(_copy(table, User.id.in_(user_ids)))
+
+def rebuild(db, batch_size: int = 5000) -> int:
+    """Recreate both tables from the join. Returns rows written."""
+    written = 0
+    for table, (model, _) in VIEWS.items():
+        db.execute(delete(table))
+        last_id = ""
+        while True:
+            ids = db.execute(
+                select(model.id).where(model.id > last_id).order_by(model.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            written += db.execute(_copy(table, (model.id > last_id) & (model.id <= ids[-1]))).rowcount
+            last_id = ids[-1]
+    db.commit()
+    return written
+
+if __name__ == "__main__":
+    from database import SessionLocal, engine
+    from utils.migrations import check
+    check(engine)
+    session = SessionLocal()
+    try:
+        print(f"projected {rebuild(session)} read-model rows")
+    finally:
+        session.close()
@@ -0,0 +1,325 @@
+# utils/read_routing.py
+"""Read/write session routing between the primary and read replicas.
+
+With ``READ_DATABASE_URLS`` set, the read-only discovery endpoints (filter,
+facets, trending and suggestions) take their session from
+``routers.dependencies.get_read_db``, which asks ``read_router`` for a
+healthy replica; everything else, and every write, stays on the primary
+``engine``. ``READ_ROUTING_POLICY`` picks among the healthy replicas:
+``round_robin`` takes them in turn, ``least_connections`` takes the one with
+the fewest checked-out connections (ties in turn).
+
+Each replica has its own pool and is probed with ``SELECT 1`` every
+``READ_HEALTH_INTERVAL`` seconds; on MySQL the probe also reads the
+replication lag and fails above ``READ_MAX_LAG_SECONDS``. A failed probe, or
+a dropped connection seen by a request, takes the replica out of rotation
+until a probe succeeds again. With no healthy replica the reads go to the
+primary.
+
+Replicas trail the primary, so a caller who has just written reads from
+the primary for ``READ_YOUR_WRITES_SECONDS``: the write paths call
+``wrote(user_id)`` after committing, and reads carrying that user's bearer
+token are pinned. Shared state built during that window (cached responses,
+suggestion snapshots) may come from a replica that has not caught up yet,
+so it is kept only until the window has passed (see
+``ResponseCache.settle_seconds``). Pins are per process, like the caches.
+
+Two SQLite files are enough to try it locally: point ``READ_DATABASE_URLS``
+at the second one and run ``python -m utils.read_routing copy`` to copy the
+primary into it (a stand-in for replication); ``python -m utils.read_routing
+check`` probes every replica once.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+import database
+from utils.token_utils import decode_token
+
+READ_ROUTING_POLICY = os.getenv("READ_ROUTING_POLICY", "round_robin")
+READ_HEALTH_INTERVAL = float(os.getenv("READ_HEALTH_INTERVAL", "5"))
+READ_MAX_LAG_SECONDS = float(os.getenv("READ_MAX_LAG_SECONDS", "30"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+POLICIES = ("round_robin", "least_connections")
+# pinned users kept before expired pins are swept
+MAX_PINS = 100000
+
+logger = logging.getLogger(__name__)
+
+def _replication_lag(conn) -> Optional[float]:
+    """Seconds the replica behind ``conn`` trails its source; ``None`` where
+    the dialect does not report it. Stopped replication counts as infinite."""
+    if conn.dialect.name != "mysql":
+        return None
+    for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                              ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+        try:
+            row = conn.execute(text(statement)).mappings().first()
+        except DBAPIError:
+            # older server or missing REPLICATION CLIENT privilege
+            continue
+        if row is None:
+            return None
+        lag = row.get(column)
+        return float("inf") if lag is None else float(lag)
+    return None
+
+class Replica:
+    """One replica: its sync (and, with ``DB_ASYNC``, async) pool and health."""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine(url, pool_pre_ping=True)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = None
+        self.async_session_factory = None
+        engines = [self.engine]
+        if database.DB_ASYNC:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+            self.async_engine = create_async_engine(database.to_async_url(url), pool_pre_ping=True)
+            self.async_session_factory = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+            engines.append(self.async_engine.sync_engine)
+        self.healthy = True
+        self.connections = 0
+        self.reads = 0
+        self.failures = 0
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        for engine in engines:
+            event.listen(engine, "checkout", self._checkout)
+            event.listen(engine, "checkin", self._checkin)
+            event.listen(engine, "handle_error", self._handle_error)
+
+    def _checkout(self, dbapi_connection, record, proxy) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def _checkin(self, dbapi_connection, record) -> None:
+        with self._lock:
+            self.connections -= 1
+
+    def _handle_error(self, context) -> None:
+        if context.is_disconnect and self.healthy:
+            self.mark_down(f"disconnect: {context.original_exception.__class__.__name__}")
+
+    def mark_down(self, error: str) -> None:
+        if self.healthy:
+            logger.warning("read replica %s out of rotation: %s", self.name, error)
+        self.healthy = False
+        self.error = error
+        self.failures += 1
+
+    def probe(self, max_lag: float) -> bool:
+        """Check the replica once and update its health; returns it."""
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                lag = _replication_lag(conn)
+        except Exception as e:
+            self.mark_down(f"{e.__class__.__name__}: {e}".splitlines()[0][:200])
+        else:
+            self.lag = lag
+            if lag is not None and lag > max_lag:
+                self.mark_down(f"replication lag {lag:g}s over {max_lag:g}s")
+            else:
+                if not self.healthy:
+                    logger.info("read replica %s back in rotation", self.name)
+                self.healthy = True
+                self.error = None
+        self.checked_at = time.time()
+        return self.healthy
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+
+    def stats(self) -> dict:
+        return {"name": self.name, "url": self.url, "healthy": self.healthy, "connections": self.connections,
+                "reads": self.reads, "failures": self.failures, "lag_seconds": self.lag,
+                "error": self.error, "checked_at": self.checked_at}
+
+class ReadRouter:
+    """Chooses the session target of each discovery read; see the module docstring."""
+
+    def __init__(self, urls: List[str] = database.READ_DATABASE_URLS, policy: str = READ_ROUTING_POLICY,
+                 health_interval: float = READ_HEALTH_INTERVAL, max_lag: float = READ_MAX_LAG_SECONDS,
+                 sticky_seconds: float = READ_YOUR_WRITES_SECONDS):
+        if policy not in POLICIES:
+            raise RuntimeError(f"READ_ROUTING_POLICY must be one of {', '.join(POLICIES)}, got {policy!r}")
+        self.policy = policy
+        self.health_interval = health_interval
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        # user id -> monotonic time until which their reads go to the primary
+        self._pins: Dict[str, float] = {}
+        self.pinned_reads = 0
+        self.fallback_reads = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    @property
+    def settle_seconds(self) -> float:
+        """How long data read right after a write may still predate it."""
+        return self.sticky_seconds if self.enabled else 0.0
+
+    # read-your-writes
+
+    def wrote(self, user_id: str) -> None:
+        """Pin ``user_id``'s reads to the primary; call after the write commits."""
+        if not self.enabled or self.sticky_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._pins) >= MAX_PINS:
+                self._pins = {uid: until for uid, until in self._pins.items() if until > now}
+            self._pins[user_id] = now + self.sticky_seconds
+
+    def pinned(self, authorization: Optional[str]) -> bool:
+        """Whether the bearer token in ``authorization`` belongs to a user
+        who wrote within the last ``READ_YOUR_WRITES_SECONDS``."""
+        if not self._pins or not authorization:
+            return False
+        try:
+            _, token = authorization.split()
+        except ValueError:
+            return False
+        payload = decode_token(token)
+        user_id = payload.get("sub") if payload else None
+        with self._lock:
+            until = self._pins.get(user_id)
+            if until is None:
+                return False
+            if time.monotonic() >= until:
+                del self._pins[user_id]
+                return False
+            return True
+
+    # routing
+
+    def choose(self, authorization: Optional[str] = None) -> Optional[Replica]:
+        """The replica to read from, or ``None`` for the primary."""
+        if not self.replicas:
+            return None
+        if self.pinned(authorization):
+            with self._lock:
+                self.pinned_reads += 1
+            return None
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            with self._lock:
+                self.fallback_reads += 1
+            return None
+        turn = next(self._turn) % len(healthy)
+        if self.policy == "least_connections":
+            rotated = healthy[turn:] + healthy[:turn]
+            replica = min(rotated, key=lambda r: r.connections)
+        else:
+            replica = healthy[turn]
+        with self._lock:
+            replica.reads += 1
+        return replica
+
+    # health checks
+
+    def check(self) -> int:
+        """Probe every replica once; returns how many are healthy."""
+        return sum(replica.probe(self.max_lag) for replica in self.replicas)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("read replica health check failed")
+
+    def start(self) -> None:
+        """Probe the replicas and keep probing them in a background thread."""
+        if not self.replicas or self._thread is not None:
+            return
+        self.check()
+        if self.health_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="read-replica-health")
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        for replica in self.replicas:
+            replica.dispose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pins = len(self._pins)
+        return {"enabled": self.enabled, "policy": self.policy, "health_interval": self.health_interval,
+                "read_your_writes_seconds": self.sticky_seconds, "pinned_users": pins,
+                "pinned_reads": self.pinned_reads, "fallback_reads": self.fallback_reads,
+                "replicas": [replica.stats() for replica in self.replicas]}
+
+    def collect(self) -> list:
+        """``metrics.add_collector`` hook."""
+        if not self.replicas:
+            return []
+        return [
+            ("read_replica_healthy", "gauge", "1 while the replica is in rotation.",
+             [({"replica": r.name}, int(r.healthy)) for r in self.replicas]),
+            ("read_replica_connections", "gauge", "Connections checked out from the replica's pools.",
+             [({"replica": r.name}, r.connections) for r in self.replicas]),
+            ("read_routed_total", "counter", "Discovery reads by target.",
+             [({"target": r.name}, r.reads) for r in self.replicas]
+             + [({"target": "primary-pinned"}, self.pinned_reads),
+                ({"target": "primary-fallback"}, self.fallback_reads)]),
+        ]
+
+read_router = ReadRouter()
+
+def copy_primary(replica_urls: List[str] = database.READ_DATABASE_URLS) -> None:
+    """Overwrite each SQLite replica file with a consistent copy of the
+    SQLite primary, through SQLite's online backup."""
+    import sqlite3
+    source = make_url(database.DATABASE_URL)
+    if source.get_backend_name() != "sqlite":
+        raise RuntimeError("copy only works with a SQLite DATABASE_URL; use the server's replication instead")
+    with sqlite3.connect(source.database) as src:
+        for url in replica_urls:
+            target = make_url(url)
+            if target.get_backend_name() != "sqlite":
+                raise RuntimeError(f"not a SQLite replica: {target.render_as_string(hide_password=True)}")
+            with sqlite3.connect(target.database) as dst:
+                src.backup(dst)
+
+if __name__ == "__main__":
+    import sys
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if not read_router.replicas:
+        sys.exit("READ_DATABASE_URLS is not set")
+    if command == "copy":
+        copy_primary()
+        print(f"copied {database.DATABASE_URL} to {len(read_router.replicas)} replica(s)")
+    elif command == "check":
+        healthy = read_router.check()
+        for replica in read_router.replicas:
+            state = "ok" if replica.healthy else f"DOWN ({replica.error})"
+            lag = "" if replica.lag is None else f" lag={replica.lag:g}s"
+            print(f"{replica.name} {replica.url}: {state}{lag}")
+        sys.exit(0 if healthy else 1)
+    else:
+        sys.exit("usage: python -m utils.read_routing [check|copy]")
@@ -0,0 +1,209 @@
+# utils/response_cache.py
+"""In-process cache for the read-heavy discovery endpoints.
+
+A response is cached under its path plus the normalized query string (and
+the bearer token for per-user routes) together with the generation of every
+table it was built from. Writes call ``bump`` for the tables they touched
+after committing, which makes every dependent entry stale at once without
+scanning the cache. Each cached response carries a strong ``ETag`` so
+clients can revalidate with ``If-None-Match`` and get a bodyless 304.
+
+Generations are per process. The write paths also publish their tables
+through ``utils.generations``, and every worker bumps its own generations
+for a table another process wrote, within ``CACHE_SYNC_SECONDS``. As a
+backstop (a failed poll, or a write made outside the app), every entry
+also expires ``RESPONSE_CACHE_TTL_SECONDS`` after it was stored.
+
+With read replicas (see ``utils.read_routing``), a response built within
+``settle_seconds`` of a write to its tables may have been read from a
+replica that has not caught up; such entries expire once that window has
+passed instead of living until the next write.
+
+A hit is served before the route's dependencies run, so an entry of a
+per-user route never outlives the ``exp`` of the bearer token it was built
+for; after that the request reaches the route again and gets its 401.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from starlette.responses import Response
+from utils.token_utils import decode_token
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+# longest an entry is served, whatever happened to the generations
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+# larger bodies are served normally but not kept
+RESPONSE_CACHE_MAX_BODY = int(os.getenv("RESPONSE_CACHE_MAX_BODY", str(1024 * 1024)))
+
+# path -> (tables the response is built from, varies by Authorization)
+CACHED_ROUTES: Dict[str, Tuple[Tuple[str, ...], bool]] = {
+    "/influencers/filter": (("users", "influencers"), False),
+    "/influencers/facets": (("users", "influencers"), False),
+    "/influencers/suggestions": (("users", "brands"), True),
+    "/brands/filter": (("users", "brands"), False),
+    "/brands/facets": (("users", "brands"), False),
+    "/brands/trending": (("users", "influencers"), False),
+    "/brands/suggestions": (("users", "influencers"), True),
+}
+# response headers replayed from the cache; the rest are recomputed
+KEPT_HEADERS = ("content-type", "x-next-cursor")
+
+class _Entry:
+    __slots__ = ("generations", "body", "headers", "etag", "expires_at")
+
+    def __init__(self, generations, body, headers, etag, expires_at):
+        self.generations = generations
+        self.body = body
+        self.headers = headers
+        self.etag = etag
+        self.expires_at = expires_at
+
+def _token_expires_at(authorization: Optional[str]) -> Optional[float]:
+    """Monotonic time at which the bearer token in ``authorization`` expires;
+    ``None`` when it carries no ``exp`` or is invalid."""
+    try:
+        _, token = (authorization or "").split()
+    except ValueError:
+        return None
+    payload = decode_token(token)
+    if not payload or "exp" not in payload:
+        return None
+    return time.monotonic() + (float(payload["exp"]) - time.time())
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    # weak comparison, as RFC 9110 prescribes for If-None-Match
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class ResponseCache:
+    """Bounded LRU of rendered GET responses, invalidated by table generation."""
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, enabled: bool = RESPONSE_CACHE_ENABLED,
+                 settle_seconds: float = 0.0, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        if ttl_seconds <= 0:
+            raise RuntimeError("RESPONSE_CACHE_TTL_SECONDS must be positive; set RESPONSE_CACHE_ENABLED=false instead")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.settle_seconds = settle_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._bumped_at: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def generations(self, tables) -> tuple:
+        with self._lock:
+            return tuple(self._generations.get(t, 0) for t in tables)
+
+    def bump(self, *tables: str) -> None:
+        """Mark ``tables`` as written; call after the write has committed."""
+        now = time.monotonic()
+        with self._lock:
+            for t in tables:
+                self._generations[t] = self._generations.get(t, 0) + 1
+                self._bumped_at[t] = now
+
+    def settles_at(self, tables) -> float:
+        """Monotonic time until which data read for ``tables`` may predate
+        their last write on a lagging replica; 0 without ``settle_seconds``."""
+        if not self.settle_seconds:
+            return 0.0
+        with self._lock:
+            last = max((self._bumped_at.get(t, 0.0) for t in tables), default=0.0)
+        return last + self.settle_seconds if last else 0.0
+
+    @staticmethod
+    def key_for(request, vary_auth: bool) -> tuple:
+        params = sorted((k, v) for k, v in parse_qsl(request.url.query) if v != "")
+        auth = request.headers.get("authorization") if vary_auth else None
+        return (request.url.path, urlencode(params), auth)
+
+    def get(self, key: tuple, generations: tuple) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.generations != generations or time.monotonic() >= entry.expires_at:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "not_modified": self.not_modified,
+                    "size": len(self._entries), "max_size": self.max_size, "enabled": self.enabled, "ttl_seconds": self.ttl_seconds,
+                    "settle_seconds": self.settle_seconds, "generations": dict(self._generations)}
+
+    def _reply(self, request, body: bytes, headers: dict, etag: str, vary_auth: bool) -> Response:
+        headers = dict(headers, etag=etag)
+        headers["cache-control"] = "private, no-cache" if vary_auth else "no-cache"
+        if vary_auth:
+            headers["vary"] = "Authorization"
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            with self._lock:
+                self.not_modified += 1
+            headers.pop("content-type", None)
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, status_code=200, headers=headers)
+
+    async def middleware(self, request, call_next):
+        """``app.middleware("http")`` hook serving ``CACHED_ROUTES`` from the cache."""
+        route = CACHED_ROUTES.get(request.url.path)
+        if not self.enabled or route is None or request.method != "GET":
+            return await call_next(request)
+        tables, vary_auth = route
+        key = self.key_for(request, vary_auth)
+        # read before the handler runs, so a write that lands meanwhile
+        # leaves this entry already stale
+        generations = self.generations(tables)
+        settles_at = self.settles_at(tables)
+        entry = self.get(key, generations)
+        if entry is not None:
+            return self._reply(request, entry.body, entry.headers, entry.etag, vary_auth)
+
+        response = await call_next(request)
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or not content_type.startswith("application/json"):
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers}
+        etag = _etag(body)
+        if len(body) <= RESPONSE_CACHE_MAX_BODY:
+            now = time.monotonic()
+            deadlines = [now + self.ttl_seconds] + ([settles_at] if settles_at > now else [])
+            if vary_auth:
+                token_expires_at = _token_expires_at(request.headers.get("authorization"))
+                if token_expires_at is None:
+                    # the route answered 200, so this should not happen; do not keep it
+                    return self._reply(request, body, headers, etag, vary_auth)
+                deadlines.append(token_expires_at)
+            self.put(key, _Entry(generations, body, headers, etag, min(deadlines)))
+        return self._reply(request, body, headers, etag, vary_auth)
+
+response_cache = ResponseCache()
@@ -0,0 +1,153 @@
+# utils/search_index.py
+"""Trigram index behind the free-text ``ilike('%term%')`` filters.
+
+Every indexed column value is split into lowercase 3-grams stored in the
+``search_trigrams`` side table. A search term of three or more characters can
+only match rows that contain all of its 3-grams, so the filter endpoints look
+those rows up through the table's primary key, starting from the rarest gram,
+and run the ``ilike`` only on the candidates instead of scanning
+users/brands/influencers.
+
+The table is written in the same transaction as the row it describes. Run
+``python -m utils.search_index`` once to backfill existing data before setting
+``SEARCH_INDEX_ENABLED=true``.
+"""
+import os
+from sqlalchemy import and_, delete, func, insert, inspect, or_, select
+from sqlalchemy.orm import aliased
+from models.brand import Brand
+from models.influencer import Influencer
+from models.search_trigram import SearchTrigram
+from models.user import User
+
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+GRAM = 3
+# grams of a term that are probed; the rarest few already prune almost everything
+MAX_PROBE_GRAMS = 4
+FREQUENCY_CAP = 10000
+
+# field name -> (model, indexed attribute)
+FIELDS = {
+    "user.name": (User, "name"),
+    "user.email": (User, "email"),
+    "brand.name": (Brand, "name"),
+    "brand.email": (Brand, "email"),
+    "brand.phone_number": (Brand, "phone_number"),
+    "influencer.email": (Influencer, "email"),
+}
+
+def trigrams(value) -> set:
+    if not value:
+        return set()
+    text = str(value).lower()
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+def index_value(db, field: str, row_id: str, value) -> None:
+    db.execute(delete(SearchTrigram).where(SearchTrigram.field == field, SearchTrigram.row_id == row_id))
+    grams = trigrams(value)
+    if grams:
+        db.execute(insert(SearchTrigram), [{"field": field, "gram": g, "row_id": row_id} for g in grams])
+
+def index_values(db, field: str, items) -> None:
+    """Batch form of ``index_value`` for ``(row_id, value)`` pairs."""
+    items = list(items)
+    if not items:
+        return
+    db.execute(delete(SearchTrigram).where(
+        SearchTrigram.field == field, SearchTrigram.row_id.in_([row_id for row_id, _ in items])
+    ))
+    rows = [{"field": field, "gram": g, "row_id": row_id} for row_id, value in items for g in trigrams(value)]
+    if rows:
+        db.execute(insert(SearchTrigram), rows)
+
+def index_changes(db, items) -> None:
+    """Rewrite the trigrams of ``(field, row_id, value)`` triples spanning
+    several fields with one ``DELETE`` and one ``INSERT``."""
+    items = list(items)
+    if not items:
+        return
+    db.execute(delete(SearchTrigram).where(or_(*(
+        and_(SearchTrigram.field == field, SearchTrigram.row_id == row_id) for field, row_id, _ in items
+    ))))
+    rows = [{"field": field, "gram": g, "row_id": row_id} for field, row_id, value in items for g in trigrams(value)]
+    if rows:
+        db.execute(insert(SearchTrigram), rows)
+
+def reindex(db, obj) -> None:
+    """Refresh the trigrams of every indexed attribute of ``obj`` that changed
+    in this session. Call before ``commit`` so both land in one transaction."""
+    state = inspect(obj)
+    for field, (model, attr) in FIELDS.items():
+        if isinstance(obj, model) and state.attrs[attr].history.has_changes():
+            index_value(db, field, obj.id, getattr(obj, attr))
+
+def _gram_frequency(db, field: str, gram: str) -> int:
+    """Posting-list length of ``gram``, capped at ``FREQUENCY_CAP`` so the
+    count itself stays a short index range scan."""
+    capped = (
+        select(SearchTrigram.row_id)
+        .where(SearchTrigram.field == field, SearchTrigram.gram == gram)
+        .limit(FREQUENCY_CAP)
+        .subquery()
+    )
+    return db.execute(select(func.count()).select_from(capped)).scalar()
+
+def narrow(q, field: str, term: str, id_column=None):
+    """Restrict ``q`` to rows whose ``field`` contains the rarest 3-grams of ``term``.
+
+    The candidate set is produced by walking the shortest posting list and
+    probing the others by primary key, so its cost follows the rarest gram
+    rather than the table size. The caller keeps its ``ilike`` filter; this
+    only removes rows that cannot match. Short terms and terms with LIKE
+    wildcards are left to the ``ilike``. ``id_column`` is the column of ``q``
+    holding the row id ``field`` is keyed by, the indexed model's ``id`` by
+    default.
+    """
+    if not SEARCH_INDEX_ENABLED or len(term) < GRAM or "%" in term or "_" in term:
+        return q
+    if id_column is None:
+        id_column = FIELDS[field][0].id
+    ranked = sorted(trigrams(term), key=lambda g: _gram_frequency(q.session, field, g))[:MAX_PROBE_GRAMS]
+    driver = aliased(SearchTrigram)
+    candidates = select(driver.row_id).where(driver.field == field, driver.gram == ranked[0])
+    for gram in ranked[1:]:
+        probe = aliased(SearchTrigram)
+        candidates = candidates.join(
+            probe,
+            (probe.field == field) & (probe.gram == gram) & (probe.row_id == driver.row_id),
+        )
+    return q.filter(id_column.in_(candidates))
+
+def rebuild(db, batch_size: int = 5000) -> int:
+    """Recreate the whole index from the main tables. Returns rows written."""
+    db.execute(delete(SearchTrigram))
+    written = 0
+    for field, (model, attr) in FIELDS.items():
+        column = getattr(model, attr)
+        last_id = ""
+        while True:
+            rows = db.execute(
+                select(model.id, column)
+                .where(model.id > last_id, column.isnot(None))
+                .order_by(model.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            batch = [{"field": field, "gram": g, "row_id": row_id} for row_id, value in rows for g in trigrams(value)]
+            if batch:
+                db.execute(insert(SearchTrigram), batch)
+                written += len(batch)
+            last_id = rows[-1][0]
+    db.commit()
+    return written
+
+if __name__ == "__main__":
+    from database import SessionLocal, engine
+    from utils.migrations import check
+    check(engine)
+    session = SessionLocal()
+    try:
+        print(f"indexed {rebuild(session)} trigram rows")
+    finally:
+        session.close()
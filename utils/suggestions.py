@@ -0,0 +1,269 @@
+# utils/suggestions.py
+"""Scored top-K ranking behind ``/influencers/suggestions`` and
+``/brands/suggestions``.
+
+Candidates are held in a columnar snapshot: one NumPy array per scored
+attribute, with tags and locations dictionary-encoded to integer codes. A
+request scores every candidate in a handful of vectorized operations and
+picks the best ``limit`` with ``argpartition`` instead of sorting all of
+them. Locations score by distance between their gazetteer places (see
+``utils.geo``), computed once per distinct location rather than per
+candidate, so "Navi Mumbai" counts as close to "Mumbai".
+
+The snapshot is rebuilt with one joined query when a write has bumped the
+generation of a table it reads (see ``utils.response_cache``), or after
+``SUGGESTIONS_REFRESH_SECONDS`` so writes handled by other workers show up.
+A snapshot built from a read replica right after a write is rebuilt again
+once the replica has had time to catch up (``settles_at``).
+"""
+import os
+import threading
+import time
+from datetime import date, timezone
+from typing import List, Optional
+import numpy as np
+from models.brand import Brand
+from models.influencer import Influencer
+from models.user import User
+from utils.geo import resolve
+from utils.response_cache import response_cache
+
+SUGGESTIONS_REFRESH_SECONDS = float(os.getenv("SUGGESTIONS_REFRESH_SECONDS", "60"))
+
+# score weights; every component is scaled to [0, 1] before weighting
+TAG_WEIGHT = 4.0
+LOCATION_WEIGHT = 2.0
+EVENT_WEIGHT = 1.5
+REACH_WEIGHT = 2.0
+VERIFIED_WEIGHT = 1.0
+FRESHNESS_WEIGHT = 0.5
+# days over which an upcoming event / an account's age decays by 1/e
+EVENT_HORIZON_DAYS = 30.0
+FRESHNESS_DAYS = 90.0
+# km over which the location score of a different place decays by 1/e
+NEARBY_KM = 50.0
+EARTH_RADIUS_KM = 6371.0
+
+NO_CODE = -2  # never equals a stored code, including -1 for NULL
+
+def _encode(values):
+    vocab = {}
+    codes = np.fromiter(
+        (-1 if v is None else vocab.setdefault(v, len(vocab)) for v in values),
+        dtype=np.int32, count=len(values),
+    )
+    return codes, vocab
+
+def _places(vocab: dict):
+    """Gazetteer coordinates per vocabulary code, NaN where unknown."""
+    lat = np.full(len(vocab), np.nan)
+    lon = np.full(len(vocab), np.nan)
+    for value, code in vocab.items():
+        place = resolve(value)
+        if place is not None:
+            lat[code], lon[code] = place.lat, place.lon
+    return lat, lon
+
+def _distance_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances from one point to many (haversine)."""
+    lat1, lat2 = np.radians(lat), np.radians(lats)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(np.radians(lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def _days(values) -> np.ndarray:
+    return np.array([np.nan if v is None else v.toordinal() for v in values], dtype=np.float64)
+
+def _epoch(values) -> np.ndarray:
+    # created_at is stored as naive UTC
+    return np.array(
+        [np.nan if v is None else v.replace(tzinfo=v.tzinfo or timezone.utc).timestamp() for v in values],
+        dtype=np.float64,
+    )
+
+class _Snapshot:
+    def __init__(self, rows, generations):
+        self.generations = generations
+        self.loaded_at = time.monotonic()
+        self.expires_at = self.loaded_at
+        self.rows = rows
+        self.size = len(rows)
+
+class _Ranker:
+    """Shared snapshot bookkeeping and top-K selection."""
+
+    tables = ()
+
+    def __init__(self, refresh_seconds: float = SUGGESTIONS_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+
+    def _build(self, db, generations) -> _Snapshot:
+        raise NotImplementedError
+
+    def snapshot(self, db) -> _Snapshot:
+        generations = response_cache.generations(self.tables)
+        snap = self._snapshot
+        if snap is not None and snap.generations == generations and time.monotonic() <= snap.expires_at:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is None or snap.generations != generations or time.monotonic() > snap.expires_at:
+                # generations are read before the query, so a write landing
+                # meanwhile makes this snapshot stale on the next request
+                started, settles_at = time.monotonic(), response_cache.settles_at(self.tables)
+                snap = self._build(db, generations)
+                snap.expires_at = snap.loaded_at + self.refresh_seconds
+                if settles_at > started:
+                    snap.expires_at = min(snap.expires_at, settles_at)
+                self._snapshot = snap
+            return snap
+
+    @staticmethod
+    def top_k(scores: np.ndarray, limit: int) -> np.ndarray:
+        """Indices of the ``limit`` best scores, best first; ties keep snapshot
+        (id) order."""
+        if limit < len(scores):
+            idx = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            idx = np.arange(len(scores))
+        return idx[np.lexsort((idx, -scores[idx]))]
+
+    @staticmethod
+    def _match(codes: np.ndarray, vocab: dict, value) -> np.ndarray:
+        code = vocab.get(value, NO_CODE) if value is not None else NO_CODE
+        return codes == code
+
+    @classmethod
+    def _proximity(cls, codes: np.ndarray, vocab: dict, places, location) -> np.ndarray:
+        """1 for the same location string or gazetteer place, decaying over
+        ``NEARBY_KM`` for other known places, 0 otherwise."""
+        score = cls._match(codes, vocab, location).astype(np.float64)
+        origin = resolve(location)
+        lat, lon = places
+        if origin is None or not len(lat):
+            return score
+        nearby = np.nan_to_num(np.exp(-_distance_km(origin.lat, origin.lon, lat, lon) / NEARBY_KM))
+        return np.maximum(score, np.where(codes >= 0, nearby[np.maximum(codes, 0)], 0.0))
+
+    @staticmethod
+    def _freshness(created: np.ndarray, now: float) -> np.ndarray:
+        age_days = np.maximum(now - created, 0.0) / 86400.0
+        return np.nan_to_num(np.exp(-age_days / FRESHNESS_DAYS))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+class BrandRanker(_Ranker):
+    """Ranks brands for an influencer on tag, location, event proximity and
+    freshness of the brand's account."""
+
+    tables = ("users", "brands")
+
+    def _build(self, db, generations) -> _Snapshot:
+        rows = (
+            db.query(Brand.id, Brand.name, Brand.tag, Brand.location, Brand.event_start, Brand.event_end, User.created_at)
+            .join(User, Brand.user_id == User.id)
+            .order_by(Brand.id)
+            .all()
+        )
+        snap = _Snapshot(rows, generations)
+        snap.tag, snap.tag_vocab = _encode([r[2] for r in rows])
+        snap.location, snap.location_vocab = _encode([r[3] for r in rows])
+        snap.location_places = _places(snap.location_vocab)
+        snap.event_start = _days([r[4] for r in rows])
+        snap.event_end = _days([r[5] for r in rows])
+        snap.created = _epoch([r[6] for r in rows])
+        return snap
+
+    def scores(self, snap: _Snapshot, tag: Optional[str], location: Optional[str],
+               today: date, now: float) -> np.ndarray:
+        day = float(today.toordinal())
+        start = np.where(np.isnan(snap.event_start), snap.event_end, snap.event_start)
+        end = np.where(np.isnan(snap.event_end), snap.event_start, snap.event_end)
+        # 1 while the event runs, decaying with the days until it starts, 0 once over
+        until = np.maximum(start - day, 0.0)
+        event = np.where(end < day, 0.0, np.exp(-until / EVENT_HORIZON_DAYS))
+        return (
+            TAG_WEIGHT * self._match(snap.tag, snap.tag_vocab, tag)
+            + LOCATION_WEIGHT * self._proximity(snap.location, snap.location_vocab, snap.location_places, location)
+            + EVENT_WEIGHT * np.nan_to_num(event)
+            + FRESHNESS_WEIGHT * self._freshness(snap.created, now)
+        )
+
+    def rank(self, db, tag: Optional[str], location: Optional[str], limit: int) -> List[dict]:
+        snap = self.snapshot(db)
+        if not snap.size:
+            return []
+        scores = self.scores(snap, tag, location, date.today(), time.time())
+        out = []
+        for i in self.top_k(scores, limit):
+            r = snap.rows[i]
+            out.append({
+                "brand_id": r[0],
+                "brand_name": r[1],
+                "brand_tag": r[2],
+                "brand_location": r[3],
+                "event_start": r[4],
+                "event_end": r[5],
+                "score": round(float(scores[i]), 6),
+            })
+        return out
+
+class InfluencerRanker(_Ranker):
+    """Ranks influencers for a brand on tag, location, reach, verification
+    and freshness of the influencer's account."""
+
+    tables = ("users", "influencers")
+
+    def _build(self, db, generations) -> _Snapshot:
+        rows = (
+            db.query(Influencer.id, User.name, User.tag, User.location, Influencer.reach, Influencer.verified, User.created_at)
+            .join(User, Influencer.user_id == User.id)
+            .order_by(Influencer.id)
+            .all()
+        )
+        snap = _Snapshot(rows, generations)
+        snap.tag, snap.tag_vocab = _encode([r[2] for r in rows])
+        snap.location, snap.location_vocab = _encode([r[3] for r in rows])
+        snap.location_places = _places(snap.location_vocab)
+        reach = np.array([r[4] or 0 for r in rows], dtype=np.float64)
+        # log scale so a handful of huge accounts do not flatten everyone else
+        log_reach = np.log1p(np.maximum(reach, 0.0))
+        top = log_reach.max() if len(rows) else 0.0
+        snap.reach = log_reach / top if top > 0 else log_reach
+        snap.verified = np.array([bool(r[5]) for r in rows], dtype=np.bool_)
+        snap.created = _epoch([r[6] for r in rows])
+        return snap
+
+    def scores(self, snap: _Snapshot, tag: Optional[str], location: Optional[str], now: float) -> np.ndarray:
+        return (
+            TAG_WEIGHT * self._match(snap.tag, snap.tag_vocab, tag)
+            + LOCATION_WEIGHT * self._proximity(snap.location, snap.location_vocab, snap.location_places, location)
+            + REACH_WEIGHT * snap.reach
+            + VERIFIED_WEIGHT * snap.verified
+            + FRESHNESS_WEIGHT * self._freshness(snap.created, now)
+        )
+
+    def rank(self, db, tag: Optional[str], location: Optional[str], limit: int) -> List[dict]:
+        snap = self.snapshot(db)
+        if not snap.size:
+            return []
+        scores = self.scores(snap, tag, location, time.time())
+        out = []
+        for i in self.top_k(scores, limit):
+            r = snap.rows[i]
+            out.append({
+                "influencer_id": r[0],
+                "name": r[1],
+                "tag": r[2],
+                "location": r[3],
+                "reach": r[4],
+                "verified": r[5],
+                "score": round(float(scores[i]), 6),
+            })
+        return out
+
+brand_ranker = BrandRanker()
+influencer_ranker = InfluencerRanker()
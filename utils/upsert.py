@@ -0,0 +1,68 @@
+# utils/upsert.py
+from typing import Iterable, List, Optional
+from sqlalchemy import and_, func
+
+def upsert(db, model, rows: List[dict], conflict_cols: Iterable[str], update_cols: Iterable[str],
+           coalesce_cols: Iterable[str] = (), update_if: Optional[dict] = None):
+    """Execute ``upsert_statement``; returns ``None`` when ``rows`` is empty."""
+    if not rows:
+        return None
+    return db.execute(upsert_statement(db, model, rows, conflict_cols, update_cols, coalesce_cols, update_if))
+
+def upsert_statement(db, model, rows: List[dict], conflict_cols: Iterable[str], update_cols: Iterable[str],
+                     coalesce_cols: Iterable[str] = (), update_if: Optional[dict] = None):
+    """Insert ``rows`` into ``model``'s table in one multi-row statement,
+    updating ``update_cols`` where a row collides on ``conflict_cols``.
+
+    Columns in ``coalesce_cols`` are updated to ``COALESCE(new, existing)``,
+    so a ``None`` in the incoming row keeps the stored value.
+
+    ``update_if`` (column -> value) limits the update to colliding rows
+    holding those values; other collisions leave the stored row as it is.
+
+    Compiles to ``INSERT ... ON DUPLICATE KEY UPDATE`` on MySQL and
+    ``INSERT ... ON CONFLICT DO UPDATE`` on SQLite/PostgreSQL. MySQL resolves
+    the conflict against whichever unique key collides, so ``conflict_cols``
+    is only used by the other dialects.
+    """
+    update_cols = list(update_cols)
+    coalesce_cols = set(coalesce_cols)
+    table = model.__table__
+
+    guard = and_(*(table.c[c] == v for c, v in update_if.items())) if update_if else None
+
+    def assignments(new_values, guarded=False):
+        values = {
+            c: func.coalesce(new_values[c], table.c[c]) if c in coalesce_cols else new_values[c]
+            for c in update_cols
+        }
+        if guarded and guard is not None:
+            # no WHERE on ON DUPLICATE KEY UPDATE: keep the stored value instead
+            values = {c: func.if_(guard, value, table.c[c]) for c, value in values.items()}
+        return values
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(model).values(rows)
+        if update_cols:
+            stmt = stmt.on_duplicate_key_update(assignments(stmt.inserted, guarded=True))
+        else:
+            stmt = stmt.prefix_with("IGNORE")
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(model).values(rows)
+        if update_cols:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(conflict_cols),
+                set_=assignments(stmt.excluded),
+                where=guard,
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_cols))
+    else:
+        raise NotImplementedError(f"upsert is not supported for dialect '{dialect}'")
+    return stmt